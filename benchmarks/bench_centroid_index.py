@@ -0,0 +1,112 @@
+"""
+Latency and recall of centroid-pruned search against brute-force MaxSim.
+
+Builds topical synthetic corpora of growing size straight into one flat float16
+token matrix (as in the offline index), every page drawing its tokens from the
+words of one topic, and queries made of noisy tokens of a target page. Reports
+for every size the index build time, the brute-force and the pruned search
+latency per query, the recall@k of the pruned search against brute force and
+how often it finds the target page. Brute force grows linearly
+with the corpus, pruned search about with its square root. A million pages of 16
+tokens of dimension 64 take 2 GB as float16:
+
+    python benchmarks/bench_centroid_index.py --sizes 10000 100000 1000000 \
+        --page-tokens 16 --dim 64
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from colivara_py.centroid_index import CentroidIndex
+from colivara_py.maxsim import MaxSimScorer
+
+
+def normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def corpus(
+    args: argparse.Namespace, pages: int, rng: np.random.Generator
+) -> MaxSimScorer:
+    # every page is about one topic and draws its tokens from the words of that topic
+    vocabulary = normalize(rng.standard_normal((args.vocabulary, args.dim)))
+    topics = rng.integers(args.vocabulary, size=(args.topics, args.topic_words))
+    tokens = np.empty((pages * args.page_tokens, args.dim), dtype=np.float16)
+    step = 2**16 // args.page_tokens
+    for first in range(0, pages, step):
+        count = min(step, pages - first)
+        words = np.take_along_axis(
+            topics[rng.integers(args.topics, size=count)],
+            rng.integers(args.topic_words, size=(count, args.page_tokens)),
+            axis=1,
+        ).ravel()
+        tokens[first * args.page_tokens : (first + count) * args.page_tokens] = (
+            normalize(
+                vocabulary[words]
+                + 0.5 * rng.standard_normal((len(words), args.dim)) / args.dim**0.5
+            )
+        )
+    offsets = np.arange(pages + 1) * args.page_tokens
+    return MaxSimScorer.from_flat(tokens, offsets)
+
+
+def recall(found: np.ndarray, expected: np.ndarray) -> float:
+    hits = [len(set(a) & set(b)) for a, b in zip(found, expected)]
+    return sum(hits) / expected.size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--page-tokens", type=int, default=32)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--vocabulary", type=int, default=16384)
+    parser.add_argument("--topics", type=int, default=1024)
+    parser.add_argument("--topic-words", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--query-tokens", type=int, default=16)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--probe", type=int, default=2)
+    parser.add_argument("--candidates", type=int, default=256)
+    args = parser.parse_args()
+
+    print(
+        f"{'pages':>8} {'centroids':>9} {'build':>7} {'brute':>9} {'pruned':>9}"
+        f"  recall@{args.top_k}  target@{args.top_k}"
+    )
+    for size in args.sizes:
+        rng = np.random.default_rng(0)
+        scorer = corpus(args, size, rng)
+        targets = rng.integers(size, size=args.queries)
+        queries = [
+            normalize(
+                scorer.tokens[
+                    target * args.page_tokens
+                    + rng.integers(args.page_tokens, size=args.query_tokens)
+                ].astype(np.float32)
+                + 0.5
+                * rng.standard_normal((args.query_tokens, args.dim))
+                / args.dim**0.5
+            ).astype(np.float32)
+            for target in targets
+        ]
+        start = time.perf_counter()
+        expected, _ = scorer.search(queries, args.top_k)
+        brute_ms = (time.perf_counter() - start) * 1000 / args.queries
+        start = time.perf_counter()
+        index = CentroidIndex(scorer)
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        found, _ = index.search(queries, args.top_k, args.probe, args.candidates)
+        pruned_ms = (time.perf_counter() - start) * 1000 / args.queries
+        print(
+            f"{size:>8} {len(index.centroids):>9} {built:>6.1f}s {brute_ms:>7.1f}ms "
+            f"{pruned_ms:>7.1f}ms  {recall(found, expected):.3f}      "
+            f"{np.mean([t in row for t, row in zip(targets, found)]):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Time and peak memory of reading the pages of one large document.
+
+Runs a local stub of the document endpoint that returns a document with all its
+page images and compares `get_document(expand="pages")`, which holds the whole
+response and every page, against `iter_document_pages`, which streams the
+response and validates every page as it arrives.
+
+    python benchmarks/bench_document_pages.py --pages 500 --image-kb 200
+"""
+
+import argparse
+import json
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Tuple
+
+from colivara_py import Colivara
+
+
+def document_response(pages: int, image_kb: int) -> bytes:
+    image = "QUJD" * (image_kb * 256)
+    document = {
+        "id": 1,
+        "name": "report.pdf",
+        "metadata": {},
+        "num_pages": pages,
+        "collection_name": "bench",
+        "pages": [
+            {"document_name": "report.pdf", "img_base64": image, "page_number": page}
+            for page in range(1, pages + 1)
+        ],
+    }
+    return json.dumps(document).encode()
+
+
+def serve(content: bytes) -> ThreadingHTTPServer:
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(call: Callable[[], int]) -> Tuple[float, float, int]:
+    # timed without tracemalloc, which slows down every allocation
+    start = time.perf_counter()
+    count = call()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 2**20, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--image-kb", type=int, default=200)
+    args = parser.parse_args()
+
+    content = document_response(args.pages, args.image_kb)
+    print(f"{len(content) / 2**20:.1f} MB response")
+    server = serve(content)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    with Colivara(base_url=base_url, api_key="bench") as client:
+
+        def whole() -> int:
+            document = client.get_document("report.pdf", "bench", expand="pages")
+            return len(document.pages or [])
+
+        def streamed() -> int:
+            return sum(1 for _ in client.iter_document_pages("report.pdf", "bench"))
+
+        for name, call in (("get_document", whole), ("iter_document_pages", streamed)):
+            elapsed, peak, count = measure(call)
+            print(f"  {name:<20} {elapsed:8.1f}ms  peak={peak:7.1f}MB  ({count} pages)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
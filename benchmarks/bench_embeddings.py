@@ -0,0 +1,80 @@
+"""
+Time and peak memory of turning an embeddings response into NumPy arrays.
+
+Compares parsing `EmbeddingsOut` and converting its nested float lists with
+`np.asarray` against `EmbeddingArrays.from_json`, which parses the raw body
+straight into float32 arrays.
+
+    python benchmarks/bench_embeddings.py --inputs 16 --tokens 1030
+"""
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, List
+
+import numpy as np
+
+from colivara_py.arrays import EmbeddingArrays
+from colivara_py.models import EmbeddingsOut
+
+
+def embeddings_response(inputs: int, tokens: int, dim: int) -> bytes:
+    rng = np.random.default_rng(0)
+    data = [
+        {
+            "object": "embedding",
+            "embedding": rng.standard_normal((tokens, dim)).round(6).tolist(),
+            "index": index,
+        }
+        for index in range(inputs)
+    ]
+    body = {"object": "list", "data": data, "model": "colpali", "usage": {}}
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def measure(parse: Callable[[], Any], rounds: int) -> List[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        parse()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def peak_mb(parse: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inputs", type=int, default=8)
+    parser.add_argument("--tokens", type=int, default=1030)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    content = embeddings_response(args.inputs, args.tokens, args.dim)
+    print(f"{len(content) / 2**20:.1f} MB response")
+
+    def nested_lists() -> object:
+        out = EmbeddingsOut.model_validate_json(content)
+        return [np.asarray(item["embedding"], np.float32) for item in out.data]
+
+    parsers = {
+        "EmbeddingsOut": nested_lists,
+        "from_json": lambda: EmbeddingArrays.from_json(content),
+    }
+    for name, parse in parsers.items():
+        median = statistics.median(measure(parse, args.rounds))
+        print(f"  {name:<14} {median:8.2f}ms  peak={peak_mb(parse):7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Overhead of the event hooks on small requests.
+
+Runs the stand-in API server with `--results` documents and times `--requests`
+searches without hooks, with a hook that does nothing and with a hook that adds
+up the timings of every endpoint, then prints where the time of the searches went.
+
+    python benchmarks/bench_event_hooks.py --requests 2000
+"""
+
+import argparse
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from colivara_py import Colivara, RequestEvent
+from colivara_py.stub_server import StubServer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--results", type=int, default=3)
+    args = parser.parse_args()
+
+    server = StubServer(image_bytes=3 * 1024).start()
+    for index in range(args.results):
+        server.add_document(f"document{index}.pdf", "bench")
+    totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+
+    def record(event: RequestEvent) -> None:
+        total = totals[event.endpoint]
+        total[0] += 1
+        total[1] += event.serialize
+        total[2] += event.network
+        total[3] += event.parse
+
+    configurations = {
+        "no hooks": {},
+        "no-op hook": {"request_end": [lambda event: None]},
+        "recording hook": {"request_end": [record]},
+    }
+    for name, hooks in configurations.items():
+        with Colivara(
+            base_url=server.url, api_key="bench", event_hooks=hooks
+        ) as client:
+            client.search("warm up")
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                client.search("what is 1+1?", top_k=args.results)
+            elapsed = time.perf_counter() - start
+        print(f"  {name:<15} {elapsed * 1e6 / args.requests:8.1f}us per search")
+
+    for endpoint, (count, serialize, network, parse) in totals.items():
+        print(
+            f"  {endpoint}: serialize {serialize * 1e6 / count:.1f}us, "
+            f"network {network * 1e6 / count:.1f}us, parse {parse * 1e6 / count:.1f}us"
+        )
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
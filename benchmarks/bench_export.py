@@ -0,0 +1,91 @@
+"""
+Time of writing the page images of a document to disk.
+
+Builds a document of random page images and compares saving the pages one by one
+with `PageOut.save` against `export_pages`, which decodes and writes them in a
+thread pool, and against exporting again into the same directory, where every page
+is skipped by its size (no decoding at all) or by its hash.
+
+    python benchmarks/bench_export.py --pages 500 --image-kb 200 --workers 8
+"""
+
+import argparse
+import base64
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from colivara_py.export import export_pages
+from colivara_py.models import DocumentOut, PageOut
+
+
+def document(pages: int, image_kb: int) -> DocumentOut:
+    header = b"\x89PNG\r\n\x1a\n"
+    return DocumentOut(
+        id=1,
+        name="report.pdf",
+        num_pages=pages,
+        collection_name="bench",
+        pages=[
+            PageOut(
+                document_name="report.pdf",
+                page_number=page,
+                img_base64=base64.b64encode(
+                    header + os.urandom(image_kb * 1024)
+                ).decode(),
+            )
+            for page in range(1, pages + 1)
+        ],
+    )
+
+
+def timed(call: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    call()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--image-kb", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    doc = document(args.pages, args.image_kb)
+    root = Path(tempfile.mkdtemp())
+    print(f"{args.pages * args.image_kb / 1024:.1f} MB of images")
+
+    def save_loop() -> None:
+        out = root / "loop"
+        out.mkdir()
+        for page in doc.pages or []:
+            # a fresh copy, save caches the decoded image on the page
+            PageOut(**page.model_dump()).save(out / f"page_{page.page_number:04d}.png")
+
+    try:
+        results = {
+            "save loop": timed(save_loop),
+            "export_pages": timed(
+                lambda: export_pages(doc, root / "export", args.workers)
+            ),
+            "re-export (size)": timed(
+                lambda: export_pages(doc, root / "export", args.workers)
+            ),
+            "re-export (hash)": timed(
+                lambda: export_pages(
+                    doc, root / "export", args.workers, skip_existing="hash"
+                )
+            ),
+        }
+    finally:
+        shutil.rmtree(root)
+    for name, elapsed in results.items():
+        print(f"  {name:<17} {elapsed:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Time and bytes uploaded when only the metadata of documents changes.
+
+Runs the stand-in API server, which keeps the uploaded documents in memory,
+uploads `--documents` documents of `--document-kb` each with `fingerprint=True`,
+then upserts them again unchanged and with new metadata, which only sends a GET
+and a PATCH with the metadata per document, and finally as full uploads without
+fingerprints.
+
+    python benchmarks/bench_fingerprint.py --documents 200 --document-kb 1024
+"""
+
+import argparse
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from colivara_py import Colivara
+from colivara_py.stub_server import StubServer
+
+
+def measure(server: StubServer, call: Callable[[], object]) -> Tuple[float, float]:
+    server.bytes_received = 0
+    start = time.perf_counter()
+    call()
+    return (time.perf_counter() - start) * 1000, server.bytes_received / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--document-kb", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    server = StubServer().start()
+    contents = [os.urandom(args.document_kb * 1024) for _ in range(args.documents)]
+
+    def documents(version: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": f"document{index}",
+                "document_data": content,
+                "metadata": {"v": version},
+            }
+            for index, content in enumerate(contents)
+        ]
+
+    with Colivara(base_url=server.url, api_key="bench") as client:
+        runs = {
+            "first upload": lambda: client.upsert_documents(
+                documents(0), "bench", args.workers, fingerprint=True
+            ),
+            "unchanged": lambda: client.upsert_documents(
+                documents(0), "bench", args.workers, fingerprint=True
+            ),
+            "metadata only": lambda: client.upsert_documents(
+                documents(1), "bench", args.workers, fingerprint=True
+            ),
+            "full re-upload": lambda: client.upsert_documents(
+                documents(2), "bench", args.workers
+            ),
+        }
+        for name, call in runs.items():
+            elapsed, uploaded = measure(server, call)
+            print(f"  {name:<15} {elapsed:9.1f}ms  {uploaded:8.1f}MB sent")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Search latency and heap usage of a memory-mapped `LocalIndex`.
+
+Builds an index of random ColPali-sized pages in a temporary directory, then
+searches it. The Python heap stays bounded by the scoring block size whatever
+the size of the index, the token matrix itself is only memory-mapped.
+
+    python benchmarks/bench_index.py --pages 2000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from colivara_py.index import LocalIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--pages-per-document", type=int, default=10)
+    parser.add_argument("--page-tokens", type=int, default=1030)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--searches", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as path:
+        index = LocalIndex(path)
+        start = time.perf_counter()
+        for number in range(args.pages // args.pages_per_document):
+            pages = rng.standard_normal(
+                (args.pages_per_document, args.page_tokens, args.dim)
+            ).astype(np.float16)
+            index.add(f"doc{number}", list(pages))
+        elapsed = time.perf_counter() - start
+        size = index.tokens.nbytes / 2**20
+        print(f"indexed {len(index)} pages ({size:.0f} MB of tokens) in {elapsed:.1f}s")
+
+        query = rng.standard_normal((20, args.dim)).astype(np.float32)
+        index.search(query)  # warm the page cache
+        timings = []
+        for _ in range(args.searches):
+            start = time.perf_counter()
+            index.search(query, top_k=10)
+            timings.append((time.perf_counter() - start) * 1000)
+        tracemalloc.start()
+        index.search(query, top_k=10)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"search p50={statistics.median(timings):.1f}ms "
+            f"heap peak={peak / 2**20:.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Time and peak memory of listing a large collection with its page images.
+
+Runs a local stub of the documents endpoint that returns every document with its
+pages and compares `list_documents`, which holds the whole list, against
+`iter_documents`, which streams the response and holds one batch of
+`--batch-size` documents at a time, with and without `skip_pages`.
+
+    python benchmarks/bench_iter_documents.py --documents 200 --pages 10
+"""
+
+import argparse
+import json
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Tuple
+
+from colivara_py import Colivara
+
+
+def documents_response(documents: int, pages: int, image_kb: int) -> bytes:
+    image = "QUJD" * (image_kb * 256)
+    body = [
+        {
+            "id": index,
+            "name": f"document{index}",
+            "metadata": {"index": index},
+            "num_pages": pages,
+            "collection_name": "bench",
+            "pages": [
+                {
+                    "document_name": f"document{index}",
+                    "img_base64": image,
+                    "page_number": page,
+                }
+                for page in range(1, pages + 1)
+            ],
+        }
+        for index in range(documents)
+    ]
+    return json.dumps(body).encode()
+
+
+def serve(content: bytes) -> ThreadingHTTPServer:
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(call: Callable[[], int]) -> Tuple[float, float, int]:
+    # timed without tracemalloc, which slows down every allocation
+    start = time.perf_counter()
+    count = call()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 2**20, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--image-kb", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=10)
+    args = parser.parse_args()
+
+    content = documents_response(args.documents, args.pages, args.image_kb)
+    print(f"{len(content) / 2**20:.1f} MB response")
+    server = serve(content)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    with Colivara(base_url=base_url, api_key="bench") as client:
+        calls = {
+            "list_documents": lambda: len(client.list_documents("all", "pages")),
+            "iter_documents": lambda: sum(
+                1 for _ in client.iter_documents("all", "pages", args.batch_size)
+            ),
+            "skip_pages": lambda: sum(
+                1
+                for _ in client.iter_documents(
+                    "all", "pages", args.batch_size, skip_pages=True
+                )
+            ),
+        }
+        for name, call in calls.items():
+            elapsed, peak, count = measure(call)
+            print(f"  {name:<15} {elapsed:8.1f}ms  peak={peak:7.1f}MB  ({count} docs)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Throughput of local MaxSim scoring.
+
+Compares `MaxSimScorer` with a per-page loop over `(q @ p.T).max(axis=1).sum()`
+on random ColPali-sized embeddings, for a few block sizes.
+
+    python benchmarks/bench_maxsim.py --pages 1000 --queries 32
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from colivara_py.maxsim import MaxSimScorer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--page-tokens", type=int, default=1030)
+    parser.add_argument("--queries", type=int, default=32)
+    parser.add_argument("--query-tokens", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=128)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pages = [
+        rng.standard_normal((args.page_tokens, args.dim)).astype(np.float32)
+        for _ in range(args.pages)
+    ]
+    queries = [
+        rng.standard_normal((args.query_tokens, args.dim)).astype(np.float32)
+        for _ in range(args.queries)
+    ]
+
+    start = time.perf_counter()
+    for query in queries:
+        [(query @ page.T).max(axis=1).sum() for page in pages]
+    loop = time.perf_counter() - start
+    print(f"{'per-page loop':<22} {loop * 1000:9.1f}ms")
+
+    for block_size in (2**18, 2**20, 2**22, 2**24):
+        scorer = MaxSimScorer(pages, block_size=block_size)
+        start = time.perf_counter()
+        scorer.score(queries)
+        elapsed = time.perf_counter() - start
+        label = f"scorer block=2**{block_size.bit_length() - 1}"
+        print(f"{label:<22} {elapsed * 1000:9.1f}ms  {loop / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Time and peak memory of parsing large, image-heavy responses.
+
+Compares the previous `Model(**response.json())` path with validating the raw bytes
+in one pass, using pydantic's own JSON parser and orjson.
+
+    python benchmarks/bench_parsing.py --pages 200 --image-kb 300
+"""
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, List
+
+from colivara_py.client import _validate_json
+from colivara_py.models import DocumentOut, QueryOut
+
+
+def search_response(pages: int, image_size: int) -> bytes:
+    image = base64.b64encode(os.urandom(image_size)).decode()
+    return json.dumps(
+        {
+            "query": "what is 1+1?",
+            "results": [
+                {
+                    "collection_name": "bench",
+                    "collection_id": 1,
+                    "document_name": f"doc-{i}",
+                    "document_id": i,
+                    "page_number": 1,
+                    "raw_score": 1.0,
+                    "normalized_score": 1.0,
+                    "img_base64": image,
+                }
+                for i in range(pages)
+            ],
+        }
+    ).encode()
+
+
+def document_response(pages: int, image_size: int) -> bytes:
+    image = base64.b64encode(os.urandom(image_size)).decode()
+    return json.dumps(
+        {
+            "id": 1,
+            "name": "doc",
+            "metadata": {},
+            "collection_name": "bench",
+            "num_pages": pages,
+            "pages": [
+                {"document_name": "doc", "img_base64": image, "page_number": i}
+                for i in range(1, pages + 1)
+            ],
+        }
+    ).encode()
+
+
+def measure(parse: Callable[[], Any], rounds: int) -> List[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        parse()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def peak_mb(parse: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--image-kb", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    for label, model, content in (
+        ("search", QueryOut, search_response(args.pages, args.image_kb * 1024)),
+        ("document", DocumentOut, document_response(args.pages, args.image_kb * 1024)),
+    ):
+        print(f"{label}: {len(content) / 2**20:.1f} MB response")
+        parsers = {
+            "json.loads": lambda: model(**json.loads(content)),
+            "pydantic": lambda: _validate_json(content, model, "pydantic"),
+        }
+        try:
+            import orjson  # noqa: F401
+
+            parsers["orjson"] = lambda: _validate_json(content, model, "orjson")
+        except ImportError:
+            print("  orjson is not installed, skipping it")
+        for name, parse in parsers.items():
+            parse()  # warm up
+            median = statistics.median(measure(parse, args.rounds))
+            print(f"  {name:<12} {median:8.2f}ms  peak={peak_mb(parse):7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
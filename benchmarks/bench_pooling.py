@@ -0,0 +1,70 @@
+"""
+Per-call latency of `Colivara.search` with and without connection pooling.
+
+Runs the stand-in API server and times the same `client.search` call over the
+pooled client session and over a new session, so a new connection, per call.
+
+    python benchmarks/bench_pooling.py --calls 2000
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+import requests
+
+from colivara_py import Colivara
+from colivara_py.stub_server import StubServer
+
+
+def measure(call: Callable[[], object], calls: int) -> List[float]:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: List[float]) -> None:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<12} p50={p50:.3f}ms p99={p99:.3f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=1000)
+    args = parser.parse_args()
+
+    server = StubServer(image_bytes=3).start()
+    server.add_document("doc", "bench")
+    base_url = server.url
+
+    fresh = Colivara(base_url=base_url, api_key="bench")
+    with Colivara(base_url=base_url, api_key="bench") as client:
+
+        def unpooled() -> object:
+            # what every method did before the client owned a session: the same call,
+            # parsing included, over a new connection
+            with requests.Session() as session:
+                fresh.session = session
+                return fresh.search("what is 1+1?")
+
+        def pooled() -> object:
+            return client.search("what is 1+1?")
+
+        # warm up both paths
+        measure(unpooled, 10)
+        measure(pooled, 10)
+        report("unpooled", measure(unpooled, args.calls))
+        report("pooled", measure(pooled, args.calls))
+
+    fresh.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Memory, speed and recall of the compressed MaxSim scorers.
+
+Builds clustered synthetic page embeddings (tokens are noisy copies of a shared
+vocabulary of directions, like real ColPali patches), queries made of noisy
+tokens of a target page, and reports for every scorer its memory against
+float32, its recall@k against exact MaxSim scoring, alone and with exact
+rescoring of its candidates.
+
+    python benchmarks/bench_quantization.py --pages 2000 --candidates 100
+"""
+
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from colivara_py.maxsim import MaxSimScorer
+from colivara_py.quantization import (
+    BinaryScorer,
+    Int8Scorer,
+    PQScorer,
+    rescored_search,
+)
+
+
+def normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def corpus(args: argparse.Namespace, rng: np.random.Generator) -> List[np.ndarray]:
+    vocabulary = normalize(rng.standard_normal((args.vocabulary, args.dim)))
+    return [
+        normalize(
+            vocabulary[rng.integers(args.vocabulary, size=args.page_tokens)]
+            + 0.5 * rng.standard_normal((args.page_tokens, args.dim)) / args.dim**0.5
+        ).astype(np.float32)
+        for _ in range(args.pages)
+    ]
+
+
+def recall(found: np.ndarray, expected: np.ndarray) -> float:
+    hits = [len(set(a) & set(b)) for a, b in zip(found, expected)]
+    return sum(hits) / expected.size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--page-tokens", type=int, default=256)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--vocabulary", type=int, default=4096)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--query-tokens", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pages = corpus(args, rng)
+    targets = rng.integers(args.pages, size=args.queries)
+    queries = [
+        normalize(
+            pages[target][rng.integers(args.page_tokens, size=args.query_tokens)]
+            + rng.standard_normal((args.query_tokens, args.dim)) / args.dim**0.5
+        ).astype(np.float32)
+        for target in targets
+    ]
+
+    exact = MaxSimScorer(pages)
+    start = time.perf_counter()
+    expected, _ = exact.search(queries, args.top_k)
+    exact_ms = (time.perf_counter() - start) * 1000
+    print(
+        f"{'scorer':<8} {'memory':>8} {'build':>8} {'search':>9}  recall@{args.top_k}"
+    )
+    print(f"{'float32':<8} {1:>7.1f}x {0:>7.1f}s {exact_ms:>7.1f}ms  1.000")
+
+    for name, build in (
+        ("float16", lambda: MaxSimScorer(pages, np.float16)),
+        ("int8", lambda: Int8Scorer(pages)),
+        ("pq16", lambda: PQScorer(pages, subspaces=16)),
+        ("binary", lambda: BinaryScorer(pages)),
+    ):
+        start = time.perf_counter()
+        scorer = build()
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        found, _ = scorer.search(queries, args.top_k)
+        elapsed = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        rescored, _ = rescored_search(
+            scorer, exact, queries, args.top_k, args.candidates
+        )
+        rescore_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"{name:<8} {exact.nbytes / scorer.nbytes:>7.1f}x {built:>7.1f}s "
+            f"{elapsed:>7.1f}ms  {recall(found, expected):.3f}, "
+            f"rescored top {args.candidates}: {recall(rescored, expected):.3f} "
+            f"in {rescore_ms:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
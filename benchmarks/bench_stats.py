@@ -0,0 +1,64 @@
+"""
+Cost and accuracy of the latency histograms of `RequestStats`.
+
+Feeds `--events` request events with log-normally distributed latencies to a
+`RequestStats`, then compares its percentiles with the exact ones of the sorted
+latencies and times recording an event, taking a snapshot and formatting the
+statistics for Prometheus.
+
+    python benchmarks/bench_stats.py --events 1000000
+"""
+
+import argparse
+import random
+import time
+
+from colivara_py import RequestEvent, RequestStats
+
+ENDPOINTS = (
+    ("POST", "/v1/search/"),
+    ("POST", "/v1/documents/upsert-document/"),
+    ("GET", "/v1/documents/report.pdf/"),
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    events = []
+    for index in range(args.events):
+        event = RequestEvent(*ENDPOINTS[index % len(ENDPOINTS)])
+        event.network = rng.lognormvariate(-3, 1)
+        event.status = 200
+        event.bytes_sent = event.bytes_received = 1024
+        events.append(event)
+
+    stats = RequestStats()
+    start = time.perf_counter()
+    for event in events:
+        stats(event)
+    recorded = time.perf_counter() - start
+    print(f"  record       {recorded * 1e9 / args.events:8.0f}ns per event")
+
+    start = time.perf_counter()
+    search = stats.snapshot()["POST /v1/search/"]
+    print(f"  snapshot     {(time.perf_counter() - start) * 1e3:8.2f}ms")
+    start = time.perf_counter()
+    stats.prometheus()
+    print(f"  prometheus   {(time.perf_counter() - start) * 1e3:8.2f}ms")
+
+    latencies = sorted(event.elapsed for event in events[:: len(ENDPOINTS)])
+    for name, quantile in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999)):
+        exact = latencies[max(int(quantile * len(latencies)) - 1, 0)]
+        estimate = getattr(search, name)
+        print(
+            f"  {name:<5} exact {exact * 1e3:8.3f}ms  histogram {estimate * 1e3:8.3f}ms"
+            f"  ({(estimate - exact) / exact:+.2%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
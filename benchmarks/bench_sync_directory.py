@@ -0,0 +1,81 @@
+"""
+Time and uploads of syncing a directory run after run.
+
+Runs the stand-in API server, fills a directory with `--files` small documents
+and compares uploading all of them with `upsert_documents` on every run against
+`sync_directory`: the first sync, a sync without changes (only a `stat` per
+file), and a sync after `--changed` percent of the files were modified and as
+many were removed.
+
+    python benchmarks/bench_sync_directory.py --files 10000 --changed 1
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Tuple
+
+from colivara_py import Colivara
+from colivara_py.stub_server import StubServer
+
+UPSERTS = "POST /v1/documents/upsert-document/"
+
+
+def measure(server: StubServer, call: Callable[[], object]) -> Tuple[float, int]:
+    server.requests.clear()
+    start = time.perf_counter()
+    call()
+    return (time.perf_counter() - start) * 1000, server.requests[UPSERTS]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--file-kb", type=int, default=16)
+    parser.add_argument("--changed", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp())
+    server = StubServer().start()
+    files = []
+    for index in range(args.files):
+        path = root / f"folder{index % 100}" / f"document{index}.pdf"
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"%PDF" + bytes([index % 256]) * (args.file_kb * 1024))
+        files.append(path)
+    changed = files[:: max(1, round(100 / args.changed))]
+
+    def change_and_sync(client: Colivara) -> object:
+        for path in changed[: len(changed) // 2]:
+            path.write_bytes(path.read_bytes() + b"changed")
+        for path in changed[len(changed) // 2 :]:
+            path.unlink()
+        return client.sync_directory(root, "bench", max_workers=args.workers)
+
+    try:
+        with Colivara(base_url=server.url, api_key="bench") as client:
+            runs = {
+                "upsert_documents": lambda: client.upsert_documents(
+                    files, "bench", args.workers
+                ),
+                "first sync": lambda: client.sync_directory(
+                    root, "bench", max_workers=args.workers
+                ),
+                "no changes": lambda: client.sync_directory(
+                    root, "bench", max_workers=args.workers
+                ),
+                f"{args.changed:g}% changed": lambda: change_and_sync(client),
+            }
+            for name, call in runs.items():
+                elapsed, count = measure(server, call)
+                print(f"  {name:<17} {elapsed:9.1f}ms  {count:6d} uploads")
+    finally:
+        server.stop()
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Storage, scoring time and ranking drift of token pooling.
+
+Builds synthetic pages whose patches come in groups of near duplicates, like
+neighbouring patches of a page image, pools them with several factors and
+compares the MaxSim ranking of the pooled pages with the unpooled one.
+
+    python benchmarks/bench_token_pooling.py --pages 500 --factors 2 3 4
+"""
+
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from colivara_py.maxsim import MaxSimScorer
+from colivara_py.token_pooling import pool_pages
+
+
+def normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def page(args: argparse.Namespace, rng: np.random.Generator) -> np.ndarray:
+    regions = normalize(rng.standard_normal((args.page_tokens // 4, args.dim)))
+    patches = regions[rng.integers(len(regions), size=args.page_tokens)]
+    noise = 0.3 * rng.standard_normal(patches.shape) / args.dim**0.5
+    return normalize(patches + noise).astype(np.float32)
+
+
+def overlap(found: np.ndarray, expected: np.ndarray) -> float:
+    return sum(len(set(a) & set(b)) for a, b in zip(found, expected)) / expected.size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--page-tokens", type=int, default=1030)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--query-tokens", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--factors", type=int, nargs="+", default=[2, 3, 4])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pages = [page(args, rng) for _ in range(args.pages)]
+    queries: List[np.ndarray] = []
+    for target in rng.integers(args.pages, size=args.queries):
+        tokens = pages[target][rng.integers(args.page_tokens, size=args.query_tokens)]
+        noise = rng.standard_normal(tokens.shape) / args.dim**0.5
+        queries.append(normalize(tokens + noise).astype(np.float32))
+
+    exact = MaxSimScorer(pages)
+    start = time.perf_counter()
+    expected, _ = exact.search(queries, args.top_k)
+    baseline = time.perf_counter() - start
+    print(
+        f"{'factor':<7} {'storage':>8} {'pooling':>9} {'search':>9}  recall@{args.top_k}  top-1"
+    )
+    print(
+        f"{1:<7} {exact.nbytes / 2**20:>6.1f}MB {0:>8.1f}s {baseline * 1000:>7.1f}ms  1.000   1.000"
+    )
+
+    for factor in args.factors:
+        start = time.perf_counter()
+        pooled = MaxSimScorer(pool_pages(pages, factor))
+        pooling = time.perf_counter() - start
+        start = time.perf_counter()
+        found, _ = pooled.search(queries, args.top_k)
+        elapsed = time.perf_counter() - start
+        top_1 = float(np.mean(found[:, 0] == expected[:, 0]))
+        print(
+            f"{factor:<7} {pooled.nbytes / 2**20:>6.1f}MB {pooling:>8.1f}s "
+            f"{elapsed * 1000:>7.1f}ms  {overlap(found, expected):.3f}   {top_1:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,15 @@
 from .client import Colivara
 from .async_client import AsyncColivara
+from .cache import TTLCache
+from .events import RequestEvent
+from .retry import RetryPolicy
+from .stats import RequestStats
 
-__all__ = ["Colivara", "AsyncColivara"]
+__all__ = [
+    "Colivara",
+    "AsyncColivara",
+    "RequestEvent",
+    "RequestStats",
+    "RetryPolicy",
+    "TTLCache",
+]
@@ -1,7 +1,882 @@
-from typing import Optional
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    overload,
+)
+
+import httpx
+from pydantic import ValidationError
+
+from .client import (
+    _build_document_in,
+    _build_embeddings_in,
+    _build_query_in,
+    _check_json_backend,
+    _content_length,
+    _file_to_base64,
+    _fingerprint,
+    _parse_documents,
+    _same_content,
+    _validate_json,
+)
+from .events import EventHook, RequestEvent, check_event_hooks, instrumented
+from .export import _Exporter
+from .manifest import FINGERPRINT_KEY
+from .stats import EndpointStats, RequestStats, check_request_stats
+from .streaming import CHUNK_SIZE, JSONArrayItems
+from .models import (
+    CollectionIn,
+    CollectionOut,
+    DocumentInPatch,
+    DocumentOut,
+    EmbeddingsOut,
+    FileOut,
+    GenericError,
+    GenericMessage,
+    PageOut,
+    PatchCollectionIn,
+    QueryOut,
+    TaskEnum,
+)
+
+if TYPE_CHECKING:
+    from numpy.typing import DTypeLike
+
+    from .arrays import EmbeddingArrays
+
+T = TypeVar("T")
 
 
 class AsyncColivara:
-    # not implemented yet
-    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None):
-        raise NotImplementedError("AsyncColivara is not implemented yet.")
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        timeout: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        json_backend: str = "pydantic",
+        event_hooks: Optional[Mapping[str, Iterable[EventHook]]] = None,
+        request_stats: Optional[RequestStats] = None,
+    ):
+        """
+        Initializes the async Colivara client.
+
+        All calls share one `httpx.AsyncClient` connection pool, so many concurrent
+        requests can run on a single event loop. Call `aclose()` or use the client
+        as an async context manager to release the connections.
+
+        Args:
+            base_url: The base URL for the API (optional).
+            api_key: The API key for authentication (optional).
+            max_connections: The maximum number of concurrent connections (optional).
+            max_keepalive_connections: The maximum number of idle connections kept alive (optional).
+            timeout: The request timeout in seconds, None disables it (optional).
+            transport: A custom httpx transport, e.g. for testing (optional).
+            json_backend: How responses are parsed, "pydantic" or "orjson" (optional).
+                See `Colivara`.
+            event_hooks: Functions called with a `RequestEvent` on "request_start" and
+                "request_end" of every API request (optional). See `Colivara`.
+            request_stats: Collects latency histograms, error and byte counts per endpoint
+                (optional), read with `stats()`. See `Colivara`.
+
+        Raises:
+            ValueError: If the API key is not provided, the json_backend or an event is unknown.
+            ImportError: If the "orjson" json_backend is chosen but orjson is not installed.
+        """
+
+        self.base_url = base_url or "https://api.colivara.com"
+        self.api_key = api_key or os.getenv("COLIVARA_API_KEY")
+        if not self.api_key:
+            raise ValueError(
+                "API key must be provided either through parameter or COLIVARA_API_KEY environment variable."
+            )
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=timeout,
+            transport=transport,
+        )
+        self.json_backend = _check_json_backend(json_backend)
+        self.event_hooks = check_event_hooks(event_hooks)
+        self.request_stats = request_stats
+        if request_stats is not None:
+            self.event_hooks["request_end"].append(request_stats)
+        # the request of the current task whose "request_end" waits for its response to be parsed
+        self._pending: ContextVar[Optional[Tuple[httpx.Response, RequestEvent]]] = (
+            ContextVar(f"colivara_pending_{id(self)}", default=None)
+        )
+
+    async def _request(
+        self, method: str, url: str, stream: bool = False, **kwargs: Any
+    ) -> httpx.Response:
+        """
+        Sends a request over the shared connection pool, timed for the event hooks if any.
+        """
+        if not any(self.event_hooks.values()):
+            request = self.client.build_request(method, url, **kwargs)
+            return await self.client.send(request, stream=stream)
+        self._end_request()
+        event = RequestEvent(method, url[len(self.base_url) :])
+        self._fire("request_start", event)
+        start = time.perf_counter()
+        try:
+            request = self.client.build_request(method, url, **kwargs)
+            sent = time.perf_counter()
+            event.serialize += sent - start
+            event.bytes_sent = _content_length(request.headers) or 0
+            try:
+                response = await self.client.send(request, stream=stream)
+            finally:
+                event.network += time.perf_counter() - sent
+        except BaseException as e:
+            event.error = e
+            self._fire("request_end", event)
+            raise
+        event.status = response.status_code
+        event.bytes_received = (
+            _content_length(response.headers) if stream else len(response.content)
+        )
+        self._pending.set((response, event))
+        return response
+
+    @asynccontextmanager
+    async def _stream(
+        self, method: str, url: str, **kwargs: Any
+    ) -> AsyncIterator[httpx.Response]:
+        response = await self._request(method, url, stream=True, **kwargs)
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    def _fire(self, name: str, event: RequestEvent) -> None:
+        for hook in self.event_hooks[name]:
+            hook(event)
+
+    def _end_request(self) -> None:
+        pending = self._pending.get()
+        if pending is not None:
+            self._pending.set(None)
+            self._fire("request_end", pending[1])
+
+    def _parse(self, response: httpx.Response, type_: Type[T]) -> T:
+        if self._pending.get() is None:
+            return _validate_json(response.content, type_, self.json_backend)
+        return self._timed_parse(
+            response, _validate_json, response.content, type_, self.json_backend
+        )
+
+    def _timed_parse(
+        self, response: httpx.Response, parse: Callable[..., T], *args: Any
+    ) -> T:
+        # see Colivara._timed_parse
+        pending = self._pending.get()
+        if pending is None or pending[0] is not response:
+            return parse(*args)
+        start = time.perf_counter()
+        try:
+            return parse(*args)
+        finally:
+            pending[1].parse += time.perf_counter() - start
+            self._end_request()
+
+    def stats(self) -> Dict[str, EndpointStats]:
+        """
+        Returns the request statistics per endpoint. See `Colivara.stats`.
+
+        Raises:
+            ValueError: If the client was created without `request_stats`.
+        """
+        return check_request_stats(self.request_stats).snapshot()
+
+    async def aclose(self) -> None:
+        """
+        Closes the underlying HTTP client and its pooled connections.
+        """
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncColivara":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.aclose()
+
+    @instrumented
+    async def create_collection(
+        self, name: str, metadata: Optional[Dict[str, Any]] = {}
+    ) -> CollectionOut:
+        """
+        Creates a new collection.
+
+        Args:
+            name: The name of the new collection.
+            metadata: The metadata for the new collection (optional).
+
+        Returns:
+            The created CollectionOut object.
+
+        Raises:
+            Exception: If there's a conflict or an unexpected error occurs.
+        """
+
+        url = f"{self.base_url}/v1/collections/"
+        payload = CollectionIn(name=name, metadata=metadata).model_dump()
+        response = await self._request("POST", url, json=payload, headers=self.headers)
+        if response.status_code == 201:
+            return self._parse(response, CollectionOut)
+        elif response.status_code == 409:
+            error = self._parse(response, GenericError)
+            raise Exception(f"Conflict error: {error.detail}")
+        else:
+            response.raise_for_status()
+
+    @instrumented
+    async def list_collections(self) -> List[CollectionOut]:
+        """
+        Lists all collections.
+
+        Returns:
+            A list of CollectionOut objects.
+
+        Raises:
+            ValueError: If the response format is unexpected.
+            httpx.HTTPStatusError: If the API request fails.
+        """
+
+        url = f"{self.base_url}/v1/collections/"
+        response = await self._request("GET", url, headers=self.headers)
+        response.raise_for_status()
+
+        try:
+            return self._parse(response, List[CollectionOut])
+        except ValidationError:
+            raise ValueError(f"Unexpected response format: {response.text}")
+
+    @instrumented
+    async def get_collection(self, collection_name: str) -> CollectionOut:
+        """
+        Gets a specific collection.
+
+        Args:
+            collection_name: The name of the collection to get.
+
+        Returns:
+            The requested CollectionOut object.
+
+        Raises:
+            Exception: If the collection is not found or an unexpected error occurs.
+        """
+
+        url = f"{self.base_url}/v1/collections/{collection_name}/"
+        response = await self._request("GET", url, headers=self.headers)
+        if response.status_code == 200:
+            return self._parse(response, CollectionOut)
+        elif response.status_code == 404:
+            raise Exception(f"Collection '{collection_name}' not found.")
+        else:
+            response.raise_for_status()
+
+    @instrumented
+    async def partial_update_collection(
+        self,
+        collection_name: str,
+        name: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> CollectionOut:
+        """
+        Partially updates a collection.
+
+        Args:
+            collection_name: The name of the collection to update.
+            name: The new name for the collection (optional).
+            metadata: The new metadata for the collection (optional).
+
+        Returns:
+            The updated CollectionOut object.
+
+        Raises:
+            Exception: If the collection is not found or there's a problem with the update.
+        """
+
+        url = f"{self.base_url}/v1/collections/{collection_name}/"
+        payload = PatchCollectionIn(name=name, metadata=metadata).model_dump()
+        response = await self._request("PATCH", url, json=payload, headers=self.headers)
+
+        if response.status_code == 200:
+            return self._parse(response, CollectionOut)
+        elif response.status_code == 404:
+            raise Exception(f"Collection '{collection_name}' not found.")
+        else:
+            response.raise_for_status()
+
+    @instrumented
+    async def delete_collection(self, collection_name: str) -> None:
+        """
+        Deletes a specific collection.
+
+        Args:
+            collection_name: The name of the collection to delete.
+
+        Raises:
+            Exception: If the collection is not found or an unexpected error occurs.
+        """
+
+        url = f"{self.base_url}/v1/collections/{collection_name}/"
+        response = await self._request("DELETE", url, headers=self.headers)
+        if response.status_code == 204:
+            return
+        elif response.status_code == 404:
+            raise Exception(f"Collection '{collection_name}' not found.")
+        else:
+            response.raise_for_status()
+
+    @instrumented
+    async def upsert_document(
+        self,
+        name: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        collection_name: str = "default collection",
+        document_url: Optional[str] = None,
+        document_base64: Optional[str] = None,
+        document_path: Optional[Union[str, Path]] = None,
+        wait: Optional[bool] = False,
+        fingerprint: bool = False,
+    ) -> DocumentOut | GenericMessage:
+        """
+        Create or update a document in a collection.
+
+        With `fingerprint=True`, unchanged documents are not uploaded again, see
+        `Colivara.upsert_document`. Files are read, hashed and encoded in a worker thread.
+
+        Args:
+            name (str): The name of the document.
+            metadata (Optional[Dict[str, Any]]): Additional metadata for the document.
+            collection_name (str): The name of the collection to add the document to. Defaults to "default collection".
+            document_url (Optional[str]): The URL of the document, if available.
+            document_base64 (Optional[str]): The base64-encoded string of the document content, if available.
+            document_path (Optional[str]): The path to the document file to be uploaded.
+            wait (Optional[bool]): If True, the method will wait for the document to be processed before returning.
+            fingerprint (bool): If True, only upload the document if its content changed.
+
+        Returns:
+            DocumentOut: The created or updated document, or a GenericMessage if it is processed in the background.
+
+        Raises:
+            ValueError: If no valid document source is provided or if the file path is invalid.
+            FileNotFoundError: If the specified file path does not exist.
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        digest = None
+        if fingerprint:
+            # reading and hashing the document would block the event loop
+            digest = await asyncio.to_thread(
+                _fingerprint, document_url, document_base64, document_path
+            )
+        if digest is not None:
+            metadata = {**(metadata or {}), FINGERPRINT_KEY: digest}
+            try:
+                existing: Optional[DocumentOut] = await self.get_document(
+                    name, collection_name
+                )
+            except ValueError:
+                existing = None
+            if existing is not None and _same_content(existing, metadata):
+                if existing.metadata == metadata:
+                    return existing
+                return await self.partial_update_document(
+                    name, metadata=metadata, collection_name=collection_name
+                )
+
+        request_url = f"{self.base_url}/v1/documents/upsert-document/"
+        document_in = await asyncio.to_thread(
+            _build_document_in,
+            name=name,
+            metadata=metadata,
+            collection_name=collection_name,
+            document_url=document_url,
+            document_base64=document_base64,
+            document_path=document_path,
+            wait=wait,
+        )
+        payload = document_in.model_dump()
+
+        response = await self._request(
+            "POST", request_url, json=payload, headers=self.headers
+        )
+
+        if response.status_code == 201:
+            return self._parse(response, DocumentOut)
+        elif response.status_code == 202:
+            return self._parse(response, GenericMessage)
+        elif response.status_code == 400:
+            error = self._parse(response, GenericError)
+            raise ValueError(f"Bad request: {error.detail}")
+        else:
+            response.raise_for_status()
+
+    @instrumented
+    async def get_document(
+        self,
+        document_name: str,
+        collection_name: str = "default collection",
+        expand: Optional[str] = None,
+    ) -> DocumentOut:
+        """
+        Retrieve a specific document from the user documents.
+
+        Args:
+            document_name (str): The name of the document to retrieve.
+            collection_name (str): The name of the collection containing the document.
+                                   Defaults to "default collection".
+            expand (Optional[str]): A comma-separated list of fields to expand in the response.
+                                    Currently, only "pages" is supported.
+
+        Returns:
+            DocumentOut: The retrieved document with its details.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+            ValueError: If the document or collection is not found.
+        """
+        request_url = f"{self.base_url}/v1/documents/{document_name}/"
+        params = _params(collection_name=collection_name, expand=expand)
+
+        response = await self._request(
+            "GET", request_url, params=params, headers=self.headers
+        )
+
+        if response.status_code == 200:
+            return self._parse(response, DocumentOut)
+        elif response.status_code == 404:
+            error = self._parse(response, GenericError)
+            raise ValueError(f"Document not found: {error.detail}")
+        else:
+            response.raise_for_status()
+
+    @instrumented
+    async def iter_document_pages(
+        self,
+        document_name: str,
+        collection_name: str = "default collection",
+    ) -> AsyncIterator[PageOut]:
+        """
+        Iterate over the pages of a document as they arrive, see `Colivara.iter_document_pages`.
+
+        Args:
+            document_name (str): The name of the document.
+            collection_name (str): The name of the collection containing the document.
+                                   Defaults to "default collection".
+
+        Yields:
+            PageOut: The pages of the document, in the order of the response.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+            ValueError: If the document or collection is not found, or the response is incomplete.
+        """
+        request_url = f"{self.base_url}/v1/documents/{document_name}/"
+        params = _params(collection_name=collection_name, expand="pages")
+
+        async with self._stream(
+            "GET", request_url, params=params, headers=self.headers
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+            if response.status_code == 404:
+                error = self._parse(response, GenericError)
+                raise ValueError(f"Document not found: {error.detail}")
+            elif response.status_code != 200:
+                response.raise_for_status()
+                return
+            pages = JSONArrayItems(array_key="pages")
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                for page in pages.feed(chunk):
+                    yield _validate_json(page, PageOut, self.json_backend)
+            pages.close()
+
+    async def export_pages(
+        self,
+        document_name: str,
+        out_dir: Union[str, Path],
+        collection_name: str = "default collection",
+        max_workers: int = 8,
+        format: Optional[str] = None,
+        skip_existing: Optional[str] = "size",
+    ) -> List[Path]:
+        """
+        Write the page images of a document to disk while they arrive, see
+        `Colivara.export_pages`. Decoding and writing run in a thread pool, so the event
+        loop only streams the response.
+
+        Args:
+            document_name (str): The name of the document.
+            out_dir (Union[str, Path]): The export directory, created if needed.
+            collection_name (str): The name of the collection containing the document.
+                                   Defaults to "default collection".
+            max_workers (int): The number of threads decoding and writing. Defaults to 8.
+            format (Optional[str]): The expected image format and file extension. Defaults to
+                the format of every image. Images are not converted.
+            skip_existing (Optional[str]): "size", "hash" or None. Defaults to "size".
+
+        Returns:
+            List[Path]: The path of every page, e.g.
+            `out_dir/<collection>/<document>/page_0001.png`.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+            ValueError: If the document or collection is not found, `skip_existing` is unknown
+                or an image is not in `format`.
+        """
+        with _Exporter(
+            out_dir,
+            max_workers,
+            format,
+            skip_existing,
+            document_name,
+            collection_name,
+        ) as exporter:
+            async for page in self.iter_document_pages(document_name, collection_name):
+                full = exporter.add(page)
+                if full is not None:
+                    await asyncio.wrap_future(full)
+            for future in exporter.pending:
+                await asyncio.wrap_future(future)
+            return exporter.finish()
+
+    @instrumented
+    async def partial_update_document(
+        self,
+        document_name: str,
+        name: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        collection_name: Optional[str] = None,
+        document_url: Optional[str] = None,
+        document_base64: Optional[str] = None,
+    ) -> DocumentOut:
+        """
+        Partially update a document. Only the fields provided will be updated.
+
+        Args:
+            document_name (str): The name of the document to be updated.
+            name (Optional[str]): The new name for the document, if changing.
+            metadata (Optional[Dict[str, Any]]): Updated metadata for the document.
+            collection_name (Optional[str]): The name of the collection to move the document to, if changing.
+            document_url (Optional[str]): The new URL of the document, if changing.
+            document_base64 (Optional[str]): The new base64-encoded string of the document content, if changing.
+
+        Returns:
+            DocumentOut: The updated document with its details.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+            ValueError: If the document is not found or the update is invalid.
+        """
+        request_url = f"{self.base_url}/v1/documents/{document_name}/"
+        payload = DocumentInPatch(
+            name=name,
+            metadata=metadata,
+            collection_name=collection_name,
+            url=document_url,
+            base64=document_base64,
+        ).model_dump(exclude_none=True)
+
+        response = await self._request(
+            "PATCH", request_url, json=payload, headers=self.headers
+        )
+
+        if response.status_code == 200:
+            return self._parse(response, DocumentOut)
+        elif response.status_code in [404, 409]:
+            error = self._parse(response, GenericError)
+            raise ValueError(f"Update failed: {error.detail}")
+        else:
+            response.raise_for_status()
+
+    @instrumented
+    async def list_documents(
+        self, collection_name: str = "default collection", expand: Optional[str] = None
+    ) -> List[DocumentOut]:
+        """
+        Fetch a list of documents for a given collection.
+
+        Args:
+            collection_name (str): The name of the collection to fetch documents from.
+                                   Defaults to "default collection". Use "all" to fetch documents from all collections.
+            expand (Optional[str]): If "pages" is included, the pages of each document will be included.
+
+        Returns:
+            List[DocumentOut]: A list of documents with their details.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        request_url = f"{self.base_url}/v1/documents/"
+        params = _params(collection_name=collection_name, expand=expand)
+
+        response = await self._request(
+            "GET", request_url, params=params, headers=self.headers
+        )
+
+        if response.status_code == 200:
+            return self._parse(response, List[DocumentOut])
+        else:
+            response.raise_for_status()
+
+    @instrumented
+    async def iter_documents(
+        self,
+        collection_name: str = "default collection",
+        expand: Optional[str] = None,
+        batch_size: int = 100,
+        skip_pages: bool = False,
+    ) -> AsyncIterator[DocumentOut]:
+        """
+        Iterate over the documents of a collection without loading the whole list.
+
+        Args:
+            collection_name (str): The name of the collection to fetch documents from.
+                                   Defaults to "default collection". Use "all" to fetch documents from all collections.
+            expand (Optional[str]): If "pages" is included, the pages of each document will be included.
+            batch_size (int): The number of documents validated at once. Defaults to 100.
+            skip_pages (bool): Drop the `pages` of every document while reading the response.
+
+        Yields:
+            DocumentOut: The documents, in the order of the response.
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+            ValueError: If the response is not a complete JSON array.
+        """
+        request_url = f"{self.base_url}/v1/documents/"
+        params = _params(collection_name=collection_name, expand=expand)
+
+        async with self._stream(
+            "GET", request_url, params=params, headers=self.headers
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                response.raise_for_status()
+                return
+            items = JSONArrayItems(skip_key="pages" if skip_pages else None)
+            batch: List[bytes] = []
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                batch += items.feed(chunk)
+                while len(batch) >= batch_size:
+                    for document in _parse_documents(
+                        batch[:batch_size], self.json_backend
+                    ):
+                        yield document
+                    del batch[:batch_size]
+            items.close()
+            for document in _parse_documents(batch, self.json_backend):
+                yield document
+
+    @instrumented
+    async def delete_document(
+        self, document_name: str, collection_name: str = "default collection"
+    ) -> None:
+        """
+        Delete a document by its name.
+
+        Args:
+            document_name (str): The name of the document to be deleted.
+            collection_name (str): The name of the collection containing the document.
+                                   Defaults to "default collection".
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails.
+            ValueError: If the document does not exist or does not belong to the authenticated user.
+        """
+        request_url = f"{self.base_url}/v1/documents/delete-document/{document_name}/"
+        params = _params(collection_name=collection_name)
+
+        response = await self._request(
+            "DELETE", request_url, params=params, headers=self.headers
+        )
+
+        if response.status_code == 204:
+            return
+        elif response.status_code in [404, 409]:
+            error = self._parse(response, GenericError)
+            raise ValueError(f"Deletion failed: {error.detail}")
+        else:
+            response.raise_for_status()
+
+    @instrumented
+    async def search(
+        self,
+        query: str,
+        collection_name: str = "all",
+        top_k: int = 3,
+        query_filter: Optional[Dict[str, Any]] = None,
+    ) -> QueryOut:
+        """
+        Search for pages similar to a given query.
+
+        Args:
+            query (str): The search query string.
+            collection_name (str): The name of the collection to search in. Defaults to "all".
+            top_k (int): The number of top results to return. Defaults to 3.
+            query_filter (Optional[Dict[str, Any]]): An optional filter to apply to the search results,
+                see `Colivara.search` for the accepted keys.
+
+        Returns:
+            QueryOut: The search results, including the query and a list of similar pages.
+
+        Raises:
+            ValueError: If the query_filter is invalid or the service is unavailable.
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        request_url = f"{self.base_url}/v1/search/"
+        query_in = _build_query_in(query, collection_name, top_k, query_filter)
+
+        response = await self._request(
+            "POST", request_url, json=query_in.model_dump(), headers=self.headers
+        )
+
+        if response.status_code == 200:
+            return self._parse(response, QueryOut)
+        elif response.status_code == 503:
+            error = self._parse(response, GenericError)
+            raise ValueError(f"Service unavailable: {error.detail}")
+        else:
+            response.raise_for_status()
+
+    @instrumented
+    async def file_to_imgbase64(self, file_path: str) -> List[FileOut]:
+        """
+        Converts a file to a list of base64 encoded images.
+
+        Args:
+            file_path: The path to the file to be converted.
+
+        Returns:
+            A list of FileOut objects containing the base64 encoded strings of the images.
+
+        Raises:
+            httpx.HTTPStatusError: If there's an error during the file conversion process.
+        """
+        url = f"{self.base_url}/v1/helpers/file-to-imgbase64/"
+
+        content = await asyncio.to_thread(Path(file_path).read_bytes)
+        files = {"file": (Path(file_path).name, content)}
+        response = await self._request(
+            "POST",
+            url,
+            files=files,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+
+        if response.status_code == 200:
+            return self._parse(response, List[FileOut])
+        else:
+            response.raise_for_status()
+
+    def file_to_base64(self, file_path: str) -> str:
+        """
+        Converts a file to a base64 encoded string. This runs locally and makes no request.
+
+        Args:
+            file_path: The path to the file to be converted.
+
+        Returns:
+            A base64 encoded string of the file.
+        """
+        return _file_to_base64(file_path)
+
+    @overload
+    async def create_embedding(
+        self,
+        input_data: Union[str, List[str]],
+        task: Union[str, TaskEnum] = ...,
+        as_arrays: Literal[False] = ...,
+        dtype: "DTypeLike" = ...,
+    ) -> EmbeddingsOut: ...
+
+    @overload
+    async def create_embedding(
+        self,
+        input_data: Union[str, List[str]],
+        task: Union[str, TaskEnum] = ...,
+        *,
+        as_arrays: Literal[True],
+        dtype: "DTypeLike" = ...,
+    ) -> "EmbeddingArrays": ...
+
+    @instrumented
+    async def create_embedding(
+        self,
+        input_data: Union[str, List[str]],
+        task: Union[str, TaskEnum] = TaskEnum.query,
+        as_arrays: bool = False,
+        dtype: "DTypeLike" = "float32",
+    ) -> Union[EmbeddingsOut, "EmbeddingArrays"]:
+        """
+        Creates embeddings for the given input data.
+
+        Args:
+            input_data: A string or list of strings to create embeddings for.
+            task: The task type for embedding creation. Can be "query" or "image". Defaults to "query".
+            as_arrays: Return NumPy arrays instead of nested float lists (optional). Needs the
+                `numpy` extra installed.
+            dtype: The dtype of the arrays, e.g. "float16" (optional). Defaults to "float32".
+
+        Returns:
+            An EmbeddingsOut object containing the embeddings, model information, and usage data,
+            or with `as_arrays` an EmbeddingArrays with one `(tokens, dim)` array per input.
+
+        Raises:
+            ValueError: If an invalid task is provided.
+            ImportError: If `as_arrays` is set but numpy is not installed.
+            Exception: If the embedding service is unavailable.
+            httpx.HTTPStatusError: If the API request fails.
+        """
+        url = f"{self.base_url}/v1/embeddings/"
+        payload = _build_embeddings_in(input_data, task).model_dump()
+
+        response = await self._request("POST", url, json=payload, headers=self.headers)
+
+        if response.status_code == 200:
+            if as_arrays:
+                from .arrays import EmbeddingArrays
+
+                return self._timed_parse(
+                    response, EmbeddingArrays.from_json, response.content, dtype
+                )
+            return self._parse(response, EmbeddingsOut)
+        elif response.status_code == 503:
+            error = self._parse(response, GenericError)
+            raise Exception(f"Service Unavailable: {error.detail}")
+        else:
+            response.raise_for_status()
+
+
+def _params(**params: Optional[str]) -> Dict[str, str]:
+    # httpx sends None values as empty parameters, requests drops them
+    return {key: value for key, value in params.items() if value is not None}
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, NamedTuple, Optional, Tuple
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+    currbytes: int
+
+
+class _Entry(NamedTuple):
+    stored: float
+    value: Any
+    size: int
+    tags: Tuple[Hashable, ...]
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache whose entries also expire `ttl` seconds after they were stored.
+
+    Least recently used entries are evicted once more than `maxsize` entries, or more than
+    `max_bytes` of their declared sizes, are stored. Entries can carry tags, and `invalidate`
+    drops every entry with a given tag. A value computed while its tags were invalidated can be
+    kept out with the token of `generation`, taken before computing it. Hits and misses are counted and reported by `info()`,
+    like `functools.lru_cache`.
+
+    Example:
+        client = Colivara(embedding_cache=TTLCache(maxsize=10_000, ttl=3600))
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.currbytes = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by clear and by invalidate, per tag
+        self._clears = 0
+        self._generations: Dict[Hashable, int] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the value stored for `key`, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                self.ttl is not None and time.monotonic() - entry.stored > self.ttl
+            ):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def generation(self, tags: Iterable[Hashable] = ()) -> Tuple[int, ...]:
+        """
+        Returns a token that changes once the cache is cleared or one of `tags` invalidated.
+        """
+        with self._lock:
+            return self._generation(tags)
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        size: int = 0,
+        tags: Iterable[Hashable] = (),
+        generation: Optional[Tuple[int, ...]] = None,
+    ) -> None:
+        """
+        Stores `value` under `key`. `size` counts towards `max_bytes`, and `tags` are the
+        labels `invalidate` matches. A value larger than `max_bytes` is not stored, nor one
+        whose `generation` token, taken with the same tags, is out of date.
+        """
+        tags = tuple(tags)
+        with self._lock:
+            if generation is not None and generation != self._generation(tags):
+                return
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = _Entry(time.monotonic(), value, size, tags)
+            self.currbytes += size
+            while len(self._entries) > self.maxsize or (
+                self.max_bytes is not None and self.currbytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tag: Hashable) -> None:
+        """
+        Removes every entry stored with `tag`.
+        """
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in [k for k, entry in self._entries.items() if tag in entry.tags]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clears += 1
+            self._entries.clear()
+            self.currbytes = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._entries), self.currbytes
+            )
+
+    def _generation(self, tags: Iterable[Hashable]) -> Tuple[int, ...]:
+        return (self._clears, *(self._generations.get(tag, 0) for tag in tags))
+
+    def _remove(self, key: Hashable) -> None:
+        self.currbytes -= self._entries.pop(key).size
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,197 @@
+import math
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError(
+        "colivara_py.centroid_index needs numpy, install it with `pip install colivara-py[numpy]`."
+    )
+
+from .maxsim import MaxSimScorer, _flatten, top_k_scores
+from .quantization import ENCODE_ROWS, _nearest, kmeans
+
+
+class CentroidIndex:
+    """
+    Candidate generation over a `MaxSimScorer` with centroid inverted lists, as in PLAID.
+
+    Every page token is assigned to its nearest of `centroids` k-means centroids, and the
+    index keeps two lists of the (page, centroid) pairs: the pages of every centroid, and the
+    centroids of every page. A search then runs in three stages per query:
+
+    1. Every query token probes its `probe` most similar centroids, the pages listed under
+       them are the candidates.
+    2. Candidates are ranked by their centroid interaction, MaxSim with every page token
+       replaced by its centroid and only the probed centroids kept, which reads only the
+       small centroid lists.
+    3. The best `candidate_count` of them are scored exactly by the scorer.
+
+    With the default of about `sqrt(tokens)` centroids a list holds about `sqrt(tokens)`
+    tokens, so the work per query grows with the square root of the corpus rather than with
+    the corpus. Pages added to the scorer afterwards are not indexed, build a
+    new index then.
+
+    Example:
+        index = LocalIndex("my_index")
+        pruned = CentroidIndex(index.scorer)
+        indices, scores = pruned.search(queries, top_k=10)
+    """
+
+    def __init__(
+        self,
+        scorer: MaxSimScorer,
+        centroids: Optional[int] = None,
+        iterations: int = 10,
+        sample_size: int = 2**16,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            scorer: The scorer holding the page tokens, e.g. a `MaxSimScorer` or the
+                memory-mapped `LocalIndex.scorer`.
+            centroids: The number of centroids (optional). Defaults to the power of two
+                nearest to `sqrt(tokens)`.
+            iterations: The k-means iterations (optional).
+            sample_size: The number of tokens the centroids are learned from (optional).
+            seed: The random seed of the sampling and of k-means (optional).
+
+        Raises:
+            ValueError: If the scorer holds no tokens.
+        """
+        tokens = scorer.tokens
+        if not len(tokens):
+            raise ValueError("Cannot learn centroids without any tokens.")
+        if centroids is None:
+            centroids = 2 ** round(math.log2(math.sqrt(len(tokens))))
+        rng = np.random.default_rng(seed)
+        picks = np.sort(
+            rng.choice(len(tokens), min(sample_size, len(tokens)), replace=False)
+        )
+        self.scorer = scorer
+        self.centroids = kmeans(
+            np.asarray(tokens[picks], dtype=np.float32), centroids, iterations, seed
+        )
+        count = len(self.centroids)
+
+        codes = np.empty(len(tokens), dtype=np.int64)
+        for start in range(0, len(tokens), ENCODE_ROWS):
+            chunk = np.asarray(tokens[start : start + ENCODE_ROWS], dtype=np.float32)
+            codes[start : start + len(chunk)] = _nearest(chunk, self.centroids)
+        owners = np.repeat(np.arange(len(scorer)), np.diff(scorer.offsets))
+        # one entry per (page, centroid) pair, sorted by page and then centroid
+        pairs = np.unique(owners * count + codes)
+        pages, page_centroids = np.divmod(pairs, count)
+        self.page_centroids = page_centroids.astype(np.int32)
+        self.page_offsets = np.searchsorted(pages, np.arange(len(scorer) + 1))
+        order = np.argsort(page_centroids, kind="stable")
+        self.list_pages = pages[order].astype(np.int32)
+        self.list_offsets = np.searchsorted(page_centroids[order], np.arange(count + 1))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The memory taken by the centroids and the lists, on top of the scorer.
+        """
+        return sum(
+            array.nbytes
+            for array in (
+                self.centroids,
+                self.page_centroids,
+                self.page_offsets,
+                self.list_pages,
+                self.list_offsets,
+            )
+        )
+
+    def candidates(self, query: np.ndarray, probe: int = 2) -> np.ndarray:
+        """
+        Returns the sorted indices of the pages under the `probe` best centroids of any
+        query token.
+        """
+        return self._candidates(self._centroid_scores(query), probe)
+
+    def search(
+        self,
+        queries: Sequence[np.ndarray],
+        top_k: int = 3,
+        probe: int = 2,
+        candidate_count: int = 256,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ranks the pages for every query, scoring only the most promising ones exactly.
+
+        Args:
+            queries: One `(tokens, dim)` array per query, e.g. an `EmbeddingArrays`.
+            top_k: The number of pages to return per query. Defaults to 3.
+            probe: The number of centroids every query token probes. Defaults to 2.
+            candidate_count: The number of candidates per query scored exactly.
+                Defaults to 256.
+
+        Returns:
+            The page indices and their exact scores, both `(queries, min(top_k, pages))`
+            arrays ordered from the best page down, like `MaxSimScorer.search`. When a query
+            has fewer candidates the rest of its row is padded with index -1 and score -inf.
+        """
+        top_k = min(top_k, len(self.scorer))
+        indices = np.full((len(queries), top_k), -1, dtype=np.int64)
+        scores = np.full((len(queries), top_k), -np.inf, dtype=np.float32)
+        for row, query in enumerate(queries):
+            similarities = self._centroid_scores(query)
+            pages = self._candidates(similarities, probe)
+            if len(pages) > candidate_count:
+                approximate = self._approximate(similarities, pages, probe)
+                best, _ = top_k_scores(approximate[None], candidate_count)
+                pages = np.sort(pages[best[0]])
+            best, best_scores = top_k_scores(self.scorer.score([query], pages), top_k)
+            found = best.shape[1]
+            indices[row, :found], scores[row, :found] = pages[best[0]], best_scores[0]
+        return indices, scores
+
+    def _centroid_scores(self, query: np.ndarray) -> np.ndarray:
+        # (query tokens, centroids) similarities
+        query_tokens, _ = _flatten([query], self.centroids.shape[1])
+        return query_tokens @ self.centroids.T
+
+    def _probed(self, similarities: np.ndarray, probe: int) -> np.ndarray:
+        # the centroids among the `probe` best of any query token
+        probe = min(probe, similarities.shape[1])
+        if probe < similarities.shape[1]:
+            probed = np.argpartition(-similarities, probe - 1, axis=1)[:, :probe]
+        else:
+            probed = np.broadcast_to(np.arange(probe), similarities.shape)
+        return np.unique(probed)
+
+    def _candidates(self, similarities: np.ndarray, probe: int) -> np.ndarray:
+        rows, _ = _ranges(self.list_offsets, self._probed(similarities, probe))
+        return np.unique(self.list_pages[rows])
+
+    def _approximate(
+        self, similarities: np.ndarray, pages: np.ndarray, probe: int
+    ) -> np.ndarray:
+        # MaxSim against the page centroids, in chunks of at most block_size similarities.
+        # As in PLAID only the probed centroids count, every candidate has at least one.
+        probed = np.zeros(len(self.centroids), dtype=bool)
+        probed[self._probed(similarities, probe)] = True
+        # (centroids, query tokens), so the gathered rows are contiguous for reduceat
+        by_centroid = np.ascontiguousarray(similarities.T)
+        lengths = self.page_offsets[pages + 1] - self.page_offsets[pages]
+        scores: List[np.ndarray] = []
+        for chunk in self.scorer._chunks(lengths, len(similarities)):
+            rows, starts = _ranges(self.page_offsets, pages[chunk])
+            centroids = self.page_centroids[rows]
+            kept = probed[centroids]
+            counts = np.add.reduceat(kept, starts)
+            best = np.maximum.reduceat(
+                by_centroid[centroids[kept]], np.cumsum(counts) - counts, axis=0
+            )
+            scores.append(best.sum(axis=1))
+        return np.concatenate(scores)
+
+
+def _ranges(offsets: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # the concatenated rows offsets[i]:offsets[i + 1] of every id, and where each starts
+    starts = offsets[ids]
+    lengths = offsets[ids + 1] - starts
+    local = np.cumsum(lengths) - lengths
+    return np.repeat(starts - local, lengths) + np.arange(lengths.sum()), local
@@ -1,6 +1,44 @@
 import os
 import requests
-from typing import Optional, Dict, Any, List, Union
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from typing import (
+    IO,
+    Optional,
+    Dict,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    TYPE_CHECKING,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    overload,
+)
+from .cache import TTLCache
+from .events import (
+    EventHook,
+    RequestEvent,
+    check_event_hooks,
+    instrumented,
+)
+from .export import export_pages
+from .manifest import (
+    FINGERPRINT_KEY,
+    HASH_CHUNK_SIZE,
+    MANIFEST_NAME,
+    FileEntry,
+    SyncManifest,
+    file_sha256,
+)
+from .retry import RetryPolicy
+from .stats import EndpointStats, RequestStats, check_request_stats
+from .streaming import CHUNK_SIZE, Base64JSONBody, DocumentSource, JSONArrayItems
 from .models import (
     CollectionIn,
     CollectionOut,
@@ -10,30 +48,86 @@ from .models import (
     DocumentIn,
     DocumentOut,
     DocumentInPatch,
+    DocumentUpsertResult,
+    DirectorySyncResult,
+    PageOut,
     QueryIn,
     QueryOut,
     QueryFilter,
+    SearchResult,
     FileOut,
     EmbeddingsOut,
     TaskEnum,
     EmbeddingsIn,
 )
 import base64
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import as_completed as futures_as_completed
 from pathlib import Path
-from pydantic import ValidationError
+from functools import lru_cache
+from pydantic import TypeAdapter, ValidationError
+
+if TYPE_CHECKING:
+    from numpy.typing import DTypeLike
+
+    from .arrays import EmbeddingArrays
+
+T = TypeVar("T")
+
+# the statuses of requests the server turned away without processing them
+_REJECTED_STATUSES = (429, 503)
 
 
 class Colivara:
-    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        retry_policy: Optional[RetryPolicy] = None,
+        embedding_cache: Optional[TTLCache] = None,
+        search_cache: Optional[TTLCache] = None,
+        json_backend: str = "pydantic",
+        event_hooks: Optional[Mapping[str, Iterable[EventHook]]] = None,
+        request_stats: Optional[RequestStats] = None,
+    ):
         """
         Initializes the Colivara client.
 
+        The client keeps a persistent HTTP session, so connections to the API are
+        reused (keep-alive) across calls instead of paying a new TCP + TLS handshake
+        per request. Call `close()` or use the client as a context manager to release them.
+
         Args:
             base_url: The base URL for the API (optional).
             api_key: The API key for authentication (optional).
+            pool_connections: The number of connection pools to cache (optional).
+            pool_maxsize: The maximum number of connections to keep per pool (optional).
+                Raise it when the client is shared between many threads.
+            retry_policy: How to retry idempotent calls on transient errors such as 429 and 503
+                (optional). By default requests are not retried.
+            embedding_cache: A cache for query embeddings from `create_embedding` (optional).
+            search_cache: A cache for `search` results (optional). Give it a `max_bytes` bound, the
+                size of an entry is the size of its response. Writes through this client invalidate
+                the cached searches of the collection they touch.
+            json_backend: How responses are parsed (optional). "pydantic", the default, validates
+                the raw bytes directly, "orjson" decodes them with orjson first and needs the
+                `orjson` extra installed.
+            event_hooks: Functions called with a `RequestEvent` on "request_start", "retry" and
+                "request_end" of every API request (optional), e.g.
+                `{"request_end": [record]}`. The lists can also be changed later through
+                `client.event_hooks`. Without hooks, requests are sent without any bookkeeping.
+            request_stats: Collects latency histograms, error and byte counts per endpoint
+                (optional), read with `stats()`. One `RequestStats` can be shared by many clients.
 
         Raises:
-            ValueError: If the API key is not provided.
+            ValueError: If the API key is not provided, the json_backend or an event is unknown.
+            ImportError: If the "orjson" json_backend is chosen but orjson is not installed.
         """
 
         self.base_url = base_url or "https://api.colivara.com"
@@ -46,7 +140,198 @@ class Colivara:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.retry_policy = retry_policy
+        self._local = threading.local()
+        self.embedding_cache = embedding_cache
+        self._embedding_model: Optional[str] = None
+        self.search_cache = search_cache
+        self.json_backend = _check_json_backend(json_backend)
+        self.event_hooks = check_event_hooks(event_hooks)
+        self.request_stats = request_stats
+        if request_stats is not None:
+            self.event_hooks["request_end"].append(request_stats)
+
+    def stats(self) -> Dict[str, EndpointStats]:
+        """
+        Returns the request statistics per endpoint, keyed by method and endpoint, e.g.
+        "POST /v1/search/". `client.request_stats.prometheus()` formats them for Prometheus.
+
+        Raises:
+            ValueError: If the client was created without `request_stats`.
+        """
+        return check_request_stats(self.request_stats).snapshot()
+
+    def close(self) -> None:
+        """
+        Closes the underlying HTTP session and its pooled connections.
+        """
+        self.session.close()
+
+    def __enter__(self) -> "Colivara":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        retry: bool = False,
+        retry_statuses: Optional[Tuple[int, ...]] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        Sends a request over the pooled session.
+
+        Requests marked as `retry` are safe to repeat and are re-sent according to the
+        client's retry policy on connection errors and retryable statuses. With
+        `retry_statuses`, only those statuses and failures to connect are retried. The number of retries is available afterwards as
+        `last_retries`. With event hooks, the request is timed and its "request_end" is
+        fired once the response is parsed (see `instrumented`).
+        """
+        if not any(self.event_hooks.values()):
+            return self._send(method, url, retry, None, retry_statuses, **kwargs)
+        self._end_request()
+        event = RequestEvent(method, url[len(self.base_url) :])
+        self._fire("request_start", event)
+        try:
+            response = self._send(method, url, retry, event, retry_statuses, **kwargs)
+        except BaseException as e:
+            event.error = e
+            self._fire("request_end", event)
+            raise
+        self._local.pending = (response, event)
+        return response
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        retry: bool,
+        event: Optional[RequestEvent],
+        retry_statuses: Optional[Tuple[int, ...]] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        policy = self.retry_policy if retry else None
+        max_attempts = policy.max_attempts if policy else 1
+        self._local.retries = 0
+        while True:
+            attempt = self._local.retries + 1
+            try:
+                if event is None:
+                    response = self.session.request(method, url, **kwargs)
+                else:
+                    response = self._timed_send(event, method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if policy is None or attempt == max_attempts:
+                    raise
+                if retry_statuses is not None and not _failed_to_connect(e):
+                    # the server may have got the request
+                    raise
+                delay = policy.backoff(attempt)
+            else:
+                if policy is None or attempt == max_attempts:
+                    return response
+                if (
+                    retry_statuses is not None
+                    and response.status_code not in retry_statuses
+                ):
+                    return response
+                retry_delay = policy.delay(attempt, response)
+                if retry_delay is None:
+                    return response
+                response.close()
+                delay = retry_delay
+            self._local.retries = attempt
+            if event is not None:
+                event.attempt = attempt + 1
+                self._fire("retry", event)
+                event.network += delay
+            time.sleep(delay)
+
+    def _timed_send(
+        self, event: RequestEvent, method: str, url: str, **kwargs: Any
+    ) -> requests.Response:
+        # what session.request does, with the encoding of the body and the exchange timed apart
+        stream = kwargs.pop("stream", False)
+        event.status = None
+        event.error = None
+        start = time.perf_counter()
+        prepared = self.session.prepare_request(requests.Request(method, url, **kwargs))
+        sent = time.perf_counter()
+        event.serialize += sent - start
+        event.bytes_sent = _body_size(prepared)
+        try:
+            settings = self.session.merge_environment_settings(
+                prepared.url, {}, stream, None, None
+            )
+            response = self.session.send(
+                prepared, timeout=None, allow_redirects=True, **settings
+            )
+        except BaseException as e:
+            event.error = e
+            raise
+        finally:
+            event.network += time.perf_counter() - sent
+        event.status = response.status_code
+        event.bytes_received = (
+            _content_length(response.headers) if stream else len(response.content)
+        )
+        return response
+
+    def _fire(self, name: str, event: RequestEvent) -> None:
+        for hook in self.event_hooks[name]:
+            hook(event)
 
+    def _end_request(self) -> None:
+        """
+        Fires the deferred "request_end" of the last request sent from the current thread.
+        """
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            self._local.pending = None
+            self._fire("request_end", pending[1])
+
+    def _parse(self, response: requests.Response, type_: Type[T]) -> T:
+        """
+        Validates the raw response body into `type_` in one pass, without building an
+        intermediate dict tree first.
+        """
+        if getattr(self._local, "pending", None) is None:
+            return _validate_json(response.content, type_, self.json_backend)
+        return self._timed_parse(
+            response, _validate_json, response.content, type_, self.json_backend
+        )
+
+    def _timed_parse(
+        self, response: requests.Response, parse: Callable[..., T], *args: Any
+    ) -> T:
+        # parses the response, and ends its request if it is the one waiting for it
+        pending = getattr(self._local, "pending", None)
+        if pending is None or pending[0] is not response:
+            return parse(*args)
+        start = time.perf_counter()
+        try:
+            return parse(*args)
+        finally:
+            pending[1].parse += time.perf_counter() - start
+            self._end_request()
+
+    @property
+    def last_retries(self) -> int:
+        """
+        The number of retries made by the last request sent from the current thread.
+        """
+        return getattr(self._local, "retries", 0)
+
+    @instrumented
     def create_collection(
         self, name: str, metadata: Optional[Dict[str, Any]] = {}
     ) -> CollectionOut:
@@ -66,15 +351,16 @@ class Colivara:
 
         url = f"{self.base_url}/v1/collections/"
         payload = CollectionIn(name=name, metadata=metadata).model_dump()
-        response = requests.post(url, json=payload, headers=self.headers)
+        response = self._request("POST", url, json=payload, headers=self.headers)
         if response.status_code == 201:
-            return CollectionOut(**response.json())
+            return self._parse(response, CollectionOut)
         elif response.status_code == 409:
-            error = GenericError(**response.json())
+            error = self._parse(response, GenericError)
             raise Exception(f"Conflict error: {error.detail}")
         else:
             response.raise_for_status()
 
+    @instrumented
     def list_collections(self) -> List[CollectionOut]:
         """
         Lists all collections.
@@ -88,19 +374,18 @@ class Colivara:
         """
 
         url = f"{self.base_url}/v1/collections/"
-        response = requests.get(url, headers=self.headers)
+        response = self._request("GET", url, headers=self.headers, retry=True)
         response.raise_for_status()
 
         if response.status_code == 200:
-            collections_data = response.json()
-            # Handle potential empty list
-            if isinstance(collections_data, list):
-                return [CollectionOut(**collection) for collection in collections_data]
-            else:
-                raise ValueError(f"Unexpected response format: {collections_data}")
+            try:
+                return self._parse(response, List[CollectionOut])
+            except ValidationError:
+                raise ValueError(f"Unexpected response format: {response.text}")
         else:
             response.raise_for_status()
 
+    @instrumented
     def get_collection(self, collection_name: str) -> CollectionOut:
         """
         Gets a specific collection.
@@ -116,14 +401,15 @@ class Colivara:
         """
 
         url = f"{self.base_url}/v1/collections/{collection_name}/"
-        response = requests.get(url, headers=self.headers)
+        response = self._request("GET", url, headers=self.headers, retry=True)
         if response.status_code == 200:
-            return CollectionOut(**response.json())
+            return self._parse(response, CollectionOut)
         elif response.status_code == 404:
             raise Exception(f"Collection '{collection_name}' not found.")
         else:
             response.raise_for_status()
 
+    @instrumented
     def partial_update_collection(
         self,
         collection_name: str,
@@ -151,15 +437,20 @@ class Colivara:
         updated_data = PatchCollectionIn(name=name, metadata=metadata)
 
         payload = updated_data.model_dump()
-        response = requests.patch(url, json=payload, headers=self.headers)
+        # a repeated rename would look for the old name and fail
+        response = self._request(
+            "PATCH", url, json=payload, headers=self.headers, retry=name is None
+        )
+        self._invalidate_search_cache(collection_name)
 
         if response.status_code == 200:
-            return CollectionOut(**response.json())
+            return self._parse(response, CollectionOut)
         elif response.status_code == 404:
             raise Exception(f"Collection '{collection_name}' not found.")
         else:
             response.raise_for_status()
 
+    @instrumented
     def delete_collection(self, collection_name: str) -> None:
         """
         Deletes a specific collection.
@@ -172,14 +463,19 @@ class Colivara:
         """
 
         url = f"{self.base_url}/v1/collections/{collection_name}/"
-        response = requests.delete(url, headers=self.headers)
-        if response.status_code == 204:
+        response = self._request("DELETE", url, headers=self.headers, retry=True)
+        self._invalidate_search_cache(collection_name)
+        # after a retry, a 404 means an earlier attempt deleted it
+        if response.status_code == 204 or (
+            response.status_code == 404 and self.last_retries
+        ):
             return
         elif response.status_code == 404:
             raise Exception(f"Collection '{collection_name}' not found.")
         else:
             response.raise_for_status()
 
+    @instrumented
     def upsert_document(
         self,
         name: str,
@@ -189,6 +485,9 @@ class Colivara:
         document_base64: Optional[str] = None,
         document_path: Optional[Union[str, Path]] = None,
         wait: Optional[bool] = False,
+        document_data: Optional[Union[bytes, bytearray, memoryview, IO[bytes]]] = None,
+        stream: bool = False,
+        fingerprint: bool = False,
     ) -> DocumentOut | GenericMessage:
         """
         Create or update a document in a collection.
@@ -196,6 +495,18 @@ class Colivara:
         This method allows you to upsert (insert or update) a document in the specified collection.
         You can provide either a URL or a base64-encoded string of the document content.
 
+        Raw content passed as `document_data`, and files passed as `document_path` with `stream=True`,
+        are base64-encoded in small chunks while the request body is sent, so peak memory stays
+        constant instead of growing with the document size.
+
+        With `fingerprint=True`, the SHA-256 of the content is stored in the metadata under
+        `colivara_sha256`. If a document of the same name already has that fingerprint, it is
+        not uploaded again: when only its metadata changed, it is updated with
+        `partial_update_document`, which does not re-render and re-embed the pages, otherwise
+        the existing document is returned unchanged. This costs one `get_document` call, and
+        for a `document_path` a read of the file to hash it. Documents given by `document_url`
+        are always uploaded, since the content behind a URL can change.
+
         Args:
             name (str): The name of the document.
             metadata (Optional[Dict[str, Any]]): Additional metadata for the document.
@@ -204,6 +515,10 @@ class Colivara:
             document_base64 (Optional[str]): The base64-encoded string of the document content, if available.
             document_path (Optional[str]): The path to the document file to be uploaded.
             wait (Optional[bool]): If True, the method will wait for the document to be processed before returning.
+            document_data (Optional[Union[bytes, memoryview, IO[bytes]]]): The raw document content, as bytes,
+                a memoryview or a binary file object. It is always streamed.
+            stream (bool): If True, stream the file at `document_path` instead of reading it into memory.
+            fingerprint (bool): If True, only upload the document if its content changed.
         Returns:
             DocumentOut: The created or updated document with its details.
 
@@ -213,50 +528,349 @@ class Colivara:
             PermissionError: If there's no read permission for the specified file.
             requests.HTTPError: If the API request fails.
         """
-        # if user sent us a document_path, we will read the file and convert it to base64
-        if document_path:
+        digest = None
+        if fingerprint:
+            digest = _fingerprint(
+                document_url, document_base64, document_path, document_data
+            )
+        if digest is not None:
+            metadata = {**(metadata or {}), FINGERPRINT_KEY: digest}
             try:
-                path = Path(document_path).resolve()
-                if not path.is_file():
-                    raise ValueError(f"The specified path is not a file: {path}")
-                if not os.access(path, os.R_OK):
-                    raise PermissionError(f"No read permission for file: {path}")
-                with open(path, "rb") as file:
-                    document_base64 = base64.b64encode(file.read()).decode("utf-8")
-            except FileNotFoundError:
-                raise FileNotFoundError(
-                    f"The specified file does not exist: {document_path}"
+                existing: Optional[DocumentOut] = self.get_document(
+                    name, collection_name
+                )
+            except ValueError:
+                existing = None
+            if existing is not None and _same_content(existing, metadata):
+                if existing.metadata == metadata:
+                    return existing
+                return self.partial_update_document(
+                    name, metadata=metadata, collection_name=collection_name
                 )
-            except Exception as e:
-                raise ValueError(f"Error reading file: {str(e)}")
-        if not document_url and not document_base64:
-            raise ValueError(
-                "Either document_url, document_base64, or document_path must be provided."
-            )
 
         request_url = f"{self.base_url}/v1/documents/upsert-document/"
-        payload = DocumentIn(
-            name=name,
-            metadata=metadata or {},
-            collection_name=collection_name,
-            url=document_url,
-            base64=document_base64,
-            wait=wait,
-        ).model_dump()
-
-        response = requests.post(request_url, json=payload, headers=self.headers)
+        # a timeout or gateway error while waiting may leave the processing running on the
+        # server, only re-send the uploads it turned away
+        retry_statuses = _REJECTED_STATUSES if wait else None
+        source: Optional[DocumentSource] = document_data
+        if source is None and stream and document_path:
+            source = document_path
+        if source is not None:
+            body = _build_document_body(
+                name=name,
+                metadata=metadata,
+                collection_name=collection_name,
+                document_url=document_url,
+                document_base64=document_base64,
+                source=source,
+                wait=wait,
+            )
+            response = self._request(
+                "POST",
+                request_url,
+                data=body,
+                headers=self.headers,
+                retry=body.resendable,
+                retry_statuses=retry_statuses,
+            )
+        else:
+            payload = _build_document_in(
+                name=name,
+                metadata=metadata,
+                collection_name=collection_name,
+                document_url=document_url,
+                document_base64=document_base64,
+                document_path=document_path,
+                wait=wait,
+            ).model_dump()
+            response = self._request(
+                "POST",
+                request_url,
+                json=payload,
+                headers=self.headers,
+                retry=True,
+                retry_statuses=retry_statuses,
+            )
+        self._invalidate_search_cache(collection_name)
 
         if response.status_code == 201:
-            return DocumentOut(**response.json())
+            return self._parse(response, DocumentOut)
         elif response.status_code == 202:
-            status = GenericMessage(**response.json())
+            status = self._parse(response, GenericMessage)
             return status
         elif response.status_code == 400:
-            error = GenericError(**response.json())
+            error = self._parse(response, GenericError)
             raise ValueError(f"Bad request: {error.detail}")
         else:
             response.raise_for_status()
 
+    def upsert_documents(
+        self,
+        documents: Iterable[Union[str, Path, Dict[str, Any]]],
+        collection_name: str = "default collection",
+        max_workers: int = 4,
+        max_in_flight_bytes: int = 256 * 1024 * 1024,
+        wait: Optional[bool] = False,
+        fingerprint: bool = False,
+    ) -> List[DocumentUpsertResult]:
+        """
+        Create or update many documents concurrently.
+
+        Documents are read, base64-encoded and uploaded by a pool of worker threads sharing
+        the client's connection pool. The iterable is consumed lazily: a document is only
+        picked up once the estimated size of the uploads in flight drops below
+        `max_in_flight_bytes`, so memory stays bounded regardless of the corpus size. Files
+        are streamed (`stream=True`) unless an item sets `stream=False`, so each upload of a
+        file only holds a small buffer.
+
+        Args:
+            documents: The documents to upsert. Each item is either a file path, whose file name
+                is used as the document name, or a dict of `upsert_document` keyword arguments
+                (`name`, `metadata`, `document_url`, `document_base64`, `document_path`, ...).
+            collection_name (str): The default collection for documents that do not set one.
+                Defaults to "default collection".
+            max_workers (int): The number of concurrent uploads. Keep it at or below `pool_maxsize`.
+            max_in_flight_bytes (int): The approximate upper bound on the encoded bytes held in memory.
+                A single document larger than the bound is uploaded on its own.
+            wait (Optional[bool]): If True, each upload waits for the document to be processed.
+            fingerprint (bool): If True, only upload the documents whose content changed, see
+                `upsert_document`.
+
+        Returns:
+            List[DocumentUpsertResult]: One result per document, in input order. Failed uploads
+            and malformed items carry the raised exception in `error` instead of aborting the
+            batch. If iterating
+            `documents` raises, the documents picked up so far are still uploaded and a last
+            result with an empty name carries the exception.
+
+        Example:
+            results = client.upsert_documents(Path("archive").glob("*.pdf"), collection_name="archive")
+            failed = [result for result in results if not result.ok]
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+
+        budget = _ByteBudget(max_in_flight_bytes)
+        # also bound the number of queued uploads, e.g. for URL documents that weigh nothing
+        slots = threading.BoundedSemaphore(max_workers * 2)
+
+        def upload(kwargs: Dict[str, Any], size: int) -> DocumentOut | GenericMessage:
+            try:
+                return self.upsert_document(**kwargs)
+            finally:
+                budget.release(size)
+                slots.release()
+
+        futures: List[Tuple[str, Future]] = []
+        failure: Optional[Exception] = None
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                for document in documents:
+                    try:
+                        kwargs = _document_kwargs(document, collection_name, wait)
+                    except Exception as e:
+                        # a malformed item fails on its own, like a failed upload
+                        failed: Future = Future()
+                        failed.set_exception(e)
+                        futures.append((str(document), failed))
+                        continue
+                    if fingerprint:
+                        kwargs.setdefault("fingerprint", True)
+                    size = _estimate_upload_size(kwargs)
+                    slots.acquire()
+                    budget.acquire(size)
+                    futures.append(
+                        (kwargs.get("name", ""), executor.submit(upload, kwargs, size))
+                    )
+            except Exception as e:
+                # finish the uploads already started and report them
+                failure = e
+
+        results = []
+        for name, future in futures:
+            error = future.exception()
+            if error is None:
+                results.append(
+                    DocumentUpsertResult(name=name, document=future.result())
+                )
+            else:
+                results.append(DocumentUpsertResult(name=name, error=error))
+        if failure is not None:
+            results.append(DocumentUpsertResult(name="", error=failure))
+        return results
+
+    def sync_directory(
+        self,
+        path: Union[str, Path],
+        collection_name: str = "default collection",
+        glob: str = "**/*",
+        max_workers: int = 4,
+        manifest_path: Optional[Union[str, Path]] = None,
+        delete: bool = True,
+    ) -> DirectorySyncResult:
+        """
+        Upload the new and changed files of a directory and delete the documents of removed files.
+
+        A manifest of the files last uploaded, with their size, modification time and SHA-256
+        digest, is kept next to them (see `SyncManifest`). Files whose size and modification
+        time match the manifest are not read, files whose digest matches are not uploaded, so
+        a sync only does work proportional to what changed. The changed files are hashed while
+        the previous ones upload with `upsert_documents`. A new file with the digest of a
+        removed one is a rename: its document is renamed with `partial_update_document`
+        instead of uploaded again. A file that fails to upload or delete is left out of the
+        manifest update and retried by the next sync, as is a file that cannot be read.
+
+        Every file becomes the document named after its path relative to `path`, with `/`
+        replaced by `__` since document names are part of the API URLs, e.g.
+        `q1/report.pdf` becomes `q1__report.pdf`. The relative path is also stored as the
+        `source_path` metadata, and the digest as `colivara_sha256`, see `upsert_document`.
+        Files whose names would collide, e.g. `q1/report.pdf` and `q1__report.pdf`, are not
+        uploaded and reported in `errors` under the document name.
+
+        Args:
+            path (Union[str, Path]): The directory to sync.
+            collection_name (str): The collection to sync into. Defaults to "default collection".
+            glob (str): The pattern of the files to sync, relative to `path`. Defaults to "**/*".
+            max_workers (int): The number of concurrent uploads. Defaults to 4.
+            manifest_path (Optional[Union[str, Path]]): The manifest file. Defaults to
+                `.colivara-sync.json` in `path`. Keep one manifest per collection.
+            delete (bool): If True (the default), delete the documents of files that disappeared
+                and rename the documents of files that moved.
+
+        Returns:
+            DirectorySyncResult: The uploaded, renamed (old to new name) and deleted document
+            names, the number of unchanged files and the error of every document that failed.
+
+        Example:
+            result = client.sync_directory("shared/reports", "reports", glob="**/*.pdf")
+            print(f"{len(result.uploaded)} uploaded, {result.unchanged} unchanged")
+        """
+        root = Path(path)
+        manifest_file = Path(
+            manifest_path if manifest_path is not None else root / MANIFEST_NAME
+        ).absolute()
+        manifest = SyncManifest.load(manifest_file, collection_name)
+        result = DirectorySyncResult()
+        pending: Dict[str, Tuple[str, FileEntry]] = {}
+        # the files that may have been renamed, by digest
+        previous = {
+            entry.sha256: relative for relative, entry in manifest.files.items()
+        }
+        renames: List[Tuple[str, str, FileEntry, Path]] = []
+        files = [
+            file
+            for file in sorted(root.glob(glob))
+            if file.absolute() != manifest_file
+            and not _is_manifest(file.name, manifest_file.name)
+            and file.is_file()
+        ]
+        seen = {file.relative_to(root).as_posix() for file in files}
+        # the document name of every file, to catch different paths mapping to one name
+        owners: Dict[str, List[str]] = {}
+        for file in files:
+            relative = file.relative_to(root).as_posix()
+            owners.setdefault(_sync_document_name(relative), []).append(relative)
+        for name, relatives in owners.items():
+            if len(relatives) > 1:
+                result.errors[name] = ValueError(
+                    f"{' and '.join(relatives)} would all be uploaded as {name}, rename one of them."
+                )
+
+        def changed() -> Iterator[Dict[str, Any]]:
+            for file in files:
+                relative = file.relative_to(root).as_posix()
+                name = _sync_document_name(relative)
+                if len(owners[name]) > 1:
+                    continue
+                try:
+                    stat = file.stat()
+                    entry = manifest.files.get(relative)
+                    if entry is not None and entry[:2] == (
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                    ):
+                        result.unchanged += 1
+                        continue
+                    current = FileEntry(
+                        stat.st_size, stat.st_mtime_ns, file_sha256(file)
+                    )
+                except OSError as e:
+                    # e.g. removed or unreadable since listed, keep its document as is
+                    result.errors[name] = e
+                    continue
+                if entry is not None and entry.sha256 == current.sha256:
+                    # touched but not modified
+                    manifest.files[relative] = current
+                    result.unchanged += 1
+                    continue
+                moved_from = previous.get(current.sha256) if entry is None else None
+                if delete and moved_from and not (root / moved_from).exists():
+                    del previous[current.sha256]
+                    renames.append((moved_from, relative, current, file))
+                    continue
+                pending[name] = (relative, current)
+                yield {
+                    "name": name,
+                    "document_path": file,
+                    "metadata": _sync_metadata(relative, current),
+                }
+
+        try:
+            uploads = self.upsert_documents(changed(), collection_name, max_workers)
+            for upload in uploads:
+                if upload.error is not None and upload.name not in pending:
+                    # going through the files failed, see upsert_documents
+                    result.errors[str(root)] = upload.error
+                    continue
+                relative, current = pending[upload.name]
+                if upload.error is None:
+                    manifest.files[relative] = current
+                    result.uploaded.append(upload.name)
+                else:
+                    result.errors[upload.name] = upload.error
+            for moved_from, relative, current, file in renames:
+                old_name = _sync_document_name(moved_from)
+                name = _sync_document_name(relative)
+                metadata = _sync_metadata(relative, current)
+                try:
+                    self.partial_update_document(
+                        old_name,
+                        name=name,
+                        metadata=metadata,
+                        collection_name=collection_name,
+                    )
+                except Exception:
+                    # e.g. the document was deleted, upload it again
+                    try:
+                        self.upsert_document(
+                            name, metadata, collection_name, document_path=file
+                        )
+                    except Exception as e:
+                        result.errors[name] = e
+                        continue
+                    result.uploaded.append(name)
+                else:
+                    del manifest.files[moved_from]
+                    result.renamed[old_name] = name
+                manifest.files[relative] = current
+            for relative in sorted(set(manifest.files) - seen) if delete else []:
+                name = _sync_document_name(relative)
+                if name in owners:
+                    # the document now belongs to another file, e.g. a/b.pdf became a__b.pdf
+                    del manifest.files[relative]
+                    continue
+                try:
+                    self.delete_document(name, collection_name, missing_ok=True)
+                except Exception as e:
+                    result.errors[name] = e
+                else:
+                    del manifest.files[relative]
+                    result.deleted.append(name)
+        finally:
+            manifest.save()
+        return result
+
+    @instrumented
     def get_document(
         self,
         document_name: str,
@@ -283,16 +897,113 @@ class Colivara:
         request_url = f"{self.base_url}/v1/documents/{document_name}/"
         params = {"collection_name": collection_name, "expand": expand}
 
-        response = requests.get(request_url, params=params, headers=self.headers)
+        response = self._request(
+            "GET", request_url, params=params, headers=self.headers, retry=True
+        )
 
         if response.status_code == 200:
-            return DocumentOut(**response.json())
+            return self._parse(response, DocumentOut)
         elif response.status_code == 404:
-            error = GenericError(**response.json())
+            error = self._parse(response, GenericError)
             raise ValueError(f"Document not found: {error.detail}")
         else:
             response.raise_for_status()
 
+    @instrumented
+    def iter_document_pages(
+        self,
+        document_name: str,
+        collection_name: str = "default collection",
+    ) -> Iterator[PageOut]:
+        """
+        Iterate over the pages of a document as they arrive.
+
+        `get_document(expand="pages")` holds the whole response and all its pages at once. Here
+        the response is streamed and every page is validated and yielded as soon as it is
+        complete, so memory stays near the size of one page image. The other fields of the
+        document are skipped. The request is sent on the first iteration.
+
+        Args:
+            document_name (str): The name of the document.
+            collection_name (str): The name of the collection containing the document.
+                                   Defaults to "default collection".
+
+        Yields:
+            PageOut: The pages of the document, in the order of the response.
+
+        Raises:
+            requests.HTTPError: If the API request fails.
+            ValueError: If the document or collection is not found, or the response is incomplete.
+        """
+        request_url = f"{self.base_url}/v1/documents/{document_name}/"
+        params = {"collection_name": collection_name, "expand": "pages"}
+
+        with self._request(
+            "GET",
+            request_url,
+            params=params,
+            headers=self.headers,
+            retry=True,
+            stream=True,
+        ) as response:
+            if response.status_code == 404:
+                error = self._parse(response, GenericError)
+                raise ValueError(f"Document not found: {error.detail}")
+            elif response.status_code != 200:
+                response.raise_for_status()
+                return
+            pages = JSONArrayItems(array_key="pages")
+            for chunk in response.iter_content(CHUNK_SIZE):
+                for page in pages.feed(chunk):
+                    yield _validate_json(page, PageOut, self.json_backend)
+            pages.close()
+
+    def export_pages(
+        self,
+        document_name: str,
+        out_dir: Union[str, Path],
+        collection_name: str = "default collection",
+        max_workers: int = 8,
+        format: Optional[str] = None,
+        skip_existing: Optional[str] = "size",
+    ) -> List[Path]:
+        """
+        Write the page images of a document to disk while they arrive.
+
+        The pages are streamed as in `iter_document_pages` and decoded and written in a
+        thread pool, see `colivara_py.export.export_pages`. Pages that were already
+        exported are skipped, so an interrupted export can simply be restarted.
+
+        Args:
+            document_name (str): The name of the document.
+            out_dir (Union[str, Path]): The export directory, created if needed.
+            collection_name (str): The name of the collection containing the document.
+                                   Defaults to "default collection".
+            max_workers (int): The number of threads decoding and writing. Defaults to 8.
+            format (Optional[str]): The expected image format and file extension. Defaults to
+                the format of every image. Images are not converted.
+            skip_existing (Optional[str]): "size", "hash" or None. Defaults to "size".
+
+        Returns:
+            List[Path]: The path of every page, e.g.
+            `out_dir/<collection>/<document>/page_0001.png`.
+
+        Raises:
+            requests.HTTPError: If the API request fails.
+            ValueError: If the document or collection is not found, `skip_existing` is unknown
+                or an image is not in `format`.
+        """
+        return export_pages(
+            self.iter_document_pages(document_name, collection_name),
+            out_dir,
+            max_workers,
+            format,
+            skip_existing,
+            document_name,
+            collection_name,
+        )
+
+    @instrumented
     def partial_update_document(
         self,
         document_name: str,
@@ -331,16 +1042,22 @@ class Colivara:
             base64=document_base64,
         ).model_dump(exclude_none=True)
 
-        response = requests.patch(request_url, json=payload, headers=self.headers)
+        # a repeated rename would look for the old name and fail
+        response = self._request(
+            "PATCH", request_url, json=payload, headers=self.headers, retry=name is None
+        )
+        # the document may have moved between collections
+        self._invalidate_search_cache(None)
 
         if response.status_code == 200:
-            return DocumentOut(**response.json())
+            return self._parse(response, DocumentOut)
         elif response.status_code in [404, 409]:
-            error = GenericError(**response.json())
+            error = self._parse(response, GenericError)
             raise ValueError(f"Update failed: {error.detail}")
         else:
             response.raise_for_status()
 
+    @instrumented
     def list_documents(
         self, collection_name: str = "default collection", expand: Optional[str] = None
     ) -> List[DocumentOut]:
@@ -362,15 +1079,157 @@ class Colivara:
         request_url = f"{self.base_url}/v1/documents/"
         params = {"collection_name": collection_name, "expand": expand}
 
-        response = requests.get(request_url, params=params, headers=self.headers)
+        response = self._request(
+            "GET", request_url, params=params, headers=self.headers, retry=True
+        )
 
         if response.status_code == 200:
-            return [DocumentOut(**doc) for doc in response.json()]
+            return self._parse(response, List[DocumentOut])
         else:
             response.raise_for_status()
 
+    @instrumented
+    def iter_documents(
+        self,
+        collection_name: str = "default collection",
+        expand: Optional[str] = None,
+        batch_size: int = 100,
+        skip_pages: bool = False,
+    ) -> Iterator[DocumentOut]:
+        """
+        Iterate over the documents of a collection without loading the whole list.
+
+        The response is streamed and split into documents as it arrives, every `batch_size`
+        documents are validated together and yielded, so only one batch is held in memory
+        whatever the size of the collection. The request is sent on the first iteration.
+
+        Args:
+            collection_name (str): The name of the collection to fetch documents from.
+                                   Defaults to "default collection". Use "all" to fetch documents from all collections.
+            expand (Optional[str]): A comma-separated string specifying additional fields to include in the response.
+                                    If "pages" is included, the pages of each document will be included.
+            batch_size (int): The number of documents validated at once. Defaults to 100.
+            skip_pages (bool): Drop the `pages` of every document while reading the response, so
+                               their images are never buffered nor parsed. Defaults to False.
+
+        Yields:
+            DocumentOut: The documents, in the order of the response.
+
+        Raises:
+            requests.HTTPError: If the API request fails.
+            ValueError: If the response is not a complete JSON array.
+        """
+        request_url = f"{self.base_url}/v1/documents/"
+        params = {"collection_name": collection_name, "expand": expand}
+
+        with self._request(
+            "GET",
+            request_url,
+            params=params,
+            headers=self.headers,
+            retry=True,
+            stream=True,
+        ) as response:
+            if response.status_code != 200:
+                response.raise_for_status()
+                return
+            items = JSONArrayItems(skip_key="pages" if skip_pages else None)
+            batch: List[bytes] = []
+            for chunk in response.iter_content(CHUNK_SIZE):
+                batch += items.feed(chunk)
+                while len(batch) >= batch_size:
+                    yield from _parse_documents(batch[:batch_size], self.json_backend)
+                    del batch[:batch_size]
+            items.close()
+            yield from _parse_documents(batch, self.json_backend)
+
+    def wait_for_documents(
+        self,
+        document_names: Union[Iterable[str], Mapping[str, Optional[str]]],
+        collection_name: str = "default collection",
+        timeout: Optional[float] = 600,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+    ) -> Iterator[DocumentOut]:
+        """
+        Wait for documents uploaded with `wait=False` to finish processing.
+
+        All pending documents are tracked together: every poll is a single `list_documents` call
+        for the whole batch, and each document is yielded as soon as it shows up. The poll interval
+        starts at `poll_interval` and doubles, up to `max_poll_interval`, while nothing new is ready;
+        it resets once a document completes.
+
+        A document counts as ready once it is listed in the collection. An existing document is
+        listed while its re-upload is processed, so to wait for the new version pass a mapping of
+        document names to the SHA-256 of their new content, as stored under `colivara_sha256` by
+        `upsert_document(fingerprint=True)`: such documents count as ready once listed with
+        that digest.
+
+        Args:
+            document_names (Union[Iterable[str], Mapping[str, Optional[str]]]): The names of the
+                documents to wait for, or a mapping of names to the expected `colivara_sha256`,
+                None accepting any version.
+            collection_name (str): The name of the collection containing the documents.
+                                   Defaults to "default collection".
+            timeout (Optional[float]): The maximum number of seconds to wait, None waits forever.
+            poll_interval (float): The initial number of seconds between polls.
+            max_poll_interval (float): The maximum number of seconds between polls.
+
+        Yields:
+            DocumentOut: Each document once it has been processed, in completion order.
+
+        Raises:
+            TimeoutError: If some documents are still pending after `timeout` seconds.
+            requests.HTTPError: If the API request fails.
+
+        Example:
+            for name in names:
+                client.upsert_document(name=name, document_url=urls[name])
+            for document in client.wait_for_documents(names, timeout=300):
+                print(f"{document.name} is ready with {document.num_pages} pages")
+        """
+        if isinstance(document_names, Mapping):
+            expected: Dict[str, Optional[str]] = dict(document_names)
+        else:
+            expected = dict.fromkeys(document_names)
+        pending = set(expected)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = poll_interval
+        while pending:
+            ready = [
+                document
+                for document in self.list_documents(collection_name=collection_name)
+                if document.name in pending
+                and expected[document.name]
+                in (None, document.metadata.get(FINGERPRINT_KEY))
+            ]
+            for document in ready:
+                pending.discard(document.name)
+                # background processing finished after the upload invalidated the cache
+                self._invalidate_search_cache(document.collection_name)
+                yield document
+            if not pending:
+                return
+
+            if ready:
+                interval = poll_interval
+            delay = interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Timed out waiting for documents: {', '.join(sorted(pending))}"
+                    )
+                delay = min(delay, remaining)
+            time.sleep(delay)
+            interval = min(interval * 2, max_poll_interval)
+
+    @instrumented
     def delete_document(
-        self, document_name: str, collection_name: str = "default collection"
+        self,
+        document_name: str,
+        collection_name: str = "default collection",
+        missing_ok: bool = False,
     ) -> None:
         """
         Delete a document by its name.
@@ -379,6 +1238,7 @@ class Colivara:
             document_name (str): The name of the document to be deleted.
             collection_name (str): The name of the collection containing the document.
                                    Defaults to "default collection". Use "all" to access all collections belonging to the user.
+            missing_ok (bool): If True, a document that does not exist counts as deleted.
 
         Raises:
             requests.HTTPError: If the API request fails.
@@ -387,12 +1247,18 @@ class Colivara:
         request_url = f"{self.base_url}/v1/documents/delete-document/{document_name}/"
         params = {"collection_name": collection_name}
 
-        response = requests.delete(request_url, params=params, headers=self.headers)
+        response = self._request(
+            "DELETE", request_url, params=params, headers=self.headers, retry=True
+        )
+        self._invalidate_search_cache(collection_name)
 
-        if response.status_code == 204:
+        # after a retry, a 404 means an earlier attempt deleted it
+        if response.status_code == 204 or (
+            response.status_code == 404 and (missing_ok or self.last_retries)
+        ):
             return
         elif response.status_code in [404, 409]:
-            error = GenericError(**response.json())
+            error = self._parse(response, GenericError)
             raise ValueError(f"Deletion failed: {error.detail}")
         else:
             response.raise_for_status()
@@ -410,6 +1276,10 @@ class Colivara:
         This method allows you to search for pages similar to a given query across all documents
         in the specified collection.
 
+        With a `search_cache` on the client, an identical search (same query, collection, top_k and
+        filter) is answered from the cache until it expires or a write through this client touches
+        the collection. Cached results are shared between callers and should not be modified.
+
         Args:
             query (str): The search query string.
             collection_name (str): The name of the collection to search in. Defaults to "all".
@@ -451,34 +1321,149 @@ class Colivara:
                 "lookup": "has_any_keys"
             })
         """
-        request_url = f"{self.base_url}/v1/search/"
-        payload = {
-            "query": query,
-            "collection_name": collection_name,
-            "top_k": top_k,
-        }
-        filter_obj = None
-        if query_filter:
-            try:
-                filter_obj = QueryFilter(**query_filter)
-                payload["query_filter"] = filter_obj.model_dump()
-            except ValidationError as e:
-                raise ValueError(f"Invalid query_filter: {str(e)}")
+        query_in = _build_query_in(query, collection_name, top_k, query_filter)
+        return self._search(query_in)
+
+    @instrumented
+    def _search(self, query_in: QueryIn) -> QueryOut:
+        cache = self.search_cache
+        if cache is not None:
+            key = json.dumps(query_in.model_dump(mode="json"), sort_keys=True)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            # a write to the collection while the search runs makes its result stale
+            generation = cache.generation([query_in.collection_name])
 
-        query_in = QueryIn(**payload)  # type: ignore
-
-        response = requests.post(
-            request_url, json=query_in.model_dump(), headers=self.headers
+        request_url = f"{self.base_url}/v1/search/"
+        response = self._request(
+            "POST",
+            request_url,
+            json=query_in.model_dump(),
+            headers=self.headers,
+            retry=True,
         )
 
         if response.status_code == 200:
-            return QueryOut(**response.json())
+            result = self._parse(response, QueryOut)
+            if cache is not None:
+                cache.set(
+                    key,
+                    result,
+                    size=len(response.content),
+                    tags=[query_in.collection_name],
+                    generation=generation,
+                )
+            return result
         elif response.status_code == 503:
-            error = GenericError(**response.json())
+            error = self._parse(response, GenericError)
             raise ValueError(f"Service unavailable: {error.detail}")
         else:
             response.raise_for_status()
 
+    def _invalidate_search_cache(self, collection_name: Optional[str]) -> None:
+        if self.search_cache is None:
+            return
+        if collection_name is None or collection_name == "all":
+            self.search_cache.clear()
+        else:
+            # searches over "all" collections cover this one too
+            self.search_cache.invalidate(collection_name)
+            self.search_cache.invalidate("all")
+
+    @overload
+    def search_many(
+        self,
+        queries: Iterable[str],
+        collection_name: str = ...,
+        top_k: int = ...,
+        query_filter: Optional[Dict[str, Any]] = ...,
+        max_workers: int = ...,
+        as_completed: Literal[False] = ...,
+    ) -> List[SearchResult]: ...
+
+    @overload
+    def search_many(
+        self,
+        queries: Iterable[str],
+        collection_name: str = ...,
+        top_k: int = ...,
+        query_filter: Optional[Dict[str, Any]] = ...,
+        max_workers: int = ...,
+        *,
+        as_completed: Literal[True],
+    ) -> Iterator[SearchResult]: ...
+
+    def search_many(
+        self,
+        queries: Iterable[str],
+        collection_name: str = "all",
+        top_k: int = 3,
+        query_filter: Optional[Dict[str, Any]] = None,
+        max_workers: int = 8,
+        as_completed: bool = False,
+    ) -> Union[List[SearchResult], Iterator[SearchResult]]:
+        """
+        Run many searches concurrently over the pooled connections.
+
+        The collection, top_k and query_filter are validated once and shared by every query.
+        A failing query is reported in its result instead of aborting the batch.
+
+        Args:
+            queries (Iterable[str]): The search query strings.
+            collection_name (str): The name of the collection to search in. Defaults to "all".
+            top_k (int): The number of top results to return per query. Defaults to 3.
+            query_filter (Optional[Dict[str, Any]]): An optional filter applied to every query,
+                see `search` for the accepted keys.
+            max_workers (int): The number of concurrent searches. Keep it at or below `pool_maxsize`.
+            as_completed (bool): If True, return an iterator that yields results as they complete
+                instead of a list in input order.
+
+        Returns:
+            A list of SearchResult objects in input order, or an iterator over them in completion
+            order. Each one carries the query's `index` in the input, and either the QueryOut
+            `result` or the raised `error`.
+
+        Raises:
+            ValueError: If the query_filter or the other shared parameters are invalid.
+
+        Example:
+            for item in client.search_many(questions, collection_name="my_collection", top_k=5):
+                if item.ok:
+                    print(item.query, item.result.results[0].document_name)
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        # validate the shared parameters once, then only swap the query string
+        template = _build_query_in("", collection_name, top_k, query_filter)
+        queries = list(queries)
+        if as_completed:
+            return self._iter_search_many(template, queries, max_workers)
+        results = list(self._iter_search_many(template, queries, max_workers))
+        return sorted(results, key=lambda result: result.index)
+
+    def _iter_search_many(
+        self, template: QueryIn, queries: List[str], max_workers: int
+    ) -> Iterator[SearchResult]:
+        def run(query: str) -> QueryOut:
+            if not isinstance(query, str):
+                raise ValueError(f"Invalid query: {query!r} is not a string.")
+            return self._search(template.model_copy(update={"query": query}))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(run, query): (index, query)
+                for index, query in enumerate(queries)
+            }
+            for future in futures_as_completed(futures):
+                index, query = futures[future]
+                error = future.exception()
+                if error is None:
+                    yield SearchResult(index=index, query=query, result=future.result())
+                else:
+                    yield SearchResult(index=index, query=str(query), error=error)
+
+    @instrumented
     def file_to_imgbase64(self, file_path: str) -> List[FileOut]:
         """
         Converts a file to a list of base64 encoded images.
@@ -496,12 +1481,15 @@ class Colivara:
 
         with open(file_path, "rb") as file:
             files = {"file": file}
-            response = requests.post(
-                url, files=files, headers={"Authorization": f"Bearer {self.api_key}"}
+            response = self._request(
+                "POST",
+                url,
+                files=files,
+                headers={"Authorization": f"Bearer {self.api_key}"},
             )
 
         if response.status_code == 200:
-            return [FileOut(**item) for item in response.json()]
+            return self._parse(response, List[FileOut])
         else:
             response.raise_for_status()
 
@@ -518,63 +1506,411 @@ class Colivara:
         Raises:
             Exception: If there's an error during the file conversion process.
         """
-        # Read the file
-        with open(file_path, "rb") as file:
-            file_content = file.read()
-        # Encode the file content to base64
-        base64_content = base64.b64encode(file_content).decode("utf-8")
-        return base64_content
+        return _file_to_base64(file_path)
 
+    @overload
+    def create_embedding(
+        self,
+        input_data: Union[str, List[str]],
+        task: Union[str, TaskEnum] = ...,
+        as_arrays: Literal[False] = ...,
+        dtype: "DTypeLike" = ...,
+    ) -> EmbeddingsOut: ...
+
+    @overload
+    def create_embedding(
+        self,
+        input_data: Union[str, List[str]],
+        task: Union[str, TaskEnum] = ...,
+        *,
+        as_arrays: Literal[True],
+        dtype: "DTypeLike" = ...,
+    ) -> "EmbeddingArrays": ...
+
+    @instrumented
     def create_embedding(
         self,
         input_data: Union[str, List[str]],
         task: Union[str, TaskEnum] = TaskEnum.query,
-    ) -> EmbeddingsOut:
+        as_arrays: bool = False,
+        dtype: "DTypeLike" = "float32",
+    ) -> Union[EmbeddingsOut, "EmbeddingArrays"]:
         """
         Creates embeddings for the given input data.
 
         Args:
             input_data: A string or list of strings to create embeddings for.
             task: The task type for embedding creation. Can be "query" or "image". Defaults to "query".
+            as_arrays: Return NumPy arrays instead of nested float lists (optional). Needs the
+                `numpy` extra installed.
+            dtype: The dtype of the arrays, e.g. "float16" (optional). Defaults to "float32".
+
+        With an `embedding_cache` on the client, query embeddings are served from the cache and
+        only the inputs that miss are sent, in one request. The usage then covers only those.
 
         Returns:
-            An EmbeddingsOut object containing the embeddings, model information, and usage data.
+            An EmbeddingsOut object containing the embeddings, model information, and usage data,
+            or with `as_arrays` an EmbeddingArrays with one `(tokens, dim)` array per input.
 
         Raises:
             ValueError: If an invalid task is provided.
+            ImportError: If `as_arrays` is set but numpy is not installed.
             Exception: If there's an unexpected error from the API.
 
         Example:
             client.create_embedding("what is 1+1?", task="query")
             client.create_embedding(["image1.jpg", "image2.jpg"], task="image")
+            client.create_embedding("what is 1+1?", as_arrays=True).padded()
         """
-        url = f"{self.base_url}/v1/embeddings/"
+        embeddings_in = _build_embeddings_in(input_data, task)
+        if self.embedding_cache is None or embeddings_in.task != TaskEnum.query:
+            if as_arrays:
+                from .arrays import EmbeddingArrays
+
+                response = self._embedding_response(embeddings_in)
+                return self._timed_parse(
+                    response, EmbeddingArrays.from_json, response.content, dtype
+                )
+            return self._create_embedding(embeddings_in)
+        out = self._create_cached_embedding(embeddings_in, self.embedding_cache)
+        if as_arrays:
+            from .arrays import EmbeddingArrays
 
-        # Ensure input_data is a list
-        if isinstance(input_data, str):
-            input_data = [input_data]
+            return EmbeddingArrays.from_embeddings_out(out, dtype)
+        return out
 
-        # Validate and convert task to TaskEnum
-        if isinstance(task, str):
-            try:
-                task = TaskEnum(task.lower())
-            except ValueError:
-                raise ValueError(f"Invalid task: {task}. Must be 'query' or 'image'.")
-        elif not isinstance(task, TaskEnum):
-            raise ValueError("Task must be a string or TaskEnum.")
+    def _create_embedding(self, embeddings_in: EmbeddingsIn) -> EmbeddingsOut:
+        return self._parse(self._embedding_response(embeddings_in), EmbeddingsOut)
 
-        try:
-            payload = EmbeddingsIn(input_data=input_data, task=task).model_dump()
-        except ValidationError as e:
-            raise ValueError(f"Invalid input data: {str(e)}")
+    def _embedding_response(self, embeddings_in: EmbeddingsIn) -> requests.Response:
+        url = f"{self.base_url}/v1/embeddings/"
+        payload = embeddings_in.model_dump()
 
-        response = requests.post(url, json=payload, headers=self.headers)
+        response = self._request(
+            "POST", url, json=payload, headers=self.headers, retry=True
+        )
 
         if response.status_code == 200:
-            data = response.json()
-            return EmbeddingsOut(**data)
+            return response
         elif response.status_code == 503:
-            error = GenericError(**response.json())
+            error = self._parse(response, GenericError)
             raise Exception(f"Service Unavailable: {error.detail}")
         else:
             response.raise_for_status()
+
+    def _create_cached_embedding(
+        self, embeddings_in: EmbeddingsIn, cache: TTLCache
+    ) -> EmbeddingsOut:
+        # the server decides the model, so lookups use the one that answered last
+        task = embeddings_in.task.value
+        inputs = embeddings_in.input_data
+        items = [cache.get((task, text, self._embedding_model)) for text in inputs]
+        missing = list(dict.fromkeys(t for t, i in zip(inputs, items) if i is None))
+        model = self._embedding_model
+        usage: Dict[str, Any] = {}
+        by_text: Dict[str, Dict[str, Any]] = {}
+        if missing:
+            fetched = self._create_embedding(
+                EmbeddingsIn(input_data=missing, task=embeddings_in.task)
+            )
+            model, usage = fetched.model, fetched.usage
+            self._embedding_model = model
+            by_text.update(zip(missing, fetched.data))
+            for text, item in by_text.items():
+                cache.set((task, text, model), item)
+        data = [
+            {**(item if item is not None else by_text[text]), "index": index}
+            for index, (text, item) in enumerate(zip(inputs, items))
+        ]
+        return EmbeddingsOut.model_validate(
+            {"data": data, "model": model or "", "usage": usage}
+        )
+
+
+def _content_length(headers: Any) -> Optional[int]:
+    length = headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+def _body_size(request: requests.PreparedRequest) -> Optional[int]:
+    # None for streamed bodies of unknown length
+    if request.body is None or isinstance(request.body, (bytes, str)):
+        return len(request.body or b"")
+    return _content_length(request.headers)
+
+
+def _check_json_backend(json_backend: str) -> str:
+    if json_backend == "orjson":
+        try:
+            import orjson  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "The orjson json_backend needs orjson, install it with `pip install colivara-py[orjson]`."
+            )
+    elif json_backend != "pydantic":
+        raise ValueError(
+            f"Invalid json_backend: {json_backend}. Must be 'pydantic' or 'orjson'."
+        )
+    return json_backend
+
+
+@lru_cache(maxsize=None)
+def _type_adapter(type_: Any) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+def _validate_json(content: bytes, type_: Any, json_backend: str) -> Any:
+    adapter = _type_adapter(type_)
+    if json_backend == "orjson":
+        import orjson
+
+        return adapter.validate_python(orjson.loads(content))
+    return adapter.validate_json(content)
+
+
+def _parse_documents(items: List[bytes], json_backend: str) -> List[DocumentOut]:
+    # the raw items of a JSON array, validated in one call
+    return _validate_json(
+        b"[" + b",".join(items) + b"]", List[DocumentOut], json_backend
+    )
+
+
+def _file_to_base64(file_path: Union[str, Path]) -> str:
+    # Read the file
+    with open(file_path, "rb") as file:
+        file_content = file.read()
+    # Encode the file content to base64
+    return base64.b64encode(file_content).decode("utf-8")
+
+
+def _build_document_in(
+    name: str,
+    metadata: Optional[Dict[str, Any]],
+    collection_name: str,
+    document_url: Optional[str],
+    document_base64: Optional[str],
+    document_path: Optional[Union[str, Path]],
+    wait: Optional[bool],
+) -> DocumentIn:
+    # if user sent us a document_path, we will read the file and convert it to base64
+    if document_path:
+        try:
+            document_base64 = _file_to_base64(_resolve_document_path(document_path))
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"The specified file does not exist: {document_path}"
+            )
+        except Exception as e:
+            raise ValueError(f"Error reading file: {str(e)}")
+    if not document_url and not document_base64:
+        raise ValueError(
+            "Either document_url, document_base64, or document_path must be provided."
+        )
+
+    return DocumentIn(
+        name=name,
+        metadata=metadata or {},
+        collection_name=collection_name,
+        url=document_url,
+        base64=document_base64,
+        wait=wait,
+    )
+
+
+def _fingerprint(
+    document_url: Optional[str],
+    document_base64: Optional[str],
+    document_path: Optional[Union[str, Path]],
+    document_data: Optional[Union[bytes, bytearray, memoryview, IO[bytes]]] = None,
+) -> Optional[str]:
+    # the SHA-256 of the document bytes; None for URLs, whose content may change behind the
+    # same URL, and for missing or unreadable sources, which the upload then reports
+    digest = hashlib.sha256()
+    if isinstance(document_data, (bytes, bytearray, memoryview)):
+        digest.update(document_data)
+    elif document_data is not None:
+        data = document_data
+        if not data.seekable():
+            raise ValueError("fingerprint needs a seekable document_data.")
+        start = data.tell()
+        for chunk in iter(lambda: data.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        data.seek(start)
+    elif document_path:
+        try:
+            return file_sha256(document_path)
+        except OSError:
+            return None
+    elif document_base64:
+        try:
+            digest.update(base64.b64decode(document_base64))
+        except ValueError:
+            return None
+    else:
+        return None
+    return digest.hexdigest()
+
+
+def _same_content(document: DocumentOut, metadata: Dict[str, Any]) -> bool:
+    return document.metadata.get(FINGERPRINT_KEY) == metadata[FINGERPRINT_KEY]
+
+
+def _resolve_document_path(document_path: Union[str, Path]) -> Path:
+    path = Path(document_path).resolve()
+    if not path.is_file():
+        raise ValueError(f"The specified path is not a file: {path}")
+    if not os.access(path, os.R_OK):
+        raise PermissionError(f"No read permission for file: {path}")
+    return path
+
+
+def _build_document_body(
+    name: str,
+    metadata: Optional[Dict[str, Any]],
+    collection_name: str,
+    document_url: Optional[str],
+    document_base64: Optional[str],
+    source: DocumentSource,
+    wait: Optional[bool],
+) -> Base64JSONBody:
+    if document_base64:
+        raise ValueError(
+            "document_base64 cannot be streamed, pass document_data instead."
+        )
+    if isinstance(source, (str, Path)):
+        try:
+            source = _resolve_document_path(source)
+        except Exception as e:
+            raise ValueError(f"Error reading file: {str(e)}")
+    # validate everything but the streamed content against a placeholder
+    fields = DocumentIn(
+        name=name,
+        metadata=metadata or {},
+        collection_name=collection_name,
+        url=document_url,
+        base64="=",
+        wait=wait,
+    ).model_dump(mode="json", exclude={"url", "base64"})
+    return Base64JSONBody(fields, source, "base64")
+
+
+def _build_query_in(
+    query: str,
+    collection_name: str,
+    top_k: int,
+    query_filter: Optional[Dict[str, Any]],
+) -> QueryIn:
+    payload: Dict[str, Any] = {
+        "query": query,
+        "collection_name": collection_name,
+        "top_k": top_k,
+    }
+    if query_filter:
+        try:
+            filter_obj = QueryFilter(**query_filter)
+            payload["query_filter"] = filter_obj.model_dump()
+        except ValidationError as e:
+            raise ValueError(f"Invalid query_filter: {str(e)}")
+
+    return QueryIn(**payload)
+
+
+def _build_embeddings_in(
+    input_data: Union[str, List[str]], task: Union[str, TaskEnum]
+) -> EmbeddingsIn:
+    # Ensure input_data is a list
+    if isinstance(input_data, str):
+        input_data = [input_data]
+
+    # Validate and convert task to TaskEnum
+    if isinstance(task, str):
+        try:
+            task = TaskEnum(task.lower())
+        except ValueError:
+            raise ValueError(f"Invalid task: {task}. Must be 'query' or 'image'.")
+    elif not isinstance(task, TaskEnum):
+        raise ValueError("Task must be a string or TaskEnum.")
+
+    try:
+        return EmbeddingsIn(input_data=input_data, task=task)
+    except ValidationError as e:
+        raise ValueError(f"Invalid input data: {str(e)}")
+
+
+def _document_kwargs(
+    document: Union[str, Path, Dict[str, Any]],
+    collection_name: str,
+    wait: Optional[bool],
+) -> Dict[str, Any]:
+    if isinstance(document, (str, Path)):
+        document = {"name": Path(document).name, "document_path": document}
+    kwargs = {"collection_name": collection_name, "wait": wait}
+    kwargs.update(document)
+    if kwargs.get("document_path") and kwargs.get("document_data") is None:
+        # rather than the file, its base64 and the JSON body in memory at once
+        kwargs.setdefault("stream", True)
+    return kwargs
+
+
+def _failed_to_connect(error: Exception) -> bool:
+    # whether the request never reached the server, unlike e.g. a read timeout or a
+    # connection dropped after the body was sent
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0] if error.args else None, "reason", None)
+    return isinstance(reason, NewConnectionError)
+
+
+def _is_manifest(file_name: str, manifest_name: str) -> bool:
+    # manifests, also of other collections, and their temporary files are never synced
+    return any(
+        file_name == name or file_name.startswith(f".{name}.")
+        for name in (MANIFEST_NAME, manifest_name)
+    )
+
+
+def _sync_document_name(relative: str) -> str:
+    return relative.replace("/", "__")
+
+
+def _sync_metadata(relative: str, entry: FileEntry) -> Dict[str, Any]:
+    return {"source_path": relative, FINGERPRINT_KEY: entry.sha256}
+
+
+def _estimate_upload_size(kwargs: Dict[str, Any]) -> int:
+    # streamed uploads hold one chunk, others the whole payload; fall back to 0 and let
+    # upsert_document report errors
+    if kwargs.get("document_data") is not None or (
+        kwargs.get("stream") and kwargs.get("document_path")
+    ):
+        return CHUNK_SIZE
+    if kwargs.get("document_base64"):
+        return len(kwargs["document_base64"])
+    if kwargs.get("document_path"):
+        try:
+            # the file, its base64 and the JSON body holding it
+            return os.path.getsize(kwargs["document_path"]) * 11 // 3
+        except OSError:
+            return 0
+    return 0
+
+
+class _ByteBudget:
+    """Blocks producers while more than `limit` bytes are in flight."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, size: int) -> None:
+        with self.condition:
+            # an oversized item still goes through once nothing else is in flight
+            while self.in_flight and self.in_flight + size > self.limit:
+                self.condition.wait()
+            self.in_flight += size
+
+    def release(self, size: int) -> None:
+        with self.condition:
+            self.in_flight -= size
+            self.condition.notify_all()
@@ -0,0 +1,171 @@
+import functools
+import inspect
+import re
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, TypeVar
+
+EVENTS = ("request_start", "retry", "request_end")
+
+# document and collection names in API paths, replaced by placeholders in `endpoint`
+_NAMED_PATH = re.compile(
+    r"^/v1/(?:(documents/delete-document/)|(documents/)|(collections/))[^/]+/$"
+)
+_FIXED_PATHS = {"/v1/documents/upsert-document/"}
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class RequestEvent:
+    """
+    One API request, as seen by the event hooks of a client.
+
+    The same object is passed to the "request_start" hook, to the "retry" hook before
+    every retry and to the "request_end" hook, and is filled in as the request progresses.
+    All timings are in seconds and add up over the attempts of a request.
+
+    Attributes:
+        method: The HTTP method, e.g. "POST".
+        endpoint: The API path, with document and collection names replaced by placeholders
+            so that it can be used as a metric label, e.g. `/v1/documents/{document_name}/`.
+        path: The API path as requested, e.g. `/v1/documents/report.pdf/`.
+        attempt: The attempt being made, 1 for the first one.
+        status: The status of the last response, None before one is received.
+        bytes_sent: The size of the last request body, None if it was streamed.
+        bytes_received: The size of the response body, None if it is streamed and its
+            length is unknown.
+        serialize: The time spent encoding the request bodies.
+        network: The time from sending the requests until their responses were received,
+            including the waits between retries.
+        parse: The time spent validating the response. Streamed responses are read and
+            validated while they are consumed, which is not timed.
+        error: The exception of the last attempt, if it failed.
+    """
+
+    __slots__ = (
+        "method",
+        "endpoint",
+        "path",
+        "attempt",
+        "status",
+        "bytes_sent",
+        "bytes_received",
+        "serialize",
+        "network",
+        "parse",
+        "error",
+    )
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint(path)
+        self.attempt = 1
+        self.status: Optional[int] = None
+        self.bytes_sent: Optional[int] = 0
+        self.bytes_received: Optional[int] = None
+        self.serialize = 0.0
+        self.network = 0.0
+        self.parse = 0.0
+        self.error: Optional[BaseException] = None
+
+    @property
+    def elapsed(self) -> float:
+        """
+        The total time of the request, serializing, network and parsing.
+        """
+        return self.serialize + self.network + self.parse
+
+    def __repr__(self) -> str:
+        return (
+            f"RequestEvent({self.method} {self.endpoint} status={self.status} "
+            f"attempt={self.attempt} elapsed={self.elapsed * 1000:.1f}ms)"
+        )
+
+
+EventHook = Callable[[RequestEvent], Any]
+
+
+def check_event_hooks(
+    event_hooks: Optional[Mapping[str, Iterable[EventHook]]],
+) -> Dict[str, List[EventHook]]:
+    """
+    Returns a list of hooks for every event, empty for the events without hooks.
+
+    Raises:
+        ValueError: If an event is unknown.
+    """
+    event_hooks = event_hooks or {}
+    unknown = set(event_hooks) - set(EVENTS)
+    if unknown:
+        raise ValueError(
+            f"Unknown event hooks: {', '.join(sorted(unknown))}. Use one of {', '.join(EVENTS)}."
+        )
+    return {event: list(event_hooks.get(event, ())) for event in EVENTS}
+
+
+def endpoint(path: str) -> str:
+    """
+    Returns `path` with its document or collection name replaced by a placeholder.
+    """
+    match = _NAMED_PATH.match(path)
+    if match is None or path in _FIXED_PATHS:
+        return path
+    if match.group(1):
+        return "/v1/documents/delete-document/{document_name}/"
+    if match.group(2):
+        return "/v1/documents/{document_name}/"
+    return "/v1/collections/{collection_name}/"
+
+
+def instrumented(method: F) -> F:
+    """
+    Fires the "request_end" hook of the last request a client method sent, once it returns.
+
+    The response of a request is usually parsed after `_request` returns, so its
+    "request_end" is deferred until the response is parsed, the next request starts, or
+    the method decorated with this returns or, for generators, is exhausted or closed.
+    """
+    if inspect.isgeneratorfunction(method):
+
+        @functools.wraps(method)
+        def generator(self: Any, *args: Any, **kwargs: Any) -> Any:
+            try:
+                yield from method(self, *args, **kwargs)
+            finally:
+                self._end_request()
+
+        return generator  # type: ignore[return-value]
+
+    if inspect.isasyncgenfunction(method):
+
+        @functools.wraps(method)
+        async def async_generator(self: Any, *args: Any, **kwargs: Any) -> Any:
+            items = method(self, *args, **kwargs)
+            try:
+                async for item in items:
+                    yield item
+            finally:
+                # unlike yield from, async for does not close the inner generator
+                await items.aclose()
+                self._end_request()
+
+        return async_generator  # type: ignore[return-value]
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def coroutine(self: Any, *args: Any, **kwargs: Any) -> Any:
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                self._end_request()
+
+        return coroutine  # type: ignore[return-value]
+
+    @functools.wraps(method)
+    def function(self: Any, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._end_request()
+
+    return function  # type: ignore[return-value]
@@ -0,0 +1,196 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Iterable, List, Optional, Union
+
+from .models import DocumentOut, PageImage, QueryOut
+
+PageSource = Union[DocumentOut, QueryOut, Iterable[PageImage]]
+
+# the first bytes of the image formats the API returns
+_SIGNATURES = (
+    (b"\x89PNG", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF8", "gif"),
+    (b"RIFF", "webp"),
+)
+_UNSAFE = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def export_pages(
+    pages: PageSource,
+    out_dir: Union[str, Path],
+    max_workers: int = 8,
+    format: Optional[str] = None,
+    skip_existing: Optional[str] = "size",
+    document_name: Optional[str] = None,
+    collection_name: Optional[str] = None,
+) -> List[Path]:
+    """
+    Decodes page images and writes them to disk in a thread pool.
+
+    Every page is written to `out_dir/<collection>/<document>/page_<page number>.<format>`,
+    e.g. `exports/reports/report.pdf/page_0001.png`, so the same pages always land in the
+    same files and documents of the same name in different collections do not overwrite each
+    other. Pages whose collection is unknown go to `out_dir/<document>/`.
+    Pages are submitted while `pages` is iterated, which may be a stream such as
+    `Colivara.iter_document_pages`, and at most `2 * max_workers` decoded images are in
+    flight. Files are written under a temporary name and renamed, so an interrupted export
+    never leaves a partial image behind.
+
+    Args:
+        pages: A `DocumentOut` with pages, a `QueryOut`, or any iterable of pages.
+        out_dir: The export directory, created if needed.
+        max_workers: The number of threads decoding and writing. Defaults to 8.
+        format: The expected image format, used as the file extension (optional). Defaults
+            to the format of every image, read from its first bytes. Images are written as
+            returned by the API, not converted, so an image known to be in another format
+            raises a ValueError.
+        skip_existing: How an existing file is recognized as the same image and left alone:
+            "size" (the default) compares the decoded size without decoding, "hash" compares
+            SHA-256 digests, and None always rewrites.
+        document_name: The document name of pages that do not carry one (optional).
+        collection_name: The collection name of pages that do not carry one (optional).
+
+    Returns:
+        The path of every page, in the order of `pages`, whether written or skipped.
+
+    Raises:
+        ValueError: If `skip_existing` is unknown, or an image is not in `format`.
+    """
+    if isinstance(pages, DocumentOut):
+        document_name = pages.name
+        collection_name = pages.collection_name
+        pages = pages.pages or []
+    elif isinstance(pages, QueryOut):
+        pages = pages.results
+    with _Exporter(
+        out_dir, max_workers, format, skip_existing, document_name, collection_name
+    ) as exporter:
+        for page in pages:
+            full = exporter.add(page)
+            if full is not None:
+                full.result()
+        return exporter.finish()
+
+
+class _Exporter:
+    # the thread pool and the bounded queue of writes behind export_pages
+
+    def __init__(
+        self,
+        out_dir: Union[str, Path],
+        max_workers: int,
+        format: Optional[str],
+        skip_existing: Optional[str],
+        document_name: Optional[str],
+        collection_name: Optional[str] = None,
+    ):
+        if skip_existing not in ("size", "hash", None):
+            raise ValueError(f"Invalid skip_existing: {skip_existing}")
+        self.out_dir = Path(out_dir)
+        self.max_workers = max_workers
+        self.format = format
+        self.skip_existing = skip_existing
+        self.document_name = document_name
+        self.collection_name = collection_name
+        self.paths: List[Path] = []
+        self.pending: Deque[Future] = deque()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self) -> "_Exporter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.executor.shutdown()
+
+    def add(self, page: PageImage) -> Optional[Future]:
+        """
+        Submits a page, and returns the oldest write to wait for when too many are pending.
+        """
+        payload = _payload(page.img_base64)
+        name = getattr(page, "document_name", None) or self.document_name
+        collection = getattr(page, "collection_name", None) or self.collection_name
+        path = self.out_dir
+        if collection:
+            path /= _safe_name(collection)
+        path /= _safe_name(name or "document")
+        number = getattr(page, "page_number", 0)
+        extension = _extension(payload)
+        if self.format is not None:
+            if extension != "bin" and _normalize_format(self.format) != extension:
+                raise ValueError(
+                    f"Page {number} of {name or 'the document'} is a {extension} image, "
+                    f"not {self.format}: images are written as returned, not converted."
+                )
+            extension = self.format.lstrip(".")
+        path /= f"page_{number:04d}.{extension}"
+        self.paths.append(path)
+        self.pending.append(
+            self.executor.submit(_write, path, payload, self.skip_existing)
+        )
+        if len(self.pending) > 2 * self.max_workers:
+            return self.pending.popleft()
+        return None
+
+    def finish(self) -> List[Path]:
+        while self.pending:
+            self.pending.popleft().result()
+        return self.paths
+
+
+def _write(path: Path, payload: str, skip_existing: Optional[str]) -> None:
+    if skip_existing == "size" and _size(path) == _decoded_size(payload):
+        return
+    data = base64.b64decode(payload)
+    if skip_existing == "hash" and _size(path) == len(data):
+        digest = hashlib.sha256(path.read_bytes()).digest()
+        if digest == hashlib.sha256(data).digest():
+            return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _payload(img_base64: str) -> str:
+    # accept data URLs, e.g. "data:image/png;base64,iVBOR..."
+    if img_base64.startswith("data:"):
+        return img_base64.partition(",")[2]
+    return img_base64
+
+
+def _extension(payload: str) -> str:
+    try:
+        head = base64.b64decode(payload[:16])
+    except binascii.Error:
+        return "bin"
+    return next((ext for magic, ext in _SIGNATURES if head.startswith(magic)), "bin")
+
+
+def _normalize_format(format: str) -> str:
+    format = format.lower().lstrip(".")
+    return "jpg" if format == "jpeg" else format
+
+
+def _decoded_size(payload: str) -> int:
+    return len(payload) * 3 // 4 - payload[-2:].count("=")
+
+
+def _size(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return None
+
+
+def _safe_name(name: str) -> str:
+    # document names become directory names, keep them on one level
+    name = _UNSAFE.sub("_", name).strip(". ")
+    return name or "document"
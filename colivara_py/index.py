@@ -0,0 +1,273 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError(
+        "colivara_py.index needs numpy, install it with `pip install colivara-py[numpy]`."
+    )
+
+from .maxsim import MaxSimScorer, top_k_scores
+from .models import PageOutQuery, QueryOut
+
+FORMAT_VERSION = 1
+TOKEN_DTYPE = np.dtype("<f2")
+
+
+class LocalIndex:
+    """
+    A directory of page embeddings that can be searched offline, without the API.
+
+    The index is made of flat files that are memory-mapped on open, so only the pages a search
+    touches are read into RAM:
+
+    - `tokens.f16`: the token vectors of all pages, one page after the other, as float16.
+    - `offsets.i64`: the `pages + 1` offsets of the pages in the token matrix.
+    - `collections.i32`: the collection of every page, as an index into `meta.json`.
+    - `pages.jsonl` and `rows.i64`: one JSON row per page with its document, collection,
+      metadata and image, and the byte offset of every row.
+    - `meta.json`: the dimension and the sizes of all of the above.
+
+    Documents are appended with `add`. `meta.json` is replaced atomically after the other files
+    are written, so an interrupted `add` leaves the index as it was before it. An index has
+    one writer at a time, searches only see the pages added before the last `refresh()`.
+
+    Example:
+        index = LocalIndex("my_index")
+        pages = client.create_embedding(images, task="image", as_arrays=True)
+        index.add("report.pdf", pages, collection_name="reports", images=images)
+        query = client.create_embedding("revenue in 2023", as_arrays=True)[0]
+        result = index.search(query, top_k=5, query="revenue in 2023")
+    """
+
+    def __init__(self, path: Union[str, Path], block_size: int = 2**20):
+        """
+        Opens the index at `path`, creating an empty one if it does not exist.
+
+        Args:
+            path: The index directory.
+            block_size: The scoring chunk size, see `MaxSimScorer` (optional).
+
+        Raises:
+            ValueError: If the directory holds an index of an unsupported format version.
+        """
+        self.path = Path(path)
+        self.block_size = block_size
+        self.path.mkdir(parents=True, exist_ok=True)
+        if not (self.path / "meta.json").exists():
+            for name in ("tokens.f16", "collections.i32", "pages.jsonl"):
+                (self.path / name).write_bytes(b"")
+            (self.path / "offsets.i64").write_bytes(np.zeros(1, "<i8").tobytes())
+            (self.path / "rows.i64").write_bytes(np.zeros(1, "<i8").tobytes())
+            self._write_meta(
+                {
+                    "version": FORMAT_VERSION,
+                    "dim": 0,
+                    "pages": 0,
+                    "tokens": 0,
+                    "documents": 0,
+                    "collections": [],
+                }
+            )
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Re-reads `meta.json` and re-maps the files, e.g. after another process added pages.
+        """
+        meta = json.loads((self.path / "meta.json").read_text())
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format version: {meta['version']}")
+        self.meta: Dict[str, Any] = meta
+        self.dim: int = meta["dim"]
+        pages, tokens = meta["pages"], meta["tokens"]
+        self.tokens = self._map("tokens.f16", TOKEN_DTYPE, (tokens, self.dim))
+        self.offsets = self._map("offsets.i64", np.dtype("<i8"), (pages + 1,))
+        self.collections = self._map("collections.i32", np.dtype("<i4"), (pages,))
+        self.rows = self._map("rows.i64", np.dtype("<i8"), (pages + 1,))
+        self.scorer = MaxSimScorer.from_flat(self.tokens, self.offsets, self.block_size)
+
+    def __len__(self) -> int:
+        return self.meta["pages"]
+
+    def add(
+        self,
+        document_name: str,
+        pages: Sequence[np.ndarray],
+        collection_name: str = "default_collection",
+        document_id: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        images: Optional[Sequence[str]] = None,
+        page_numbers: Optional[Sequence[int]] = None,
+    ) -> None:
+        """
+        Appends the pages of a document.
+
+        Args:
+            document_name: The name of the document.
+            pages: One `(tokens, dim)` array per page, e.g. an `EmbeddingArrays`.
+            collection_name: The collection of the document. Defaults to "default_collection".
+            document_id: The document id returned in results (optional). Defaults to a running
+                number.
+            metadata: The document metadata returned in results (optional).
+            images: The base64 image of every page, returned in results (optional).
+            page_numbers: The page number of every page (optional). Defaults to 1, 2, ...
+
+        Raises:
+            ValueError: If the pages do not have the dimension of the index, or `images` or
+                `page_numbers` do not match the number of pages.
+        """
+        arrays = [np.asarray(page) for page in pages]
+        dims = {array.shape[1] for array in arrays if len(array)}
+        dim = self.dim or next(iter(dims), 0)
+        if dims - {dim}:
+            raise ValueError(f"Pages must all have the embedding dimension {dim}.")
+        page_numbers = page_numbers or list(range(1, len(arrays) + 1))
+        for name, values in (("images", images), ("page_numbers", page_numbers)):
+            if values is not None and len(values) != len(arrays):
+                raise ValueError(f"{name} must have one entry per page.")
+
+        meta = dict(self.meta)
+        if collection_name not in meta["collections"]:
+            meta["collections"] = [*meta["collections"], collection_name]
+        collection = meta["collections"].index(collection_name)
+        meta["documents"] += 1
+        if document_id is None:
+            document_id = meta["documents"]
+        lengths = np.array([len(array) for array in arrays], dtype="<i8")
+        offsets = (meta["tokens"] + np.cumsum(lengths)).astype("<i8")
+
+        rows = []
+        for page, page_number in enumerate(page_numbers):
+            row = {
+                "collection_name": collection_name,
+                "collection_id": collection + 1,
+                "document_name": document_name,
+                "document_id": document_id,
+                "document_metadata": metadata or {},
+                "page_number": page_number,
+                "img_base64": images[page] if images is not None else "",
+            }
+            rows.append(json.dumps(row, separators=(",", ":")).encode() + b"\n")
+        row_ends = int(self.rows[-1]) + np.cumsum([len(row) for row in rows])
+
+        self._append(
+            "tokens.f16",
+            self.tokens.nbytes,
+            [array.astype(TOKEN_DTYPE).tobytes() for array in arrays],
+        )
+        self._append("offsets.i64", self.offsets.nbytes, [offsets.tobytes()])
+        self._append(
+            "collections.i32",
+            self.collections.nbytes,
+            [np.full(len(arrays), collection, "<i4").tobytes()],
+        )
+        self._append("pages.jsonl", int(self.rows[-1]), rows)
+        self._append("rows.i64", self.rows.nbytes, [row_ends.astype("<i8").tobytes()])
+        meta.update(
+            dim=dim,
+            pages=meta["pages"] + len(arrays),
+            tokens=int(offsets[-1]) if len(arrays) else meta["tokens"],
+        )
+        self._write_meta(meta)
+        self.refresh()
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 3,
+        collection_name: str = "all",
+        query: str = "",
+    ) -> QueryOut:
+        """
+        Searches the index with one query embedding.
+
+        Args:
+            query_embedding: The `(tokens, dim)` query embedding, e.g. from `create_embedding`.
+            top_k: The number of pages to return. Defaults to 3.
+            collection_name: The collection to search, "all" searches every collection.
+            query: The query text, only echoed in the result (optional).
+
+        Returns:
+            A QueryOut like the one of `Colivara.search`. `raw_score` is the MaxSim score and
+            `normalized_score` the score divided by the number of query tokens.
+        """
+        return self.search_many([query_embedding], top_k, collection_name, [query])[0]
+
+    def search_many(
+        self,
+        query_embeddings: Sequence[np.ndarray],
+        top_k: int = 3,
+        collection_name: str = "all",
+        queries: Optional[Sequence[str]] = None,
+    ) -> List[QueryOut]:
+        """
+        Searches the index with several query embeddings, scored together.
+
+        Args:
+            query_embeddings: One `(tokens, dim)` array per query, e.g. an `EmbeddingArrays`.
+            top_k: The number of pages to return per query. Defaults to 3.
+            collection_name: The collection to search, "all" searches every collection.
+            queries: The query texts, only echoed in the results (optional).
+
+        Returns:
+            One QueryOut per query, see `search`.
+        """
+        if collection_name == "all":
+            pages = np.arange(len(self))
+        elif collection_name in self.meta["collections"]:
+            collection = self.meta["collections"].index(collection_name)
+            pages = np.flatnonzero(self.collections == collection)
+        else:
+            pages = np.arange(0)
+        indices, scores = top_k_scores(
+            self.scorer.score(query_embeddings, pages), top_k
+        )
+        queries = queries or [""] * len(query_embeddings)
+        results = []
+        with open(self.path / "pages.jsonl", "rb") as file:
+            for query, embedding, row_indices, row_scores in zip(
+                queries, query_embeddings, indices, scores
+            ):
+                query_tokens = max(1, len(embedding))
+                results.append(
+                    QueryOut(
+                        query=query,
+                        results=[
+                            PageOutQuery(
+                                **self._read_row(file, int(pages[index])),
+                                raw_score=float(score),
+                                normalized_score=float(score) / query_tokens,
+                            )
+                            for index, score in zip(row_indices, row_scores)
+                        ],
+                    )
+                )
+        return results
+
+    def _read_row(self, file: Any, page: int) -> Dict[str, Any]:
+        start, end = int(self.rows[page]), int(self.rows[page + 1])
+        file.seek(start)
+        return json.loads(file.read(end - start))
+
+    def _map(self, name: str, dtype: np.dtype, shape: tuple) -> np.ndarray:
+        if not np.prod(shape):
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self.path / name, dtype=dtype, mode="r", shape=shape)
+
+    def _append(self, name: str, size: int, chunks: Sequence[bytes]) -> None:
+        # drop whatever an interrupted add left behind the committed size
+        with open(self.path / name, "r+b") as file:
+            file.truncate(size)
+            file.seek(size)
+            for chunk in chunks:
+                file.write(chunk)
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        path = self.path / "meta.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, path)
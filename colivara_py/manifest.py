@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Union
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = ".colivara-sync.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+# the metadata key of the content fingerprint of documents upserted with fingerprint=True
+FINGERPRINT_KEY = "colivara_sha256"
+
+
+class FileEntry(NamedTuple):
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+class SyncManifest:
+    """
+    The files of a directory last uploaded to a collection, see `Colivara.sync_directory`.
+
+    Maps the path of every file, relative to the directory and with `/` separators, to its
+    size, modification time and SHA-256 digest. A file whose size and modification time are
+    unchanged is not read again, a file whose digest is unchanged is not uploaded again.
+    The manifest is a JSON file replaced atomically by `save`. A missing or unreadable file,
+    or one written for another collection, loads as an empty manifest, so the next sync
+    uploads everything again.
+
+    Example:
+        manifest = SyncManifest.load("drive/.colivara-sync.json", "reports")
+        entry = manifest.files.get("q1/report.pdf")
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        collection_name: str,
+        files: Optional[Dict[str, FileEntry]] = None,
+    ):
+        self.path = Path(path)
+        self.collection_name = collection_name
+        self.files: Dict[str, FileEntry] = files if files is not None else {}
+
+    @classmethod
+    def load(cls, path: Union[str, Path], collection_name: str) -> "SyncManifest":
+        """
+        Reads the manifest at `path`, or returns an empty one.
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if (
+                data.get("version") != FORMAT_VERSION
+                or data.get("collection_name") != collection_name
+            ):
+                return cls(path, collection_name)
+            files = {
+                name: FileEntry(*entry) for name, entry in data.get("files", {}).items()
+            }
+        except (OSError, ValueError, TypeError, AttributeError):
+            return cls(path, collection_name)
+        return cls(path, collection_name, files)
+
+    def save(self) -> None:
+        """
+        Writes the manifest to a temporary file and renames it over `path`.
+        """
+        data = {
+            "version": FORMAT_VERSION,
+            "collection_name": self.collection_name,
+            "files": {name: list(entry) for name, entry in sorted(self.files.items())},
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    """
+    Returns the hex SHA-256 digest of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
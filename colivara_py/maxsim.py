@@ -0,0 +1,226 @@
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    from numpy.typing import DTypeLike
+except ImportError:
+    raise ImportError(
+        "colivara_py.maxsim needs numpy, install it with `pip install colivara-py[numpy]`."
+    )
+
+
+class MaxSimScorer:
+    """
+    Scores multi-vector queries against multi-vector pages with late interaction (MaxSim).
+
+    The score of a page is the sum over the query tokens of their best dot product with any
+    token of the page, as in ColBERT and ColPali. All page tokens are kept in one contiguous
+    `(tokens, dim)` matrix with the offsets of each page, so scoring is one matrix product per
+    chunk of pages followed by a per-page maximum, and no Python loop runs over pages.
+
+    The products are computed in chunks of whole pages holding at most `block_size` query x page
+    token pairs, which bounds the scratch memory whatever the number of pages. A scorer is
+    read-only after construction and can be shared between threads, NumPy releases the GIL
+    during the matrix products.
+
+    Example:
+        pages = client.create_embedding(images, task="image", as_arrays=True)
+        scorer = MaxSimScorer(pages)
+        queries = client.create_embedding(["a cat", "a dog"], as_arrays=True)
+        indices, scores = scorer.search(queries, top_k=5)
+    """
+
+    def __init__(
+        self,
+        pages: Iterable[np.ndarray],
+        dtype: DTypeLike = np.float32,
+        block_size: int = 2**20,
+    ):
+        """
+        Args:
+            pages: One `(tokens, dim)` array per page, e.g. an `EmbeddingArrays`.
+            dtype: The dtype the page tokens are stored in (optional). float16 halves the
+                memory, chunks are still scored in float32.
+            block_size: The maximum number of query x page token similarities computed at
+                once (optional). Defaults to 2**20, 4 MiB of float32, which keeps the products
+                cache friendly.
+
+        Raises:
+            ValueError: If the pages do not share one embedding dimension.
+        """
+        self.dtype = dtype
+        self._store(pages, block_size)
+
+    def _store(self, pages: Iterable[np.ndarray], block_size: int) -> None:
+        # stores the pages one by one, so subclasses can encode them without a full copy
+        pages = [np.asarray(page) for page in pages]
+        dims = {page.shape[1] for page in pages if len(page)}
+        if len(dims) > 1:
+            raise ValueError(f"Pages have different embedding dimensions: {dims}")
+        self.dim = dims.pop() if dims else 0
+        self.offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+        np.cumsum([len(page) for page in pages], out=self.offsets[1:])
+        self.block_size = block_size
+        self._allocate(int(self.offsets[-1]))
+        for page, start, end in zip(pages, self.offsets, self.offsets[1:]):
+            if end > start:
+                self._encode(page, slice(start, end))
+
+    def _allocate(self, tokens: int) -> None:
+        self.tokens = np.empty((tokens, self.dim), dtype=self.dtype)
+
+    def _encode(self, page: np.ndarray, rows: slice) -> None:
+        self.tokens[rows] = page
+
+    def _encode_queries(self, query_tokens: np.ndarray) -> Any:
+        return query_tokens
+
+    def _similarities(self, queries: Any, rows: Union[slice, np.ndarray]) -> np.ndarray:
+        # (query tokens, page tokens) similarities of the given page tokens
+        block = self.tokens[rows]
+        if block.dtype not in (np.float32, np.float64):
+            block = block.astype(np.float32)
+        return queries @ block.T
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The memory taken by the stored page tokens and offsets.
+        """
+        return self.tokens.nbytes + self.offsets.nbytes
+
+    @classmethod
+    def from_flat(
+        cls, tokens: np.ndarray, offsets: np.ndarray, block_size: int = 2**20
+    ) -> "MaxSimScorer":
+        """
+        Wraps an existing token matrix without copying it, e.g. a memory-mapped one.
+
+        Args:
+            tokens: The `(tokens, dim)` matrix of all pages, one page after the other.
+            offsets: The `pages + 1` offsets of the pages in `tokens`, starting with 0.
+            block_size: See the constructor (optional).
+        """
+        scorer = cls.__new__(cls)
+        scorer.tokens = tokens
+        scorer.offsets = np.asarray(offsets, dtype=np.int64)
+        scorer.dim = tokens.shape[1]
+        scorer.dtype = tokens.dtype
+        scorer.block_size = block_size
+        return scorer
+
+    def score(
+        self, queries: Sequence[np.ndarray], pages: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Scores every query against every page.
+
+        Args:
+            queries: One `(tokens, dim)` array per query, e.g. an `EmbeddingArrays`.
+            pages: The indices of the pages to score (optional). Defaults to all pages.
+
+        Returns:
+            A float32 `(queries, pages)` array of MaxSim scores, the columns in the order of
+            `pages`. Pages without tokens score 0.
+
+        Raises:
+            ValueError: If the queries do not have the dimension of the pages.
+        """
+        if pages is None:
+            pages = np.arange(len(self))
+        pages = np.asarray(pages, dtype=np.int64)
+        lengths = self.offsets[pages + 1] - self.offsets[pages]
+        # pages and queries without tokens would break reduceat, they keep a score of 0
+        columns = np.flatnonzero(lengths)
+        if not len(columns):
+            return np.zeros((len(queries), len(pages)), dtype=np.float32)
+        query_tokens, query_offsets = _flatten(queries, self.dim)
+        scores = np.zeros((len(query_offsets) - 1, len(pages)), dtype=np.float32)
+        rows = np.flatnonzero(np.diff(query_offsets))
+        if not len(rows):
+            return scores
+        query_starts = query_offsets[rows]
+        encoded = self._encode_queries(query_tokens)
+        for chunk in self._chunks(lengths[columns], len(query_tokens)):
+            token_rows, starts = self._token_rows(pages[columns[chunk]])
+            similarities = self._similarities(encoded, token_rows)
+            best = np.maximum.reduceat(similarities, starts, axis=1)
+            scores[np.ix_(rows, columns[chunk])] = np.add.reduceat(
+                best, query_starts, axis=0
+            )
+        return scores
+
+    def search(
+        self, queries: Sequence[np.ndarray], top_k: int = 3
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ranks the pages for every query.
+
+        Args:
+            queries: One `(tokens, dim)` array per query, e.g. an `EmbeddingArrays`.
+            top_k: The number of pages to return per query. Defaults to 3.
+
+        Returns:
+            The page indices and their scores, both `(queries, min(top_k, pages))` arrays
+            ordered from the best page down.
+        """
+        return top_k_scores(self.score(queries), top_k)
+
+    def _chunks(self, lengths: np.ndarray, query_tokens: int) -> Iterator[slice]:
+        # whole pages with at most block_size similarities, but always at least one page
+        budget = max(1, self.block_size // max(1, query_tokens))
+        ends = np.cumsum(lengths)
+        first = 0
+        while first < len(lengths):
+            limit = ends[first] - lengths[first] + budget
+            last = max(first + 1, int(np.searchsorted(ends, limit, side="right")))
+            yield slice(first, last)
+            first = last
+
+    def _token_rows(
+        self, pages: np.ndarray
+    ) -> Tuple[Union[slice, np.ndarray], np.ndarray]:
+        # the token rows of the pages and where each page starts in them
+        starts, ends = self.offsets[pages], self.offsets[pages + 1]
+        lengths = ends - starts
+        local = np.cumsum(lengths) - lengths
+        if np.array_equal(starts[1:], ends[:-1]):
+            # consecutive pages, a view (or a single read from a memory map)
+            return slice(starts[0], ends[-1]), local
+        rows = np.repeat(starts - local, lengths) + np.arange(local[-1] + lengths[-1])
+        return rows, local
+
+
+def top_k_scores(scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the indices and values of the `top_k` highest scores of every row, best first.
+    """
+    top_k = min(top_k, scores.shape[1])
+    if top_k < scores.shape[1]:
+        candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    indices = np.take_along_axis(candidates, order, axis=1)
+    return indices, np.take_along_axis(candidate_scores, order, axis=1)
+
+
+def _flatten(arrays: Sequence[np.ndarray], dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    arrays = [np.asarray(array) for array in arrays]
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum([len(array) for array in arrays], out=offsets[1:])
+    parts: List[np.ndarray] = [array for array in arrays if len(array)]
+    if any(part.shape[1] != dim for part in parts):
+        raise ValueError(
+            f"Queries must have the embedding dimension of the pages: {dim}"
+        )
+    tokens = (
+        np.concatenate(parts).astype(np.float32, copy=False)
+        if parts
+        else np.empty((0, dim), dtype=np.float32)
+    )
+    return tokens, offsets
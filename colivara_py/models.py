@@ -1,5 +1,14 @@
-from typing import Optional, List, Union
-from pydantic import BaseModel, model_validator, Field
+import base64
+from pathlib import Path
+from typing import Dict, Optional, List, Union
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    PrivateAttr,
+    SkipValidation,
+    model_validator,
+    Field,
+)
 from typing_extensions import Self
 from enum import Enum
 
@@ -65,9 +74,34 @@ class DocumentIn(BaseModel):
         return self
 
 
-class PageOut(BaseModel):
+class PageImage(BaseModel):
+    # kept as the raw payload string; decoded on first use by image_bytes()
+    img_base64: SkipValidation[str]
+    _image_bytes: Optional[bytes] = PrivateAttr(default=None)
+
+    def image_bytes(self) -> bytes:
+        """
+        Returns the decoded page image. The result is cached on the object.
+        """
+        if self._image_bytes is None:
+            data = self.img_base64
+            # accept data URLs, e.g. "data:image/png;base64,iVBOR..."
+            if data.startswith("data:"):
+                data = data.partition(",")[2]
+            self._image_bytes = base64.b64decode(data)
+        return self._image_bytes
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Writes the decoded page image to `path` and returns the path.
+        """
+        path = Path(path)
+        path.write_bytes(self.image_bytes())
+        return path
+
+
+class PageOut(PageImage):
     document_name: Optional[str] = None
-    img_base64: str
     page_number: int
 
 
@@ -82,6 +116,32 @@ class DocumentOut(BaseModel):
     pages: Optional[List[PageOut]] = None
 
 
+class DocumentUpsertResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str
+    document: Optional[Union[DocumentOut, GenericMessage]] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class DirectorySyncResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    uploaded: List[str] = Field(default_factory=list)
+    renamed: Dict[str, str] = Field(default_factory=dict)
+    deleted: List[str] = Field(default_factory=list)
+    unchanged: int = 0
+    errors: Dict[str, BaseException] = Field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
 class DocumentInPatch(BaseModel):
     name: Optional[str] = None
     metadata: Optional[dict] = Field(default_factory=dict)
@@ -152,7 +212,7 @@ class QueryIn(BaseModel):
     query_filter: Optional[QueryFilter] = None
 
 
-class PageOutQuery(BaseModel):
+class PageOutQuery(PageImage):
     collection_name: str
     collection_id: int
     collection_metadata: Optional[dict] = {}
@@ -162,7 +222,6 @@ class PageOutQuery(BaseModel):
     page_number: int
     raw_score: float
     normalized_score: float
-    img_base64: str
 
 
 class QueryOut(BaseModel):
@@ -170,8 +229,20 @@ class QueryOut(BaseModel):
     results: List[PageOutQuery]
 
 
-class FileOut(BaseModel):
-    img_base64: str
+class SearchResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: int
+    query: str
+    result: Optional[QueryOut] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class FileOut(PageImage):
     page_number: int
 
 
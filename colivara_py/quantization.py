@@ -0,0 +1,282 @@
+from typing import Any, Iterable, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError(
+        "colivara_py.quantization needs numpy, install it with `pip install colivara-py[numpy]`."
+    )
+
+from .maxsim import MaxSimScorer, top_k_scores
+
+# pages are encoded in row chunks of this many tokens, which bounds the scratch memory
+ENCODE_ROWS = 2**16
+# kmeans seeds at most this many centroids with k-means++
+KMEANS_PLUS_PLUS = 1024
+
+
+class Int8Scorer(MaxSimScorer):
+    """
+    A `MaxSimScorer` over int8 page tokens, a quarter of the float32 memory.
+
+    Every token is scaled by its largest absolute value, so each keeps its own scale and the
+    rounding error stays below 1/254 of it. Queries are scored in full precision against the
+    dequantized tokens.
+    """
+
+    def __init__(self, pages: Iterable[np.ndarray], block_size: int = 2**20):
+        """
+        Args:
+            pages: One `(tokens, dim)` array per page, e.g. an `EmbeddingArrays`.
+            block_size: See `MaxSimScorer` (optional).
+        """
+        self._store(pages, block_size)
+
+    def _allocate(self, tokens: int) -> None:
+        self.codes = np.empty((tokens, self.dim), dtype=np.int8)
+        self.scales = np.empty(tokens, dtype=np.float32)
+
+    def _encode(self, page: np.ndarray, rows: slice) -> None:
+        page = np.asarray(page, dtype=np.float32)
+        scales = np.abs(page).max(axis=1) / 127
+        scales[scales == 0] = 1
+        self.codes[rows] = np.rint(page / scales[:, None])
+        self.scales[rows] = scales
+
+    def _similarities(self, queries: Any, rows: Union[slice, np.ndarray]) -> np.ndarray:
+        return (queries @ self.codes[rows].astype(np.float32).T) * self.scales[rows]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes + self.offsets.nbytes
+
+
+class BinaryScorer(MaxSimScorer):
+    """
+    A `MaxSimScorer` over 1-bit page tokens, a 32nd of the float32 memory.
+
+    Tokens and queries keep the sign of every dimension, packed into bits. The similarity of
+    two tokens is the number of equal signs minus the number of different ones,
+    `dim - 2 * hamming distance`. That is the dot product of their +1/-1 sign vectors, so each
+    chunk is unpacked and scored with one matrix product, which NumPy runs several times
+    faster than XOR and popcount. It is cheap but coarse, use it to pick candidates for
+    `rescored_search`.
+    """
+
+    def __init__(self, pages: Iterable[np.ndarray], block_size: int = 2**20):
+        """
+        Args:
+            pages: One `(tokens, dim)` array per page, e.g. an `EmbeddingArrays`.
+            block_size: See `MaxSimScorer` (optional).
+        """
+        self._store(pages, block_size)
+
+    def _allocate(self, tokens: int) -> None:
+        self.bits = np.empty((tokens, -(-self.dim // 8)), dtype=np.uint8)
+
+    def _encode(self, page: np.ndarray, rows: slice) -> None:
+        self.bits[rows] = np.packbits(np.asarray(page) > 0, axis=1)
+
+    def _encode_queries(self, query_tokens: np.ndarray) -> Any:
+        return np.where(query_tokens > 0, 1, -1).astype(np.float32)
+
+    def _similarities(self, queries: Any, rows: Union[slice, np.ndarray]) -> np.ndarray:
+        signs = np.unpackbits(self.bits[rows], axis=1, count=self.dim)
+        return queries @ (signs.astype(np.float32) * 2 - 1).T
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes + self.offsets.nbytes
+
+
+class PQScorer(MaxSimScorer):
+    """
+    A `MaxSimScorer` over product-quantized page tokens.
+
+    Each token is split into `subspaces` slices, and every slice is replaced by the index of
+    its nearest of 256 centroids learned by k-means, one byte per slice. With 16 subspaces a
+    128-dimensional token takes 16 bytes, a 32nd of float32. Queries are scored in full
+    precision against the centroids: each chunk of tokens is rebuilt from its centroids and
+    scored with one matrix product, which gives the scores of per-query lookup tables at the
+    speed of BLAS.
+    """
+
+    def __init__(
+        self,
+        pages: Sequence[np.ndarray],
+        subspaces: int = 16,
+        iterations: int = 20,
+        sample_size: int = 2**14,
+        seed: int = 0,
+        block_size: int = 2**20,
+    ):
+        """
+        Args:
+            pages: One `(tokens, dim)` array per page, e.g. an `EmbeddingArrays`.
+            subspaces: The number of slices, and bytes, per token. Must divide the dimension.
+            iterations: The k-means iterations when learning the centroids (optional).
+            sample_size: The number of tokens the centroids are learned from (optional).
+            seed: The random seed of the sampling and of k-means (optional).
+            block_size: See `MaxSimScorer` (optional).
+
+        Raises:
+            ValueError: If `subspaces` does not divide the embedding dimension.
+        """
+        sample = _sample_tokens(pages, sample_size, np.random.default_rng(seed))
+        if sample.shape[1] % subspaces:
+            raise ValueError(
+                f"subspaces ({subspaces}) must divide the embedding dimension ({sample.shape[1]})."
+            )
+        self.subspaces = subspaces
+        slices = sample.reshape(len(sample), subspaces, -1)
+        self.centroids = np.stack(
+            [
+                kmeans(slices[:, space], 256, iterations, seed)
+                for space in range(subspaces)
+            ]
+        )
+        self._store(pages, block_size)
+
+    def _allocate(self, tokens: int) -> None:
+        self.codes = np.empty((tokens, self.subspaces), dtype=np.uint8)
+
+    def _encode(self, page: np.ndarray, rows: slice) -> None:
+        slices = np.asarray(page, dtype=np.float32).reshape(
+            len(page), self.subspaces, -1
+        )
+        for space, centroids in enumerate(self.centroids):
+            self.codes[rows, space] = _nearest(slices[:, space], centroids)
+
+    def _similarities(self, queries: Any, rows: Union[slice, np.ndarray]) -> np.ndarray:
+        codes = self.codes[rows]
+        tokens = self.centroids[np.arange(self.subspaces), codes].reshape(
+            len(codes), -1
+        )
+        return queries @ tokens.T
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.centroids.nbytes + self.offsets.nbytes
+
+
+def rescored_search(
+    candidates: MaxSimScorer,
+    exact: MaxSimScorer,
+    queries: Sequence[np.ndarray],
+    top_k: int = 3,
+    candidate_count: int = 100,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Two-stage search: candidates from a compressed scorer, rescored in full precision.
+
+    Args:
+        candidates: A scorer over compressed tokens, e.g. a `BinaryScorer`.
+        exact: A scorer over the same pages in full precision, e.g. the memory-mapped
+            `LocalIndex.scorer`. Only the candidate pages are read from it.
+        queries: One `(tokens, dim)` array per query, e.g. an `EmbeddingArrays`.
+        top_k: The number of pages to return per query. Defaults to 3.
+        candidate_count: The number of candidates per query to rescore. Defaults to 100.
+
+    Returns:
+        The page indices and their exact scores, like `MaxSimScorer.search`.
+    """
+    queries = list(queries)
+    pool, _ = candidates.search(queries, max(top_k, candidate_count))
+    top_k = min(top_k, pool.shape[1])
+    indices = np.empty((len(queries), top_k), dtype=np.int64)
+    scores = np.empty((len(queries), top_k), dtype=np.float32)
+    for row, (query, pages) in enumerate(zip(queries, pool)):
+        best, best_scores = top_k_scores(exact.score([query], pages), top_k)
+        indices[row], scores[row] = pages[best[0]], best_scores[0]
+    return indices, scores
+
+
+def kmeans(
+    points: np.ndarray, k: int, iterations: int = 20, seed: int = 0
+) -> np.ndarray:
+    """
+    Returns `min(k, len(points))` centroids of the points, by Lloyd's k-means.
+
+    Up to `KMEANS_PLUS_PLUS` centroids are seeded with k-means++, each next seed drawn with a
+    probability proportional to its squared distance to the nearest seed so far. That takes a
+    pass over the points per seed, so more centroids start from distinct random points. A
+    centroid that loses all its points is moved to a random point.
+    """
+    rng = np.random.default_rng(seed)
+    points = np.asarray(points, dtype=np.float32)
+    k = min(k, len(points))
+    if k <= KMEANS_PLUS_PLUS:
+        centroids = _seed_centroids(points, k, rng)
+    else:
+        centroids = points[rng.choice(len(points), k, replace=False)]
+    for _ in range(iterations):
+        means, counts = _cluster_means(points, _nearest(points, centroids), k)
+        empty = counts == 0
+        centroids[~empty] = means[~empty]
+        centroids[empty] = points[rng.choice(len(points), int(empty.sum()))]
+    return centroids
+
+
+def _seed_centroids(points: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    # squared distances from |p - c|^2 = |p|^2 - 2 p.c + |c|^2, one matrix-vector product each
+    norms = np.einsum("ij,ij->i", points, points)
+    chosen = [int(rng.integers(len(points)))]
+    distances = np.full(len(points), np.inf, dtype=np.float32)
+    for _ in range(k - 1):
+        seed = points[chosen[-1]]
+        np.minimum(
+            distances, norms - 2 * (points @ seed) + norms[chosen[-1]], out=distances
+        )
+        cumulative = np.cumsum(np.maximum(distances, 0))
+        if cumulative[-1] > 0:
+            pick = np.searchsorted(
+                cumulative, rng.random() * cumulative[-1], side="right"
+            )
+            chosen.append(min(int(pick), len(points) - 1))
+        else:
+            # every point is on a seed already
+            chosen.append(int(rng.integers(len(points))))
+    return points[chosen].copy()
+
+
+def _cluster_means(
+    points: np.ndarray, assignment: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    # sorting by cluster turns the per-cluster sums into one reduceat
+    counts = np.bincount(assignment, minlength=k)
+    means = np.zeros((k, points.shape[1]), dtype=np.float32)
+    filled = counts > 0
+    starts = (np.cumsum(counts) - counts)[filled]
+    sums = np.add.reduceat(
+        points[np.argsort(assignment, kind="stable")], starts, axis=0
+    )
+    means[filled] = sums / counts[filled, None]
+    return means, counts
+
+
+def _nearest(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # argmin of |p - c|^2 = |p|^2 - 2 p.c + |c|^2, without the constant |p|^2,
+    # in chunks of at most ENCODE_ROWS x 256 distances
+    nearest = np.empty(len(points), dtype=np.int64)
+    norms = (centroids**2).sum(axis=1)
+    rows = max(1, ENCODE_ROWS * 256 // max(1, len(centroids)))
+    for start in range(0, len(points), rows):
+        chunk = points[start : start + rows]
+        nearest[start : start + len(chunk)] = np.argmin(
+            norms - 2 * chunk @ centroids.T, axis=1
+        )
+    return nearest
+
+
+def _sample_tokens(
+    pages: Sequence[np.ndarray], size: int, rng: np.random.Generator
+) -> np.ndarray:
+    pages = [np.asarray(page) for page in pages if len(page)]
+    if not pages:
+        raise ValueError("Cannot learn centroids without any tokens.")
+    offsets = np.cumsum([0] + [len(page) for page in pages])
+    picks = rng.choice(offsets[-1], min(size, offsets[-1]), replace=False)
+    owners = np.searchsorted(offsets, picks, side="right") - 1
+    return np.stack(
+        [pages[owner][pick - offsets[owner]] for owner, pick in zip(owners, picks)]
+    ).astype(np.float32)
@@ -0,0 +1,62 @@
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+import requests
+from pydantic import BaseModel, Field
+
+
+class RetryPolicy(BaseModel):
+    """
+    When and how long to wait before re-sending a failed request.
+
+    Only calls that are safe to repeat (reads, search, embeddings, upserts, deletes and patches
+    that do not rename) are retried, on connection errors and on the statuses in
+    `retry_statuses`. A delete answered with 404 after a retry counts as done. An upsert that
+    waits for processing is only retried on 429 and 503 and when the connection could not be
+    opened, since after a timeout, a dropped connection or another status the server may still
+    be processing it. The n-th retry waits a random
+    time between 0 and `backoff_factor * 2 ** (n - 1)` seconds, capped at `max_backoff`, unless
+    the response carries a `Retry-After` header, which is honored instead. A `Retry-After`
+    longer than `max_backoff` ends the retries and returns the response to the caller.
+    """
+
+    max_attempts: int = Field(3, ge=1)
+    backoff_factor: float = Field(0.5, ge=0)
+    max_backoff: float = Field(30.0, ge=0)
+    jitter: bool = True
+    retry_statuses: Tuple[int, ...] = (429, 502, 503, 504)
+    respect_retry_after: bool = True
+
+    def backoff(self, retry: int) -> float:
+        delay = min(self.backoff_factor * 2 ** (retry - 1), self.max_backoff)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def delay(self, retry: int, response: requests.Response) -> Optional[float]:
+        """
+        Returns the seconds to wait before the given retry, or None if it should not happen.
+        """
+        if response.status_code not in self.retry_statuses:
+            return None
+        if self.respect_retry_after:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_backoff else None
+        return self.backoff(retry)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,245 @@
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .events import RequestEvent
+
+# Latencies are counted in microseconds, exactly below 2 * 2**_SUB_BUCKET_BITS and in
+# buckets 1 / 2**_SUB_BUCKET_BITS of their value wide above, like an HDR histogram.
+_SUB_BUCKET_BITS = 7
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class LatencyHistogram:
+    """
+    A histogram of latencies whose buckets are a constant fraction of their value wide.
+
+    Latencies are counted in microseconds, exactly up to 256us and within 1/128 (0.8%)
+    above that, like an HDR histogram with two significant digits. Recording is a single
+    increment whatever the range, from microseconds to hours, and percentiles are read
+    from the counts without keeping the samples.
+    """
+
+    def __init__(self) -> None:
+        self.counts: List[int] = []
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """
+        Counts a latency of `seconds`.
+        """
+        index = _index(max(int(seconds * 1e6), 0))
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, quantile: float) -> float:
+        """
+        Returns the latency in seconds that `quantile` (between 0 and 1) of the recorded
+        latencies do not exceed, or 0.0 if none were recorded.
+        """
+        rank = max(quantile * self.count, 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_highest(index) / 1e6, self.max)
+        return 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+def _index(value: int) -> int:
+    shift = value.bit_length() - _SUB_BUCKET_BITS - 1
+    if shift <= 0:
+        return value
+    return (shift << _SUB_BUCKET_BITS) + (value >> shift)
+
+
+def _highest(index: int) -> int:
+    # the largest value counted in the bucket at `index`
+    shift = max((index >> _SUB_BUCKET_BITS) - 1, 0)
+    return ((index - (shift << _SUB_BUCKET_BITS) + 1) << shift) - 1
+
+
+class EndpointStats(NamedTuple):
+    method: str
+    endpoint: str
+    requests: int
+    errors: int
+    error_rate: float
+    bytes_sent: int
+    bytes_received: int
+    bytes_per_second: float
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    p999: float
+    max: float
+
+
+class _Endpoint:
+    __slots__ = ("latency", "errors", "bytes_sent", "bytes_received")
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+class RequestStats:
+    """
+    Thread-safe per-endpoint statistics of the requests of the clients it is given to.
+
+    Every "request_end" event adds its latency (`RequestEvent.elapsed`, including the
+    retries) to a `LatencyHistogram` of its method and endpoint, along with the body sizes
+    and whether it failed, with a connection error or a 4xx/5xx status. `snapshot()`
+    reports them as `EndpointStats`, and `prometheus()` in the Prometheus text format.
+    Rates are per second since the statistics were created or `reset()`.
+
+    Example:
+        client = Colivara(request_stats=RequestStats())
+        client.search("what is 1+1?")
+        print(client.stats()["POST /v1/search/"].p99)
+    """
+
+    def __init__(self) -> None:
+        self._endpoints: Dict[Tuple[str, str], _Endpoint] = {}
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+
+    def __call__(self, event: RequestEvent) -> None:
+        key = (event.method, event.endpoint)
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = _Endpoint()
+            stats.latency.record(event.elapsed)
+            if event.error is not None or (event.status or 0) >= 400:
+                stats.errors += 1
+            stats.bytes_sent += event.bytes_sent or 0
+            stats.bytes_received += event.bytes_received or 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+            self.started = time.monotonic()
+
+    def snapshot(self) -> Dict[str, EndpointStats]:
+        """
+        Returns the statistics of every endpoint requested so far, keyed by method and
+        endpoint, e.g. "POST /v1/documents/upsert-document/".
+        """
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            return {
+                f"{method} {endpoint}": _snapshot(method, endpoint, stats, elapsed)
+                for (method, endpoint), stats in sorted(self._endpoints.items())
+            }
+
+    def prometheus(self, namespace: str = "colivara") -> str:
+        """
+        Returns the statistics in the Prometheus text exposition format: a summary of the
+        latencies and counters of the errors and the bytes sent and received, labeled by
+        method and endpoint.
+        """
+        lines: List[str] = []
+        rows = [
+            (
+                f'method="{_escape(stats.method)}",endpoint="{_escape(stats.endpoint)}"',
+                stats,
+            )
+            for stats in self.snapshot().values()
+        ]
+
+        def metric(
+            name: str,
+            type_: str,
+            help_: str,
+            samples: Sequence[Tuple[str, str, object]],
+        ) -> None:
+            lines.append(f"# HELP {namespace}_{name} {help_}")
+            lines.append(f"# TYPE {namespace}_{name} {type_}")
+            for suffix, labels, value in samples:
+                lines.append(f"{namespace}_{name}{suffix}{{{labels}}} {value}")
+
+        metric(
+            "request_duration_seconds",
+            "summary",
+            "Latency of the API requests, including retries.",
+            [
+                ("", f'{labels},quantile="{quantile}"', value)
+                for labels, stats in rows
+                for quantile, value in zip(
+                    QUANTILES, (stats.p50, stats.p90, stats.p99, stats.p999)
+                )
+            ]
+            + [("_sum", labels, stats.mean * stats.requests) for labels, stats in rows]
+            + [("_count", labels, stats.requests) for labels, stats in rows],
+        )
+        for name, help_, field in (
+            ("request_errors_total", "API requests that failed.", "errors"),
+            ("sent_bytes_total", "Bytes of request bodies sent.", "bytes_sent"),
+            (
+                "received_bytes_total",
+                "Bytes of response bodies received.",
+                "bytes_received",
+            ),
+        ):
+            metric(
+                name,
+                "counter",
+                help_,
+                [("", labels, getattr(stats, field)) for labels, stats in rows],
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _snapshot(
+    method: str, endpoint: str, stats: _Endpoint, elapsed: float
+) -> EndpointStats:
+    latency = stats.latency
+    p50, p90, p99, p999 = (latency.percentile(quantile) for quantile in QUANTILES)
+    return EndpointStats(
+        method,
+        endpoint,
+        latency.count,
+        stats.errors,
+        stats.errors / latency.count,
+        stats.bytes_sent,
+        stats.bytes_received,
+        (stats.bytes_sent + stats.bytes_received) / elapsed,
+        latency.mean,
+        p50,
+        p90,
+        p99,
+        p999,
+        latency.max,
+    )
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def check_request_stats(request_stats: Optional[RequestStats]) -> RequestStats:
+    """
+    Returns `request_stats`.
+
+    Raises:
+        ValueError: If the client does not collect request statistics.
+    """
+    if request_stats is None:
+        raise ValueError(
+            "Request statistics are not collected, pass request_stats=RequestStats() to the client."
+        )
+    return request_stats
@@ -0,0 +1,290 @@
+import base64
+import io
+import json
+import os
+import re
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Pattern, Tuple, Union
+
+# must be a multiple of 3 so that chunks encode without padding in between
+CHUNK_SIZE = 3 * 16 * 1024
+
+DocumentSource = Union[str, Path, bytes, bytearray, memoryview, IO[bytes]]
+
+# a complete JSON string without runs of more than 256 plain characters, longer strings fail
+# after a bounded backtrack and are scanned with memchr instead
+_STRING = rb'"[^"\\]{0,256}(?:\\.[^"\\]{0,256})*"'
+# everything up to the next bracket outside strings, matched at C speed
+_SEGMENT = re.compile(rb'(?:[^"\[\]{}]+|' + _STRING + rb")*")
+_STRUCTURE = re.compile(rb'[\[\]{}",]')
+_VALUE_START = re.compile(rb"\s*(\S)")
+# unterminated strings shorter than this are carried over to the next chunk, they may be keys
+_CARRY = 256
+
+
+class Base64JSONBody:
+    """
+    A JSON request body whose base64 field is encoded from a binary source on the fly.
+
+    Iterating the body yields the JSON prefix, the base64 text in `CHUNK_SIZE` pieces and the
+    closing suffix, so neither the raw document, its base64 string nor the JSON body is ever
+    held in memory as a whole. When the source size is known, `len` is set and the request is
+    sent with a Content-Length, otherwise with chunked transfer encoding.
+
+    Sources are paths, bytes-like objects or binary file objects. Paths, bytes and seekable
+    files can be iterated more than once, which makes the body safe to re-send.
+    """
+
+    def __init__(self, fields: Dict[str, Any], source: DocumentSource, key: str):
+        self.source = source
+        self.prefix = _json_prefix(fields, key)
+        self.suffix = b'"}'
+        self.start: Optional[int] = None
+        if isinstance(source, (str, Path)):
+            size: Optional[int] = os.path.getsize(source)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            size = memoryview(source).nbytes
+        else:
+            size = _remaining_size(source)
+            if size is not None:
+                self.start = source.tell()
+        if size is not None:
+            # read by requests to set the Content-Length header
+            self.len = len(self.prefix) + _encoded_size(size) + len(self.suffix)
+
+    @property
+    def resendable(self) -> bool:
+        return not _is_file(self.source) or self.start is not None
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.prefix
+        if isinstance(self.source, (str, Path)):
+            with open(self.source, "rb") as file:
+                yield from _encode_file(file)
+        elif isinstance(self.source, (bytes, bytearray, memoryview)):
+            view = memoryview(self.source).cast("B")
+            for offset in range(0, len(view), CHUNK_SIZE):
+                yield base64.b64encode(view[offset : offset + CHUNK_SIZE])
+        else:
+            if self.start is not None:
+                self.source.seek(self.start)
+            yield from _encode_file(self.source)
+        yield self.suffix
+
+
+class JSONArrayItems:
+    """
+    Splits a JSON array of objects, fed in arbitrary chunks, into the raw bytes of its items.
+
+    `feed` returns the items completed by each chunk, so a streamed response can be parsed
+    one item at a time and only the current item is ever buffered. Only brackets are handled
+    in Python: the bytes in between, strings included, are skipped by a regex, and long
+    strings such as base64 images by memchr.
+
+    With `array_key`, the array is the value of that key in a JSON object instead, e.g.
+    `array_key="pages"` yields the pages of a document. The other fields of the object are
+    skipped, and a `null` value has no items.
+
+    With `skip_key`, the value of that key in every item is replaced by `null` while
+    scanning, e.g. `skip_key="pages"` drops the page images of documents without buffering
+    them.
+    """
+
+    def __init__(self, skip_key: Optional[str] = None, array_key: Optional[str] = None):
+        self.skip_key = skip_key
+        self.array_key = array_key
+        self._skip = _key_patterns(skip_key)
+        self._array = _key_patterns(array_key)
+        # the depth inside the array, where items start
+        self._top = 1 if array_key is None else 2
+        self.depth = 0
+        self.done = False
+        self.item = bytearray()
+        self._pending = b""
+        self._await_array = array_key is None
+        self._in_array = False
+        self._in_item = False
+        self._in_string = False
+        self._escaped = False
+        self._skipping = False
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """
+        Scans the next chunk and returns the items it completed.
+
+        Raises:
+            ValueError: If the input is not a JSON array, or `array_key` is not an array.
+        """
+        items: List[bytes] = []
+        data = self._pending + chunk if self._pending else chunk
+        self._pending = b""
+        # the start of the data that belongs to the current item and is not copied yet
+        copy_from: Optional[int] = 0 if self._in_item and not self._skipping else None
+        position = 0
+        while position < len(data) and not self.done:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                    position += 1
+                    continue
+                index = _string_end(data, position)
+                if index < 0:
+                    break
+                position = index + 1
+                self._escaped = data[index] == ord("\\")
+                self._in_string = self._escaped
+                continue
+            if self._await_array:
+                start = _VALUE_START.match(data, position)
+                if start is None:
+                    break
+                position = start.end()
+                self._await_array = False
+                if start.group(1) == b"[":
+                    self.depth += 1
+                    self._in_array = True
+                elif self.array_key is None or start.group(1) != b"n":
+                    raise ValueError(
+                        "Unexpected response format: expected a JSON array"
+                    )
+                else:
+                    self.done = True
+                continue
+            key_patterns = None
+            if self._in_array and self.depth == self._top + 1 and not self._skipping:
+                key_patterns = self._skip
+            elif not self._in_array and self.depth == 1:
+                key_patterns = self._array
+            if self._skipping and self.depth == self._top + 1:
+                # the skipped value ends at the next comma or brace of the item
+                match = _STRUCTURE.search(data, position)
+                if match is None:
+                    break
+                index = match.start()
+            else:
+                segment = key_patterns[1] if key_patterns else _SEGMENT
+                index = segment.match(data, position).end()  # type: ignore[union-attr]
+                if index == len(data):
+                    break
+            char = data[index : index + 1]
+            position = index + 1
+            if char == b'"':
+                key = key_patterns[0].match(data, index) if key_patterns else None
+                if key and self._in_array:
+                    self.item += data[copy_from : key.end()] + b"null"
+                    copy_from = None
+                    self._skipping = True
+                    position = key.end()
+                elif key:
+                    self._await_array = True
+                    position = key.end()
+                elif len(data) - index < _CARRY and not self._skipping:
+                    if copy_from is not None:
+                        self.item += data[copy_from:index]
+                        copy_from = None
+                    self._pending = data[index:]
+                    break
+                else:
+                    self._in_string = True
+            elif char == b",":
+                self._skipping = False
+                copy_from = index
+            elif char in b"{[":
+                self.depth += 1
+                if self._in_array and self.depth == self._top + 1:
+                    self._in_item = True
+                    copy_from = index
+            else:
+                if self._skipping and self.depth == self._top + 1:
+                    self._skipping = False
+                    copy_from = index
+                self.depth -= 1
+                if self._in_item and self.depth == self._top:
+                    self.item += data[copy_from:position]
+                    items.append(bytes(self.item))
+                    self.item = bytearray()
+                    self._in_item = False
+                    copy_from = None
+                elif self.depth == self._top - 1 if self._in_array else not self.depth:
+                    # the end of the array, or of an object without it
+                    self.done = True
+        if copy_from is not None:
+            self.item += data[copy_from:]
+        return items
+
+    def close(self) -> None:
+        """
+        Checks that the whole array was fed.
+
+        Raises:
+            ValueError: If the input ended before the closing bracket of the array.
+        """
+        if not self.done:
+            raise ValueError("Unexpected response format: incomplete JSON array")
+
+
+def _key_patterns(
+    key: Optional[str],
+) -> Optional[Tuple[Pattern[bytes], Pattern[bytes]]]:
+    # a regex for the key and a _SEGMENT that stops before it, or before what may be the key
+    # at the end of the chunk
+    if key is None:
+        return None
+    escaped = re.escape(json.dumps(key).encode()[1:-1])
+    return (
+        re.compile(rb'"' + escaped + rb'"\s*:'),
+        re.compile(
+            rb'(?:[^"\[\]{}]+|"(?!' + escaped + rb'"\s*(?::|\Z))' + _STRING[1:] + rb")*"
+        ),
+    )
+
+
+def _string_end(chunk: bytes, position: int) -> int:
+    # the next quote or backslash, found with memchr rather than a regex
+    quote = chunk.find(b'"', position)
+    backslash = chunk.find(b"\\", position, quote if quote >= 0 else len(chunk))
+    return backslash if backslash >= 0 else quote
+
+
+def _is_file(source: DocumentSource) -> bool:
+    return not isinstance(source, (str, Path, bytes, bytearray, memoryview))
+
+
+def _json_prefix(fields: Dict[str, Any], key: str) -> bytes:
+    # b'{"name":"doc"}' -> b'{"name":"doc","base64":"'
+    body = json.dumps(fields, separators=(",", ":")).encode("utf-8")
+    if body == b"{}":
+        return b'{"' + key.encode() + b'":"'
+    return body[:-1] + b',"' + key.encode() + b'":"'
+
+
+def _encoded_size(size: int) -> int:
+    return 4 * ((size + 2) // 3)
+
+
+def _remaining_size(file: IO[bytes]) -> Optional[int]:
+    try:
+        if not file.seekable():
+            return None
+        position = file.tell()
+        end = file.seek(0, io.SEEK_END)
+        file.seek(position)
+    except (AttributeError, OSError):
+        return None
+    return end - position
+
+
+def _encode_file(file: IO[bytes]) -> Iterator[bytes]:
+    buffer = b""
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer += chunk
+        # short reads from pipes or sockets must not break the 3-byte alignment
+        aligned = len(buffer) - len(buffer) % 3
+        if aligned:
+            yield base64.b64encode(buffer[:aligned])
+            buffer = buffer[aligned:]
+    if buffer:
+        yield base64.b64encode(buffer)
@@ -0,0 +1,518 @@
+"""
+A local stand-in for the ColiVara API, for tests and load tests without network access.
+
+    python -m colivara_py.stub_server --port 8001 --latency 0.05 --error-rate 0.01
+"""
+
+import argparse
+import base64
+import collections
+import heapq
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .events import endpoint
+
+Reply = Tuple[int, Any]
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class StubServer:
+    """
+    A local HTTP server that answers like the ColiVara API, for tests and benchmarks.
+
+    Collections and documents are kept in memory. Uploaded documents are "processed"
+    at once into `pages_per_document` pages, all showing the same synthetic image of
+    `image_bytes` bytes, and searches return their pages ranked by a score derived from
+    the query. Embeddings have `embedding_tokens` vectors of `embedding_dim` floats per
+    input, the same for the same input.
+
+    Every response is delayed by `latency` seconds, and a share `error_rate` of the
+    requests fails with one of `error_statuses` instead, with a `Retry-After` header of
+    `retry_after` seconds if given. `fail_next` makes the next requests fail on purpose.
+    The requests received are counted per method and endpoint in `requests`, and the
+    size of their bodies in `bytes_received`.
+
+    Example:
+        with StubServer(latency=0.01) as server:
+            client = Colivara(base_url=server.url, api_key="test")
+            client.upsert_document("report.pdf", document_base64="JVBERi0=", wait=True)
+            client.search("what is 1+1?")
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (429, 503),
+        retry_after: Optional[float] = None,
+        image_bytes: int = 64 * 1024,
+        pages_per_document: int = 1,
+        embedding_dim: int = 128,
+        embedding_tokens: int = 32,
+        seed: int = 0,
+    ):
+        if not 0 <= error_rate <= 1:
+            raise ValueError("error_rate must be between 0 and 1.")
+        self.host = host
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.pages_per_document = pages_per_document
+        self.embedding_dim = embedding_dim
+        self.embedding_tokens = embedding_tokens
+        self.requests: "collections.Counter[str]" = collections.Counter()
+        self.bytes_received = 0
+        self.collections: Dict[str, Dict[str, Any]] = {}
+        self.documents: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._image = synthetic_image(image_bytes)
+        self._failures: Deque[int] = deque()
+        self._random = random.Random(seed)
+        self._ids = 0
+        self._lock = threading.Lock()
+        self._server = _HTTPServer((host, port), _Handler)
+        self._server.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        The base URL to give to the clients, e.g. "http://127.0.0.1:8001".
+        """
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def start(self) -> "StubServer":
+        """
+        Starts serving in a background thread.
+        """
+        if self._thread is None:
+            # a short poll interval keeps `stop` quick
+            self._thread = threading.Thread(
+                target=self._server.serve_forever,
+                kwargs={"poll_interval": 0.05},
+                daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops serving and closes the listening socket.
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def fail_next(self, status: int, count: int = 1) -> None:
+        """
+        Makes the next `count` requests fail with `status`, before any random errors.
+        """
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def add_document(
+        self,
+        name: str,
+        collection_name: str = "default collection",
+        metadata: Optional[Dict[str, Any]] = None,
+        num_pages: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Stores a document as if it had been uploaded and returns it as the API would.
+        """
+        with self._lock:
+            return self._store_document(
+                name, collection_name, metadata or {}, None, num_pages
+            )
+
+    def handle(
+        self, method: str, target: str, body: bytes
+    ) -> Tuple[int, Optional[bytes], Dict[str, str]]:
+        """
+        Answers a request and returns its status, JSON body and extra headers.
+        """
+        split = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(split.query).items()}
+        with self._lock:
+            self.requests[f"{method} {endpoint(split.path)}"] += 1
+            self.bytes_received += len(body)
+            status = self._failure()
+        if self.latency:
+            time.sleep(self.latency)
+        if status is not None:
+            headers = {}
+            if self.retry_after is not None:
+                headers["Retry-After"] = f"{self.retry_after:g}"
+            return status, _json({"detail": "Injected error"}), headers
+        for route_method, pattern, view in _ROUTES:
+            match = pattern.match(split.path)
+            if match is not None and route_method == method:
+                args = [unquote(group) for group in match.groups()]
+                with self._lock:
+                    status, reply = view(self, query, _payload(body), *args)
+                return status, None if reply is None else _json(reply), {}
+        return 404, _json({"detail": "Not Found"}), {}
+
+    def _failure(self) -> Optional[int]:
+        if self._failures:
+            return self._failures.popleft()
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._random.choice(self.error_statuses)
+        return None
+
+    def _next_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    def _collection(
+        self, name: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        if name not in self.collections:
+            self.collections[name] = {
+                "id": self._next_id(),
+                "name": name,
+                "metadata": metadata or {},
+            }
+        return self.collections[name]
+
+    def _store_document(
+        self,
+        name: str,
+        collection_name: str,
+        metadata: Dict[str, Any],
+        url: Optional[str],
+        num_pages: Optional[int],
+    ) -> Dict[str, Any]:
+        self._collection(collection_name)
+        existing = self.documents.get((collection_name, name))
+        document = {
+            "id": existing["id"] if existing else self._next_id(),
+            "name": name,
+            "metadata": metadata,
+            "url": url,
+            "num_pages": self.pages_per_document if num_pages is None else num_pages,
+            "collection_name": collection_name,
+        }
+        self.documents[(collection_name, name)] = document
+        return dict(document)
+
+    def _document_out(self, document: Dict[str, Any], expand: Any) -> Dict[str, Any]:
+        document = dict(document)
+        if expand and "pages" in expand.split(","):
+            document["pages"] = [
+                {
+                    "document_name": document["name"],
+                    "img_base64": self._image,
+                    "page_number": page,
+                }
+                for page in range(1, document["num_pages"] + 1)
+            ]
+        return document
+
+    def _create_collection(self, query: Dict[str, str], body: Any) -> Reply:
+        name = body.get("name")
+        if not name or name == "all":
+            return 422, {"detail": "Invalid collection name"}
+        if name in self.collections:
+            return 409, {"detail": "Collection with this name already exists"}
+        return 201, dict(self._collection(name, body.get("metadata")))
+
+    def _list_collections(self, query: Dict[str, str], body: Any) -> Reply:
+        return 200, [dict(collection) for collection in self.collections.values()]
+
+    def _get_collection(self, query: Dict[str, str], body: Any, name: str) -> Reply:
+        if name not in self.collections:
+            return 404, {"detail": "Collection not found"}
+        return 200, dict(self.collections[name])
+
+    def _update_collection(self, query: Dict[str, str], body: Any, name: str) -> Reply:
+        collection = self.collections.get(name)
+        if collection is None:
+            return 404, {"detail": "Collection not found"}
+        new_name = body.get("name") or name
+        if new_name != name and new_name in self.collections:
+            return 409, {"detail": "Collection with this name already exists"}
+        if body.get("metadata") is not None:
+            collection["metadata"] = body["metadata"]
+        collection["name"] = new_name
+        self.collections[new_name] = self.collections.pop(name)
+        for key in [key for key in self.documents if key[0] == name]:
+            document = self.documents.pop(key)
+            document["collection_name"] = new_name
+            self.documents[(new_name, key[1])] = document
+        return 200, dict(collection)
+
+    def _delete_collection(self, query: Dict[str, str], body: Any, name: str) -> Reply:
+        if self.collections.pop(name, None) is None:
+            return 404, {"detail": "Collection not found"}
+        for key in [key for key in self.documents if key[0] == name]:
+            del self.documents[key]
+        return 204, None
+
+    def _upsert_document(self, query: Dict[str, str], body: Any) -> Reply:
+        if not body.get("name"):
+            return 422, {"detail": "name is required"}
+        if not body.get("url") and not body.get("base64"):
+            return 400, {"detail": "Either url or base64 must be provided."}
+        document = self._store_document(
+            body["name"],
+            body.get("collection_name") or "default collection",
+            body.get("metadata") or {},
+            body.get("url"),
+            None,
+        )
+        if not body.get("wait"):
+            return 202, {"detail": "Document is being processed in the background."}
+        return 201, document
+
+    def _get_document(self, query: Dict[str, str], body: Any, name: str) -> Reply:
+        collection_name = query.get("collection_name", "default collection")
+        document = self.documents.get((collection_name, name))
+        if document is None:
+            return 404, {"detail": "Document not found"}
+        return 200, self._document_out(document, query.get("expand"))
+
+    def _update_document(self, query: Dict[str, str], body: Any, name: str) -> Reply:
+        collection_name = body.get("collection_name") or "default collection"
+        document = self.documents.get((collection_name, name))
+        if document is None:
+            return 404, {"detail": "Document not found"}
+        new_name = body.get("name") or name
+        if new_name != name and (collection_name, new_name) in self.documents:
+            return 409, {"detail": "Document with this name already exists"}
+        if body.get("metadata") is not None:
+            document["metadata"] = body["metadata"]
+        if body.get("url"):
+            document["url"] = body["url"]
+        document["name"] = new_name
+        del self.documents[(collection_name, name)]
+        self.documents[(collection_name, new_name)] = document
+        return 200, dict(document)
+
+    def _list_documents(self, query: Dict[str, str], body: Any) -> Reply:
+        collection_name = query.get("collection_name", "default collection")
+        return 200, [
+            self._document_out(document, query.get("expand"))
+            for (collection, _), document in self.documents.items()
+            if collection_name in ("all", collection)
+        ]
+
+    def _delete_document(self, query: Dict[str, str], body: Any, name: str) -> Reply:
+        collection_name = query.get("collection_name", "default collection")
+        if self.documents.pop((collection_name, name), None) is None:
+            return 404, {"detail": "Document not found"}
+        return 204, None
+
+    def _search(self, query: Dict[str, str], body: Any) -> Reply:
+        text = body.get("query")
+        if not isinstance(text, str):
+            return 422, {"detail": "query is required"}
+        collection_name = body.get("collection_name") or "all"
+        pages = (
+            (zlib.crc32(f"{text}\0{key[1]}\0{page}".encode()), document, page)
+            for key, document in self.documents.items()
+            if collection_name in ("all", key[0])
+            for page in range(1, document["num_pages"] + 1)
+        )
+        top = heapq.nlargest(body.get("top_k") or 3, pages, key=lambda item: item[0])
+        results = []
+        for score, document, page in top:
+            collection = self.collections[document["collection_name"]]
+            results.append(
+                {
+                    "collection_name": collection["name"],
+                    "collection_id": collection["id"],
+                    "collection_metadata": collection["metadata"],
+                    "document_name": document["name"],
+                    "document_id": document["id"],
+                    "document_metadata": document["metadata"],
+                    "page_number": page,
+                    "raw_score": score / 2**32 * 100,
+                    "normalized_score": score / 2**32,
+                    "img_base64": self._image,
+                }
+            )
+        return 200, {"query": text, "results": results}
+
+    def _embeddings(self, query: Dict[str, str], body: Any) -> Reply:
+        inputs = body.get("input_data")
+        if not isinstance(inputs, list) or body.get("task") not in ("query", "image"):
+            return 422, {"detail": "input_data and task are required"}
+        data = [
+            {"embedding": self._embedding(text), "index": index}
+            for index, text in enumerate(inputs)
+        ]
+        usage = {"total_tokens": len(inputs) * self.embedding_tokens}
+        return 200, {"object": "list", "data": data, "model": "stub", "usage": usage}
+
+    def _embedding(self, text: str) -> List[List[float]]:
+        rng = random.Random(text)
+        return [
+            [rng.uniform(-1, 1) for _ in range(self.embedding_dim)]
+            for _ in range(self.embedding_tokens)
+        ]
+
+    def _file_to_images(self, query: Dict[str, str], body: Any) -> Reply:
+        return 200, [
+            {"img_base64": self._image, "page_number": page}
+            for page in range(1, self.pages_per_document + 1)
+        ]
+
+
+_View = Callable[..., Reply]
+
+_ROUTES: List[Tuple[str, "re.Pattern[str]", _View]] = [
+    (method, re.compile(f"^{path}$"), view)
+    for method, path, view in (
+        ("POST", "/v1/collections/", StubServer._create_collection),
+        ("GET", "/v1/collections/", StubServer._list_collections),
+        ("GET", "/v1/collections/([^/]+)/", StubServer._get_collection),
+        ("PATCH", "/v1/collections/([^/]+)/", StubServer._update_collection),
+        ("DELETE", "/v1/collections/([^/]+)/", StubServer._delete_collection),
+        ("POST", "/v1/documents/upsert-document/", StubServer._upsert_document),
+        ("GET", "/v1/documents/", StubServer._list_documents),
+        (
+            "DELETE",
+            "/v1/documents/delete-document/([^/]+)/",
+            StubServer._delete_document,
+        ),
+        ("GET", "/v1/documents/([^/]+)/", StubServer._get_document),
+        ("PATCH", "/v1/documents/([^/]+)/", StubServer._update_document),
+        ("POST", "/v1/search/", StubServer._search),
+        ("POST", "/v1/embeddings/", StubServer._embeddings),
+        ("POST", "/v1/helpers/file-to-imgbase64/", StubServer._file_to_images),
+    )
+]
+
+
+def synthetic_image(size: int) -> str:
+    """
+    Returns the base64 of `size` bytes that start like a PNG file.
+    """
+    filler = bytes(range(256)) * (size // 256 + 1)
+    return base64.b64encode((PNG_SIGNATURE + filler)[:size]).decode()
+
+
+def _payload(body: bytes) -> Dict[str, Any]:
+    # the views check the fields they need; bodies that are not JSON objects have none
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def _json(value: Any) -> bytes:
+    return json.dumps(value).encode()
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    stub: StubServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # headers and body go out in separate writes; avoid Nagle stalls
+    disable_nagle_algorithm = True
+    server: _HTTPServer
+
+    def _respond(self) -> None:
+        if self.headers.get("Authorization", "").startswith("Bearer "):
+            status, content, headers = self.server.stub.handle(
+                self.command, self.path, self._body()
+            )
+        else:
+            self._body()
+            status, content, headers = 401, _json({"detail": "Unauthorized"}), {}
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if content is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content or b"")))
+        self.end_headers()
+        if content is not None:
+            self.wfile.write(content)
+
+    def _body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        chunks: List[bytes] = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0], 16)
+            if not size:
+                # the trailer section ends with an empty line
+                while self.rfile.readline().strip():
+                    pass
+                return b"".join(chunks)
+            chunks.append(self.rfile.read(size + 2)[:size])
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _respond
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Run a local stand-in for the ColiVara API."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-statuses", type=int, nargs="+", default=[429, 503])
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--image-kb", type=int, default=64)
+    parser.add_argument("--pages-per-document", type=int, default=1)
+    parser.add_argument("--embedding-dim", type=int, default=128)
+    parser.add_argument("--embedding-tokens", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    server = StubServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_statuses=args.error_statuses,
+        retry_after=args.retry_after,
+        image_bytes=args.image_kb * 1024,
+        pages_per_document=args.pages_per_document,
+        embedding_dim=args.embedding_dim,
+        embedding_tokens=args.embedding_tokens,
+    )
+    server.start()
+    print(f"Serving a stand-in ColiVara API on {server.url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
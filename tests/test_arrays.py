@@ -0,0 +1,77 @@
+import importlib
+import json
+import sys
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from colivara_py.arrays import EmbeddingArrays
+from colivara_py.models import EmbeddingsOut
+
+
+def response(embeddings, separators=(",", ":")):
+    data = [
+        {"object": "embedding", "embedding": embedding, "index": index}
+        for index, embedding in embeddings
+    ]
+    body = {"object": "list", "data": data, "model": "colpali", "usage": {"a": 1}}
+    return json.dumps(body, separators=separators).encode()
+
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": "), (" , ", " : ")])
+def test_from_json_matches_the_nested_lists(separators):
+    rng = np.random.default_rng(0)
+    first = rng.standard_normal((5, 4)).round(6).tolist()
+    second = rng.standard_normal((2, 4)).round(6).tolist()
+    # out of order on purpose, arrays follow the input index
+    content = response([(1, second), (0, first), (2, [])], separators)
+
+    arrays = EmbeddingArrays.from_json(content)
+
+    assert len(arrays) == 3
+    assert arrays.model == "colpali" and arrays.usage == {"a": 1}
+    assert arrays.dim == 4
+    assert arrays.token_counts.tolist() == [5, 2, 0]
+    assert arrays[0].dtype == np.float32 and arrays[0].flags.c_contiguous
+    np.testing.assert_allclose(arrays[0], first, rtol=1e-6)
+    np.testing.assert_allclose(arrays[1], second, rtol=1e-6)
+    assert arrays[2].shape == (0, 4)
+    expected = EmbeddingArrays.from_embeddings_out(
+        EmbeddingsOut.model_validate_json(content)
+    )
+    assert all(np.array_equal(a, b) for a, b in zip(arrays, expected))
+
+
+def test_from_json_dtype_and_single_token():
+    arrays = EmbeddingArrays.from_json(response([(0, [[0.5, -1.5e-3]])]), "float16")
+    assert arrays[0].dtype == np.float16
+    assert arrays[0].shape == (1, 2)
+
+
+def test_from_json_rejects_broken_bodies():
+    with pytest.raises(ValidationError):
+        EmbeddingArrays.from_json(b'{"data":[{"embedding":[[1,2],[3')
+    with pytest.raises(ValueError):
+        EmbeddingArrays.from_json(response([(0, [[1.0, 2.0], [3.0]])]))
+
+
+def test_padded():
+    arrays = EmbeddingArrays(
+        [np.ones((3, 2), np.float32), np.full((1, 2), 2, np.float32)], "m", {}
+    )
+    batch, mask = arrays.padded(pad_value=-1)
+    assert batch.shape == (2, 3, 2) and batch.dtype == np.float32
+    assert mask.tolist() == [[True, True, True], [True, False, False]]
+    assert batch[1].tolist() == [[2, 2], [-1, -1], [-1, -1]]
+    assert list(arrays) == arrays.embeddings
+
+    batch, mask = EmbeddingArrays([], "m", {}).padded()
+    assert batch.shape == (0, 0, 0) and mask.shape == (0, 0)
+
+
+def test_missing_numpy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    monkeypatch.delitem(sys.modules, "colivara_py.arrays")
+    with pytest.raises(ImportError, match=r"colivara-py\[numpy\]"):
+        importlib.import_module("colivara_py.arrays")
@@ -0,0 +1,484 @@
+import json
+import threading
+from pathlib import Path
+
+import httpx
+import pytest
+
+from colivara_py import AsyncColivara, RequestStats
+from colivara_py import async_client
+from colivara_py import client as colivara_client
+from colivara_py.models import (
+    CollectionOut,
+    DocumentOut,
+    EmbeddingsOut,
+    FileOut,
+    GenericMessage,
+    PageOut,
+    QueryOut,
+)
+
+BASE_URL = "https://api.test.com"
+
+COLLECTION = {"id": 1, "name": "test_collection", "metadata": {"a": "b"}}
+DOCUMENT = {
+    "id": 1,
+    "name": "test_document",
+    "metadata": {},
+    "url": "https://example.com/test.pdf",
+    "num_pages": 1,
+    "collection_name": "test_collection",
+    "pages": None,
+}
+SEARCH_OUT = {
+    "query": "what is 1+1?",
+    "results": [
+        {
+            "collection_name": "test_collection",
+            "collection_id": 1,
+            "document_name": "test_document",
+            "document_id": 1,
+            "page_number": 1,
+            "raw_score": 0.9,
+            "normalized_score": 0.9,
+            "img_base64": "aW1n",
+        }
+    ],
+}
+EMBEDDINGS_OUT = {
+    "_object": "list",
+    "data": [{"embedding": [[0.1, 0.2]], "index": 0}],
+    "model": "colpali",
+    "usage": {"prompt_tokens": 1},
+}
+
+
+def make_client(routes, requests_seen=None, **kwargs):
+    """Builds a client whose transport answers from a {(method, path): (status, json)} table."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if requests_seen is not None:
+            requests_seen.append(request)
+        status, body = routes[(request.method, request.url.path)]
+        if body is None:
+            return httpx.Response(status)
+        return httpx.Response(status, json=body)
+
+    return AsyncColivara(
+        base_url=BASE_URL,
+        api_key="test_api_key",
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+async def test_async_orjson_backend():
+    routes = {("POST", "/v1/search/"): (200, SEARCH_OUT)}
+    async with make_client(routes, json_backend="orjson") as client:
+        assert await client.search("what is 1+1?") == QueryOut(**SEARCH_OUT)
+
+
+def test_async_colivara_init_no_api_key(monkeypatch):
+    monkeypatch.delenv("COLIVARA_API_KEY", raising=False)
+    with pytest.raises(ValueError, match="API key must be provided"):
+        AsyncColivara(base_url=BASE_URL)
+
+
+async def test_async_context_manager_closes_client():
+    async with make_client({}) as client:
+        assert not client.client.is_closed
+    assert client.client.is_closed
+
+
+async def test_async_collections():
+    routes = {
+        ("POST", "/v1/collections/"): (201, COLLECTION),
+        ("GET", "/v1/collections/"): (200, [COLLECTION]),
+        ("GET", "/v1/collections/test_collection/"): (200, COLLECTION),
+        ("PATCH", "/v1/collections/test_collection/"): (200, COLLECTION),
+        ("DELETE", "/v1/collections/test_collection/"): (204, None),
+    }
+    seen = []
+    async with make_client(routes, seen) as client:
+        created = await client.create_collection("test_collection", {"a": "b"})
+        assert isinstance(created, CollectionOut)
+        assert json.loads(seen[-1].content) == {
+            "name": "test_collection",
+            "metadata": {"a": "b"},
+        }
+        collections = await client.list_collections()
+        assert [c.name for c in collections] == ["test_collection"]
+        assert (await client.get_collection("test_collection")).id == 1
+        updated = await client.partial_update_collection(
+            "test_collection", metadata={"a": "b"}
+        )
+        assert updated.metadata == {"a": "b"}
+        assert await client.delete_collection("test_collection") is None
+
+
+async def test_async_collection_errors():
+    routes = {
+        ("POST", "/v1/collections/"): (409, {"detail": "Collection already exists."}),
+        ("GET", "/v1/collections/"): (200, {"unexpected": "format"}),
+        ("GET", "/v1/collections/missing/"): (404, {"detail": "not found"}),
+        ("PATCH", "/v1/collections/missing/"): (404, {"detail": "not found"}),
+        ("DELETE", "/v1/collections/missing/"): (404, {"detail": "not found"}),
+        ("GET", "/v1/collections/broken/"): (500, {}),
+        ("PATCH", "/v1/collections/broken/"): (500, {}),
+        ("DELETE", "/v1/collections/broken/"): (500, {}),
+    }
+    async with make_client(routes) as client:
+        with pytest.raises(Exception, match="Conflict error"):
+            await client.create_collection("test_collection")
+        with pytest.raises(ValueError, match="Unexpected response format"):
+            await client.list_collections()
+        for call in (
+            client.get_collection("missing"),
+            client.partial_update_collection("missing", name="new"),
+            client.delete_collection("missing"),
+        ):
+            with pytest.raises(Exception, match="Collection 'missing' not found."):
+                await call
+        for call in (
+            client.get_collection("broken"),
+            client.partial_update_collection("broken", name="new"),
+            client.delete_collection("broken"),
+        ):
+            with pytest.raises(httpx.HTTPStatusError):
+                await call
+
+    routes = {("POST", "/v1/collections/"): (500, {})}
+    async with make_client(routes) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.create_collection("test_collection")
+
+
+async def test_async_documents(tmp_path):
+    document_path = tmp_path / "test.pdf"
+    document_path.write_bytes(b"%PDF")
+    routes = {
+        ("POST", "/v1/documents/upsert-document/"): (201, DOCUMENT),
+        ("GET", "/v1/documents/test_document/"): (200, DOCUMENT),
+        ("PATCH", "/v1/documents/test_document/"): (200, DOCUMENT),
+        ("GET", "/v1/documents/"): (200, [DOCUMENT]),
+        ("DELETE", "/v1/documents/delete-document/test_document/"): (204, None),
+    }
+    seen = []
+    async with make_client(routes, seen) as client:
+        document = await client.upsert_document(
+            "test_document",
+            collection_name="test_collection",
+            document_path=document_path,
+            wait=True,
+        )
+        assert isinstance(document, DocumentOut)
+        assert json.loads(seen[-1].content)["base64"] == "JVBERg=="
+
+        await client.get_document("test_document", "test_collection")
+        # None valued parameters are not sent
+        assert seen[-1].url.params == httpx.QueryParams(
+            collection_name="test_collection"
+        )
+        updated = await client.partial_update_document(
+            "test_document", metadata={"a": "b"}
+        )
+        assert updated.name == "test_document"
+        documents = await client.list_documents("test_collection", expand="pages")
+        assert seen[-1].url.params["expand"] == "pages"
+        assert len(documents) == 1
+        assert await client.delete_document("test_document") is None
+
+
+async def test_async_iter_documents():
+    pages = [{"document_name": "test_document", "img_base64": "aW1n", "page_number": 1}]
+    documents = [{**DOCUMENT, "id": i, "pages": pages} for i in range(3)]
+    seen = []
+    routes = {("GET", "/v1/documents/"): (200, documents)}
+    async with make_client(routes, seen) as client:
+        found = [
+            document
+            async for document in client.iter_documents("all", "pages", batch_size=2)
+        ]
+        assert found == [DocumentOut(**document) for document in documents]
+        assert seen[-1].url.params["expand"] == "pages"
+        skipped = [
+            document.pages async for document in client.iter_documents(skip_pages=True)
+        ]
+        assert skipped == [None] * 3
+
+    routes = {("GET", "/v1/documents/"): (204, None)}
+    async with make_client(routes) as client:
+        assert [document async for document in client.iter_documents()] == []
+    routes = {("GET", "/v1/documents/"): (500, {})}
+    async with make_client(routes) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            [document async for document in client.iter_documents()]
+
+
+async def test_async_iter_document_pages():
+    pages = [
+        {"document_name": "test_document", "img_base64": "aW1n", "page_number": i}
+        for i in (1, 2)
+    ]
+    seen = []
+    routes = {
+        ("GET", "/v1/documents/test_document/"): (200, {**DOCUMENT, "pages": pages}),
+        ("GET", "/v1/documents/missing/"): (404, {"detail": "boom"}),
+        ("GET", "/v1/documents/broken/"): (500, {}),
+        ("GET", "/v1/documents/empty/"): (204, None),
+    }
+    async with make_client(routes, seen) as client:
+        found = [page async for page in client.iter_document_pages("test_document")]
+        assert found == [PageOut(**page) for page in pages]
+        assert seen[-1].url.params["expand"] == "pages"
+        with pytest.raises(ValueError, match="Document not found: boom"):
+            [page async for page in client.iter_document_pages("missing")]
+        with pytest.raises(httpx.HTTPStatusError):
+            [page async for page in client.iter_document_pages("broken")]
+        assert [page async for page in client.iter_document_pages("empty")] == []
+
+
+async def test_async_export_pages(tmp_path):
+    pages = [{"img_base64": "aW1n", "page_number": i} for i in range(1, 6)]
+    routes = {
+        ("GET", "/v1/documents/test_document/"): (200, {**DOCUMENT, "pages": pages}),
+        ("GET", "/v1/documents/missing/"): (404, {"detail": "boom"}),
+    }
+    async with make_client(routes) as client:
+        paths = await client.export_pages("test_document", tmp_path, max_workers=1)
+        assert paths == [
+            tmp_path / "default collection" / "test_document" / f"page_000{i}.bin"
+            for i in range(1, 6)
+        ]
+        assert all(path.read_bytes() == b"img" for path in paths)
+        with pytest.raises(ValueError, match="Document not found: boom"):
+            await client.export_pages("missing", tmp_path)
+
+
+async def test_async_upsert_document_fingerprint():
+    digest = "2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824"
+    stored = {**DOCUMENT, "metadata": {"a": 1, "colivara_sha256": digest}}
+    routes = {
+        ("GET", "/v1/documents/test_document/"): (200, stored),
+        ("PATCH", "/v1/documents/test_document/"): (200, stored),
+        ("GET", "/v1/documents/new/"): (404, {"detail": "missing"}),
+        ("POST", "/v1/documents/upsert-document/"): (201, DOCUMENT),
+    }
+    seen = []
+    async with make_client(routes, seen) as client:
+        for name, metadata in (
+            ("test_document", {"a": 1}),
+            ("test_document", {}),
+            ("new", {}),
+        ):
+            await client.upsert_document(
+                name, metadata, document_base64="aGVsbG8=", fingerprint=True
+            )
+        assert [request.method for request in seen] == [
+            "GET",
+            "GET",
+            "PATCH",
+            "GET",
+            "POST",
+        ]
+        assert json.loads(seen[2].content)["metadata"] == {"colivara_sha256": digest}
+        assert json.loads(seen[4].content)["metadata"] == {"colivara_sha256": digest}
+
+
+async def test_async_file_io_runs_off_the_event_loop(tmp_path, monkeypatch):
+    document_path = tmp_path / "test.pdf"
+    document_path.write_bytes(b"%PDF")
+    threads = []
+
+    def recorded(function):
+        def wrapper(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return function(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(
+        colivara_client, "_file_to_base64", recorded(colivara_client._file_to_base64)
+    )
+    monkeypatch.setattr(
+        async_client, "_fingerprint", recorded(async_client._fingerprint)
+    )
+    monkeypatch.setattr(Path, "read_bytes", recorded(Path.read_bytes))
+    routes = {
+        ("GET", "/v1/documents/test_document/"): (404, {"detail": "missing"}),
+        ("POST", "/v1/documents/upsert-document/"): (201, DOCUMENT),
+        ("POST", "/v1/helpers/file-to-imgbase64/"): (
+            200,
+            [{"img_base64": "aW1n", "page_number": 1}],
+        ),
+    }
+    async with make_client(routes) as client:
+        await client.upsert_document(
+            "test_document", document_path=document_path, fingerprint=True
+        )
+        await client.file_to_imgbase64(str(document_path))
+    # the fingerprint, the upload encoding and the helper upload
+    assert len(threads) == 3
+    assert threading.get_ident() not in threads
+
+
+async def test_async_document_errors():
+    error = {"detail": "boom"}
+    routes = {
+        ("POST", "/v1/documents/upsert-document/"): (202, {"detail": "queued"}),
+        ("GET", "/v1/documents/missing/"): (404, error),
+        ("PATCH", "/v1/documents/missing/"): (409, error),
+        ("DELETE", "/v1/documents/delete-document/missing/"): (404, error),
+        ("GET", "/v1/documents/broken/"): (500, {}),
+        ("PATCH", "/v1/documents/broken/"): (500, {}),
+        ("DELETE", "/v1/documents/delete-document/broken/"): (500, {}),
+        ("GET", "/v1/documents/"): (500, {}),
+    }
+    async with make_client(routes) as client:
+        queued = await client.upsert_document("doc", document_url="https://x.com/a")
+        assert isinstance(queued, GenericMessage)
+        with pytest.raises(ValueError, match="Document not found: boom"):
+            await client.get_document("missing")
+        with pytest.raises(ValueError, match="Update failed: boom"):
+            await client.partial_update_document("missing", name="new")
+        with pytest.raises(ValueError, match="Deletion failed: boom"):
+            await client.delete_document("missing")
+        for call in (
+            client.get_document("broken"),
+            client.partial_update_document("broken", name="new"),
+            client.delete_document("broken"),
+            client.list_documents(),
+        ):
+            with pytest.raises(httpx.HTTPStatusError):
+                await call
+
+    for status, expected in ((400, ValueError), (500, httpx.HTTPStatusError)):
+        routes = {("POST", "/v1/documents/upsert-document/"): (status, error)}
+        async with make_client(routes) as client:
+            with pytest.raises(expected):
+                await client.upsert_document("doc", document_base64="aGVsbG8=")
+
+
+async def test_async_search():
+    routes = {("POST", "/v1/search/"): (200, SEARCH_OUT)}
+    seen = []
+    async with make_client(routes, seen) as client:
+        results = await client.search(
+            "what is 1+1?",
+            query_filter={"key": "category", "value": "AI", "lookup": "contains"},
+        )
+        assert isinstance(results, QueryOut)
+        assert json.loads(seen[-1].content)["query_filter"]["key"] == "category"
+
+    for status, expected in ((503, ValueError), (500, httpx.HTTPStatusError)):
+        routes = {("POST", "/v1/search/"): (status, {"detail": "busy"})}
+        async with make_client(routes) as client:
+            with pytest.raises(expected):
+                await client.search("what is 1+1?")
+
+
+async def test_async_helpers_and_embeddings(tmp_path):
+    file_path = tmp_path / "test.pdf"
+    file_path.write_bytes(b"%PDF")
+    routes = {
+        ("POST", "/v1/helpers/file-to-imgbase64/"): (
+            200,
+            [{"img_base64": "aW1n", "page_number": 1}],
+        ),
+        ("POST", "/v1/embeddings/"): (200, EMBEDDINGS_OUT),
+    }
+    seen = []
+    async with make_client(routes, seen) as client:
+        pages = await client.file_to_imgbase64(str(file_path))
+        assert isinstance(pages[0], FileOut)
+        assert b'filename="test.pdf"' in seen[-1].content
+        assert client.file_to_base64(str(file_path)) == "JVBERg=="
+
+        embeddings = await client.create_embedding("what is 1+1?")
+        assert isinstance(embeddings, EmbeddingsOut)
+        assert json.loads(seen[-1].content) == {
+            "input_data": ["what is 1+1?"],
+            "task": "query",
+        }
+
+        arrays = await client.create_embedding("what is 1+1?", as_arrays=True)
+        assert arrays[0].tolist() == [[pytest.approx(0.1), pytest.approx(0.2)]]
+
+    routes = {
+        ("POST", "/v1/helpers/file-to-imgbase64/"): (500, {}),
+        ("POST", "/v1/embeddings/"): (503, {"detail": "busy"}),
+    }
+    async with make_client(routes) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.file_to_imgbase64(str(file_path))
+        with pytest.raises(Exception, match="Service Unavailable: busy"):
+            await client.create_embedding("what is 1+1?", task="query")
+
+    routes = {("POST", "/v1/embeddings/"): (500, {})}
+    async with make_client(routes) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.create_embedding("what is 1+1?", task="query")
+
+
+async def test_async_event_hooks():
+    pages = [{"img_base64": "aW1n", "page_number": 1}]
+    routes = {
+        ("POST", "/v1/search/"): (200, SEARCH_OUT),
+        ("GET", "/v1/documents/test_document/"): (200, {**DOCUMENT, "pages": pages}),
+        ("GET", "/v1/documents/missing/"): (404, {"detail": "boom"}),
+        ("DELETE", "/v1/collections/old/"): (204, None),
+    }
+    ended = []
+    started = []
+    async with make_client(
+        routes,
+        event_hooks={"request_start": [started.append], "request_end": [ended.append]},
+    ) as client:
+        await client.search("what is 1+1?")
+        [page async for page in client.iter_document_pages("test_document")]
+        with pytest.raises(ValueError):
+            await client.get_document("missing")
+        await client.delete_collection("old")
+        assert started == ended
+        assert [(event.endpoint, event.status) for event in ended] == [
+            ("/v1/search/", 200),
+            ("/v1/documents/{document_name}/", 200),
+            ("/v1/documents/{document_name}/", 404),
+            ("/v1/collections/{collection_name}/", 204),
+        ]
+        search = ended[0]
+        assert search.bytes_sent > 0
+        assert search.bytes_received == len(
+            httpx.Response(200, json=SEARCH_OUT).content
+        )
+        assert search.serialize > 0 and search.parse > 0 and ended[1].parse == 0
+        assert client._pending.get() is None
+
+
+async def test_async_event_hooks_errors():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("reset", request=request)
+
+    ended = []
+    client = AsyncColivara(
+        base_url=BASE_URL,
+        api_key="test_api_key",
+        transport=httpx.MockTransport(handler),
+        event_hooks={"request_end": [ended.append]},
+    )
+    async with client:
+        with pytest.raises(httpx.ConnectError):
+            await client.list_collections()
+    assert isinstance(ended[0].error, httpx.ConnectError) and ended[0].status is None
+
+
+async def test_async_request_stats():
+    routes = {("POST", "/v1/search/"): (200, SEARCH_OUT)}
+    async with make_client(routes, request_stats=RequestStats()) as client:
+        await client.search("what is 1+1?")
+        await client.search("what is 1+1?")
+        search = client.stats()["POST /v1/search/"]
+        assert (search.requests, search.errors) == (2, 0)
+        assert search.bytes_sent > 0 and search.p50 > 0
+    with pytest.raises(ValueError, match="not collected"):
+        make_client(routes).stats()
@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+from colivara_py import TTLCache
+from colivara_py.cache import CacheInfo
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("colivara_py.cache.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    assert cache.info() == CacheInfo(
+        hits=3, misses=1, maxsize=2, currsize=2, currbytes=0
+    )
+
+
+def test_ttl_cache_expiry(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    clock[0] += 59
+    assert cache.get("a") == 1
+    clock[0] += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    # storing again refreshes the entry
+    cache.set("a", 2)
+    clock[0] += 30
+    assert cache.get("a") == 2
+
+
+def test_ttl_cache_clear_and_validation():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.clear()
+    assert cache.get("a") is None
+    with pytest.raises(ValueError, match="maxsize must be at least 1."):
+        TTLCache(maxsize=0)
+
+
+def test_ttl_cache_threads():
+    cache = TTLCache(maxsize=50)
+
+    def work(offset):
+        for i in range(1000):
+            cache.set((offset, i % 80), i)
+            cache.get((offset, i % 70))
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    info = cache.info()
+    assert info.currsize == 50
+    assert info.hits + info.misses == 4000
+
+
+def test_ttl_cache_max_bytes():
+    cache = TTLCache(maxsize=100, max_bytes=100)
+    cache.set("a", "a", size=40)
+    cache.set("b", "b", size=40)
+    cache.set("c", "c", size=40)  # evicts "a"
+    assert cache.get("a") is None
+    assert cache.info().currbytes == 80
+    # replacing an entry releases its old size
+    cache.set("b", "B", size=10)
+    assert cache.info().currbytes == 50
+    # too large to ever fit: not stored, nothing evicted
+    cache.set("huge", "huge", size=101)
+    assert cache.get("huge") is None
+    assert len(cache) == 2
+    cache.clear()
+    assert cache.info().currbytes == 0
+
+
+def test_ttl_cache_invalidate_by_tag():
+    cache = TTLCache()
+    cache.set("q1", 1, tags=["docs"])
+    cache.set("q2", 2, tags=["docs", "all"])
+    cache.set("q3", 3, tags=["papers"])
+    cache.invalidate("docs")
+    assert cache.get("q1") is None
+    assert cache.get("q2") is None
+    assert cache.get("q3") == 3
+    cache.invalidate("missing")
+    assert len(cache) == 1
+
+
+def test_ttl_cache_generation():
+    cache = TTLCache()
+    before = cache.generation(["docs"])
+    cache.invalidate("papers")
+    cache.set("q1", 1, tags=["docs"], generation=before)
+    assert cache.get("q1") == 1
+    # computed before its tag was invalidated, or the cache cleared
+    before = cache.generation(["docs"])
+    cache.invalidate("docs")
+    cache.set("q2", 2, tags=["docs"], generation=before)
+    assert cache.get("q2") is None
+    before = cache.generation(["docs"])
+    cache.clear()
+    cache.set("q3", 3, tags=["docs"], generation=before)
+    assert len(cache) == 0
@@ -0,0 +1,107 @@
+import importlib
+import sys
+
+import numpy as np
+import pytest
+
+from colivara_py.centroid_index import CentroidIndex
+from colivara_py.index import LocalIndex
+from colivara_py.maxsim import MaxSimScorer
+
+
+@pytest.fixture
+def corpus():
+    # every page draws its tokens around a few of 8 orthogonal topics
+    rng = np.random.default_rng(0)
+    topics = np.eye(8, 16, dtype=np.float32) * 4
+    pages = [
+        topics[rng.integers(8, size=n) % 4 + 4 * (page % 2)]
+        + 0.1 * rng.standard_normal((n, 16))
+        for page, n in enumerate([12, 0, 20, 7, 15, 9, 30, 11])
+    ]
+    queries = [page[:5] + 0.05 for page in pages if len(page)]
+    return [page.astype(np.float32) for page in pages], queries
+
+
+def test_lists_hold_every_page_centroid_pair(corpus):
+    pages, _ = corpus
+    index = CentroidIndex(MaxSimScorer(pages), centroids=8, seed=1)
+    assert index.centroids.shape == (8, 16)
+    pairs = set()
+    for page in range(len(pages)):
+        start, end = index.page_offsets[page], index.page_offsets[page + 1]
+        centroids = index.page_centroids[start:end]
+        expected = np.unique(np.argmax(pages[page] @ index.centroids.T, axis=1))
+        np.testing.assert_array_equal(centroids, expected)
+        pairs |= {(page, centroid) for centroid in centroids}
+    listed = {
+        (page, centroid)
+        for centroid in range(8)
+        for page in index.list_pages[
+            index.list_offsets[centroid] : index.list_offsets[centroid + 1]
+        ]
+    }
+    assert listed == pairs
+    assert index.nbytes > index.centroids.nbytes
+
+
+def test_search_without_pruning_is_exact(corpus):
+    pages, queries = corpus
+    scorer = MaxSimScorer(pages)
+    index = CentroidIndex(scorer, centroids=8)
+    expected_indices, expected_scores = scorer.search(queries, top_k=3)
+    indices, scores = index.search(queries, top_k=3, probe=8, candidate_count=10)
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-6)
+
+
+def test_search_prunes_to_the_matching_topics(corpus):
+    pages, queries = corpus
+    index = CentroidIndex(MaxSimScorer(pages), centroids=8)
+    # queries only probe the topics of even or of odd pages
+    for query, page in zip(queries, [0, 2, 3, 4, 5, 6, 7]):
+        candidates = index.candidates(query, probe=1)
+        assert page in candidates and len(set(candidates % 2)) == 1
+    exact = MaxSimScorer(pages).score(queries)
+    # the pages of the other parity are never scored
+    indices, _ = index.search(queries, top_k=1, probe=1, candidate_count=4)
+    np.testing.assert_array_equal(indices[:, 0], exact.argmax(axis=1))
+    # the centroid interaction keeps 2 of the 4 candidates, their scores are exact
+    indices, scores = index.search(queries, top_k=3, probe=1, candidate_count=2)
+    assert (indices[:, 2] == -1).all()
+    assert (indices[:, :2] % 2 == exact.argmax(axis=1, keepdims=True) % 2).all()
+    np.testing.assert_allclose(
+        scores[:, :2], np.take_along_axis(exact, indices[:, :2], axis=1), rtol=1e-6
+    )
+
+
+def test_search_pads_missing_candidates():
+    pages = [np.eye(2, 4, dtype=np.float32), np.eye(2, 4, k=2, dtype=np.float32)]
+    index = CentroidIndex(MaxSimScorer(pages), centroids=4)
+    indices, scores = index.search(
+        [np.eye(1, 4, dtype=np.float32), np.empty((0, 4))], top_k=3, probe=1
+    )
+    assert indices.tolist() == [[0, -1], [-1, -1]]
+    assert (
+        scores[0, 0] == 1 and np.isneginf(scores[0, 1]) and np.isneginf(scores[1]).all()
+    )
+
+
+def test_memory_mapped_index(tmp_path, corpus):
+    pages, queries = corpus
+    local = LocalIndex(tmp_path)
+    local.add("doc", pages)
+    index = CentroidIndex(local.scorer, centroids=8, sample_size=50)
+    indices, _ = index.search(queries, top_k=2, probe=8)
+    np.testing.assert_array_equal(indices, MaxSimScorer(pages).search(queries, 2)[0])
+    with pytest.raises(ValueError, match="without any tokens"):
+        CentroidIndex(MaxSimScorer([np.empty((0, 4))]))
+    # about sqrt(tokens) centroids by default
+    assert len(CentroidIndex(MaxSimScorer(pages)).centroids) == 8
+
+
+def test_missing_numpy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    monkeypatch.delitem(sys.modules, "colivara_py.centroid_index")
+    with pytest.raises(ImportError, match=r"colivara-py\[numpy\]"):
+        importlib.import_module("colivara_py.centroid_index")
@@ -1,11 +1,21 @@
+import hashlib
+import io
 import os
+import re
+import json
+import sys
+import threading
+import time
+import tracemalloc
 import pytest
 import base64
-from colivara_py import Colivara, AsyncColivara
+from colivara_py import Colivara, RequestStats, RetryPolicy, TTLCache
+from colivara_py import client as colivara_client
 from colivara_py.models import (
     CollectionOut,
     DocumentOut,
     QueryOut,
+    PageOut,
     PageOutQuery,
     FileOut,
     EmbeddingsOut,
@@ -15,7 +25,10 @@ from colivara_py.models import (
     QueryFilter,
     GenericMessage,
 )
+import requests
 import responses
+from http.client import RemoteDisconnected
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
 from requests.exceptions import HTTPError
 from pydantic import ValidationError
 from pathlib import Path
@@ -34,6 +47,41 @@ def api_key():
     return "test_api_key"
 
 
+def test_colivara_session_pool(api_key):
+    client = Colivara(
+        base_url="https://api.test.com",
+        api_key=api_key,
+        pool_connections=2,
+        pool_maxsize=32,
+    )
+    adapter = client.session.get_adapter("https://api.test.com/v1/collections/")
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 32
+    assert client.session.get_adapter("http://localhost:8001/") is adapter
+    client.close()
+
+
+@responses.activate
+def test_colivara_context_manager_reuses_session(api_key, monkeypatch):
+    base_url = "https://api.test.com"
+    responses.add(responses.GET, f"{base_url}/v1/collections/", json=[], status=200)
+    responses.add(
+        responses.DELETE, f"{base_url}/v1/collections/old_collection/", status=204
+    )
+
+    closed = []
+    with Colivara(base_url=base_url, api_key=api_key) as client:
+        session = client.session
+        monkeypatch.setattr(session, "close", lambda: closed.append(session))
+        client.list_collections()
+        client.delete_collection("old_collection")
+        assert client.session is session
+        assert len(responses.calls) == 2
+
+    # the session (and its connection pools) is released on exit
+    assert closed == [session]
+
+
 @responses.activate
 def test_create_collection_sync(api_key):
     os.environ["COLIVARA_API_KEY"] = api_key
@@ -638,6 +686,569 @@ def test_upsert_document_sync_invalid_input(
         client.upsert_document(**input_data)
 
 
+@responses.activate
+def test_upsert_document_streaming(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    sent = []
+
+    def capture(request):
+        request.body = b"".join(request.body)
+        sent.append((request.headers, request.body))
+        return _echo_document(request)
+
+    responses.add_callback(
+        responses.POST,
+        f"{base_url}/v1/documents/upsert-document/",
+        callback=capture,
+    )
+    content = b"%PDF-1.7 streamed"
+    test_file = tmp_path / "streamed.pdf"
+    test_file.write_bytes(content)
+
+    for source in (
+        {"document_data": content},
+        {"document_data": memoryview(content)},
+        {"document_data": io.BytesIO(content)},
+        {"document_path": test_file, "stream": True},
+    ):
+        document = client.upsert_document(
+            name="streamed", metadata={"a": 1}, wait=True, **source
+        )
+        assert isinstance(document, DocumentOut)
+        headers, body = sent[-1]
+        assert int(headers["Content-Length"]) == len(body)
+        assert json.loads(body) == {
+            "name": "streamed",
+            "metadata": {"a": 1},
+            "collection_name": "default collection",
+            "wait": True,
+            "base64": base64.b64encode(content).decode(),
+        }
+
+    with pytest.raises(ValueError, match="document_base64 cannot be streamed"):
+        client.upsert_document(
+            name="streamed", document_base64="aGVsbG8=", document_data=content
+        )
+    with pytest.raises(ValueError, match="Only one of 'url' or 'base64'"):
+        client.upsert_document(
+            name="streamed", document_url="https://x.com/a.pdf", document_data=content
+        )
+    with pytest.raises(ValueError, match="Error reading file:"):
+        client.upsert_document(
+            name="streamed", document_path=tmp_path / "missing.pdf", stream=True
+        )
+
+
+def _request_json(request):
+    body = request.body
+    if not isinstance(body, (bytes, str)):
+        # streamed uploads
+        body = b"".join(body)
+    return json.loads(body)
+
+
+def _echo_document(request):
+    payload = _request_json(request)
+    document = {
+        "id": 1,
+        "name": payload["name"],
+        "metadata": payload["metadata"],
+        "num_pages": 1,
+        "collection_name": payload["collection_name"],
+    }
+    return (201, {}, json.dumps(document))
+
+
+@responses.activate
+def test_upsert_documents(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    responses.add_callback(
+        responses.POST,
+        f"{base_url}/v1/documents/upsert-document/",
+        callback=_echo_document,
+    )
+    test_file = tmp_path / "report.pdf"
+    test_file.write_bytes(b"%PDF")
+
+    results = client.upsert_documents(
+        [
+            test_file,
+            {"name": "inline", "document_base64": "aGVsbG8=", "metadata": {"a": 1}},
+            {
+                "name": "moved",
+                "document_url": "https://x.com/a.pdf",
+                "collection_name": "other",
+            },
+            {"name": "missing", "document_path": tmp_path / "missing.pdf"},
+            {"name": "buffered", "document_path": test_file, "stream": False},
+            {"name": "gone", "document_path": tmp_path / "gone.pdf", "stream": False},
+        ],
+        collection_name="archive",
+        max_workers=2,
+    )
+
+    assert [result.name for result in results] == [
+        "report.pdf",
+        "inline",
+        "moved",
+        "missing",
+        "buffered",
+        "gone",
+    ]
+    assert [result.ok for result in results] == [True, True, True, False, True, False]
+    assert isinstance(results[0].document, DocumentOut)
+    assert results[0].document.collection_name == "archive"
+    assert results[1].document.metadata == {"a": 1}
+    assert results[2].document.collection_name == "other"
+    assert isinstance(results[3].error, ValueError)
+    assert len(responses.calls) == 4
+
+    # a malformed item fails on its own
+    results = client.upsert_documents([["not", "a", "dict"], 42, test_file])
+    assert [(result.name, result.ok) for result in results] == [
+        ("['not', 'a', 'dict']", False),
+        ("42", False),
+        ("report.pdf", True),
+    ]
+
+    def failing():
+        yield {"name": "first", "document_base64": "aGVsbG8="}
+        raise OSError("listing failed")
+
+    results = client.upsert_documents(failing())
+    assert [(result.name, result.ok) for result in results] == [
+        ("first", True),
+        ("", False),
+    ]
+    assert isinstance(results[1].error, OSError)
+
+
+@responses.activate
+def test_sync_directory(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    responses.add_callback(
+        responses.POST,
+        f"{base_url}/v1/documents/upsert-document/",
+        callback=_echo_document,
+    )
+    delete_url = f"{base_url}/v1/documents/delete-document/"
+    responses.add(responses.DELETE, f"{delete_url}b.pdf/", status=204)
+    responses.add(responses.DELETE, f"{delete_url}q1__c.pdf/", status=500)
+    responses.add(responses.DELETE, f"{delete_url}q1__c.pdf/", status=204)
+    root = tmp_path / "drive"
+    (root / "q1").mkdir(parents=True)
+    (root / "a.pdf").write_bytes(b"%PDF a")
+    (root / "b.pdf").write_bytes(b"%PDF b")
+    (root / "q1" / "c.pdf").write_bytes(b"%PDF c")
+    (root / "notes.txt").write_bytes(b"skipped by the glob")
+
+    def uploaded():
+        names = [
+            _request_json(call.request)["name"]
+            for call in responses.calls
+            if call.request.method == "POST"
+        ]
+        responses.calls.reset()
+        return sorted(names)
+
+    result = client.sync_directory(root, "reports", glob="**/*.pdf", max_workers=2)
+    assert result.ok and result.unchanged == 0 and result.deleted == []
+    assert sorted(result.uploaded) == uploaded() == ["a.pdf", "b.pdf", "q1__c.pdf"]
+    assert (root / ".colivara-sync.json").exists()
+
+    # nothing changed, only touched, modified, added and removed
+    assert client.sync_directory(root, "reports", glob="**/*.pdf").unchanged == 3
+    assert uploaded() == []
+    os.utime(root / "a.pdf", (0, 0))
+    (root / "q1" / "c.pdf").write_bytes(b"%PDF c2")
+    (root / "d.pdf").write_bytes(b"%PDF d")
+    (root / "b.pdf").unlink()
+    result = client.sync_directory(root, "reports", glob="**/*.pdf")
+    assert (result.uploaded, result.deleted, result.unchanged) == (
+        ["d.pdf", "q1__c.pdf"],
+        ["b.pdf"],
+        1,
+    )
+    assert uploaded() == ["d.pdf", "q1__c.pdf"]
+
+    # a failed deletion is retried by the next sync
+    (root / "q1" / "c.pdf").unlink()
+    result = client.sync_directory(root, "reports", glob="**/*.pdf")
+    assert isinstance(result.errors["q1__c.pdf"], HTTPError) and not result.ok
+    responses.calls.reset()
+    result = client.sync_directory(root, "reports", glob="**/*.pdf")
+    assert result.ok and result.deleted == ["q1__c.pdf"]
+
+    # another collection, or without deletions, starts from an empty manifest
+    manifest = tmp_path / "manifest.json"
+    result = client.sync_directory(root, "other", manifest_path=manifest, delete=False)
+    assert sorted(result.uploaded) == ["a.pdf", "d.pdf", "notes.txt"]
+
+
+@responses.activate
+def test_sync_directory_upload_errors(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    url = f"{base_url}/v1/documents/upsert-document/"
+    responses.add(responses.POST, url, json={"detail": "bad"}, status=400)
+    responses.add_callback(responses.POST, url, callback=_echo_document)
+    (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+
+    result = client.sync_directory(tmp_path)
+    assert result.uploaded == [] and isinstance(result.errors["a.pdf"], ValueError)
+    assert client.sync_directory(tmp_path).uploaded == ["a.pdf"]
+    with pytest.raises(ValueError, match="max_workers"):
+        client.sync_directory(tmp_path, max_workers=0)
+
+
+def _fake_documents(base_url):
+    """Registers an in-memory document store, returns it and the log of its writes."""
+    store = {}
+    writes = []
+
+    def document(name, metadata):
+        return {
+            "id": 1,
+            "name": name,
+            "metadata": metadata,
+            "num_pages": 1,
+            "collection_name": "default collection",
+        }
+
+    def get(request):
+        name = request.path_url.split("/")[3]
+        if name not in store:
+            return (404, {}, json.dumps({"detail": "missing"}))
+        return (200, {}, json.dumps(document(name, store[name])))
+
+    def upsert(request):
+        body = request.body
+        if not isinstance(body, (bytes, str)):
+            body = b"".join(body)
+        payload = json.loads(body)
+        store[payload["name"]] = payload["metadata"]
+        writes.append(("POST", payload["name"]))
+        return (201, {}, json.dumps(document(payload["name"], payload["metadata"])))
+
+    def patch(request):
+        name = request.path_url.split("/")[3]
+        if name not in store:
+            return (404, {}, json.dumps({"detail": "missing"}))
+        payload = json.loads(request.body)
+        new_name = payload.get("name", name)
+        store[new_name] = payload["metadata"]
+        if new_name != name:
+            del store[name]
+        writes.append(("PATCH", name))
+        return (200, {}, json.dumps(document(new_name, store[new_name])))
+
+    def delete(request):
+        store.pop(request.path_url.split("/")[4], None)
+        writes.append(("DELETE", request.path_url.split("/")[4]))
+        return (204, {}, "")
+
+    documents = re.compile(f"{base_url}/v1/documents/[^/]+/")
+    responses.add_callback(
+        responses.POST, f"{base_url}/v1/documents/upsert-document/", callback=upsert
+    )
+    responses.add_callback(responses.GET, documents, callback=get)
+    responses.add_callback(responses.PATCH, documents, callback=patch)
+    responses.add_callback(
+        responses.DELETE,
+        re.compile(f"{base_url}/v1/documents/delete-document/[^/]+/"),
+        callback=delete,
+    )
+    return store, writes
+
+
+@pytest.mark.parametrize(
+    "source, changed",
+    [
+        (lambda: {"document_base64": "aGVsbG8="}, {"document_base64": "aGVsbG8h"}),
+        (lambda: {"document_data": b"hello"}, {"document_data": b"hello!"}),
+        (lambda: {"document_data": io.BytesIO(b"hello")}, {"document_data": b"x"}),
+    ],
+)
+@responses.activate
+def test_upsert_document_fingerprint(api_key, source, changed):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    store, writes = _fake_documents(base_url)
+    first = source()
+    digest = colivara_client._fingerprint(
+        first.get("document_url"),
+        first.get("document_base64"),
+        None,
+        first.get("document_data"),
+    )
+
+    client.upsert_document("doc", {"a": 1}, fingerprint=True, **first)
+    assert store["doc"] == {"a": 1, "colivara_sha256": digest}
+    # unchanged, metadata only, content
+    unchanged = client.upsert_document("doc", {"a": 1}, fingerprint=True, **source())
+    assert unchanged.metadata == store["doc"]
+    client.upsert_document("doc", {"a": 2}, fingerprint=True, **source())
+    assert store["doc"] == {"a": 2, "colivara_sha256": digest}
+    client.upsert_document("doc", {"a": 2}, fingerprint=True, **changed)
+    assert store["doc"]["colivara_sha256"] != digest
+    assert writes == [("POST", "doc"), ("PATCH", "doc"), ("POST", "doc")]
+
+
+@responses.activate
+def test_upsert_document_fingerprint_sources(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    store, writes = _fake_documents(base_url)
+    test_file = tmp_path / "report.pdf"
+    test_file.write_bytes(b"%PDF")
+    expected = hashlib.sha256(b"%PDF").hexdigest()
+
+    client.upsert_documents([test_file], fingerprint=True)
+    client.upsert_document("report.pdf", fingerprint=True, document_base64="JVBERg==")
+    client.upsert_document(
+        "report.pdf", document_path=test_file, stream=True, fingerprint=True
+    )
+    assert store["report.pdf"] == {"colivara_sha256": expected}
+    assert writes == [("POST", "report.pdf")]
+    # the content behind a URL may change, URL documents are always uploaded
+    for _ in range(2):
+        client.upsert_document(
+            "linked.pdf", document_url="https://x.com/a.pdf", fingerprint=True
+        )
+    assert store["linked.pdf"] == {}
+    assert writes[1:] == [("POST", "linked.pdf"), ("POST", "linked.pdf")]
+    # sources that cannot be hashed are left to the upload to report
+    with pytest.raises(ValueError, match="seekable"):
+        client.upsert_document(
+            "x", document_data=_NonSeekable(b"%PDF"), fingerprint=True
+        )
+    for invalid in ({"document_path": tmp_path / "missing.pdf"}, {}):
+        with pytest.raises((ValueError, FileNotFoundError)):
+            client.upsert_document("x", fingerprint=True, **invalid)
+    assert "x" not in store
+    assert colivara_client._fingerprint(None, "a", None) is None
+
+
+class _NonSeekable(io.BytesIO):
+    def seekable(self):
+        return False
+
+
+@responses.activate
+def test_sync_directory_renames(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    store, writes = _fake_documents(base_url)
+    (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF b")
+    (tmp_path / "c.pdf").write_bytes(b"%PDF c")
+    client.sync_directory(tmp_path)
+    writes.clear()
+
+    # a moved, b copied, c moved but its document is gone
+    (tmp_path / "q1").mkdir()
+    (tmp_path / "a.pdf").rename(tmp_path / "q1" / "a.pdf")
+    (tmp_path / "q1" / "b.pdf").write_bytes(b"%PDF b")
+    (tmp_path / "c.pdf").rename(tmp_path / "q1" / "c.pdf")
+    del store["c.pdf"]
+    result = client.sync_directory(tmp_path)
+    assert result.ok and result.renamed == {"a.pdf": "q1__a.pdf"}
+    assert sorted(result.uploaded) == ["q1__b.pdf", "q1__c.pdf"]
+    assert result.deleted == ["c.pdf"]
+    assert sorted(store) == ["b.pdf", "q1__a.pdf", "q1__b.pdf", "q1__c.pdf"]
+    assert store["q1__a.pdf"] == {
+        "source_path": "q1/a.pdf",
+        "colivara_sha256": hashlib.sha256(b"%PDF a").hexdigest(),
+    }
+    assert sorted(writes) == [
+        ("DELETE", "c.pdf"),
+        ("PATCH", "a.pdf"),
+        ("POST", "q1__b.pdf"),
+        ("POST", "q1__c.pdf"),
+    ]
+    writes.clear()
+    assert client.sync_directory(tmp_path).unchanged == 4 and writes == []
+
+
+@responses.activate
+def test_sync_directory_rename_errors(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    store, _ = _fake_documents(base_url)
+    (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+    client.sync_directory(tmp_path)
+    (tmp_path / "a.pdf").rename(tmp_path / "b.pdf")
+    del store["a.pdf"]
+    responses.replace(
+        responses.POST, f"{base_url}/v1/documents/upsert-document/", status=500
+    )
+    result = client.sync_directory(tmp_path)
+    assert list(result.errors) == ["b.pdf"] and result.deleted == ["a.pdf"]
+
+
+@responses.activate
+def test_sync_directory_missing_documents(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    responses.add_callback(
+        responses.POST,
+        f"{base_url}/v1/documents/upsert-document/",
+        callback=_echo_document,
+    )
+    responses.add(
+        responses.DELETE,
+        f"{base_url}/v1/documents/delete-document/a.pdf/",
+        json={"detail": "Document not found"},
+        status=404,
+    )
+    (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+    client.sync_directory(tmp_path)
+    (tmp_path / "a.pdf").unlink()
+    result = client.sync_directory(tmp_path)
+    assert result.ok and result.deleted == ["a.pdf"]
+    assert client.sync_directory(tmp_path).deleted == []
+
+
+@responses.activate
+def test_sync_directory_name_collisions(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    store, writes = _fake_documents(base_url)
+    (tmp_path / "q1").mkdir()
+    (tmp_path / "q1" / "a.pdf").write_bytes(b"%PDF a")
+    client.sync_directory(tmp_path)
+    writes.clear()
+
+    (tmp_path / "q1__a.pdf").write_bytes(b"%PDF other")
+    result = client.sync_directory(tmp_path)
+    assert list(result.errors) == ["q1__a.pdf"] and not result.ok
+    assert "q1/a.pdf and q1__a.pdf" in str(result.errors["q1__a.pdf"])
+    assert writes == [] and result.deleted == []
+
+    # once one of them is gone, the other one owns the document
+    (tmp_path / "q1" / "a.pdf").unlink()
+    result = client.sync_directory(tmp_path)
+    assert result.ok and result.uploaded == ["q1__a.pdf"] and result.deleted == []
+    assert writes == [("POST", "q1__a.pdf")]
+    assert store["q1__a.pdf"]["source_path"] == "q1__a.pdf"
+
+
+@responses.activate
+def test_sync_directory_unreadable_files(api_key, tmp_path, monkeypatch):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    store, writes = _fake_documents(base_url)
+    (tmp_path / "a.pdf").write_bytes(b"%PDF a")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF b")
+    client.sync_directory(tmp_path)
+    writes.clear()
+    sha256 = colivara_client.file_sha256
+
+    def unreadable(error):
+        def file_sha256(path):
+            if path.name == "a.pdf":
+                raise error
+            return sha256(path)
+
+        return file_sha256
+
+    # a.pdf cannot be read, its document is kept and the rest of the sync goes on
+    (tmp_path / "a.pdf").write_bytes(b"%PDF a2")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF b2")
+    monkeypatch.setattr(
+        colivara_client, "file_sha256", unreadable(PermissionError("denied"))
+    )
+    result = client.sync_directory(tmp_path)
+    assert isinstance(result.errors["a.pdf"], PermissionError)
+    assert result.uploaded == ["b.pdf"] and result.deleted == []
+    assert writes == [("POST", "b.pdf")]
+
+    # unexpected errors stop the listing, the started uploads are still recorded
+    (tmp_path / "0.pdf").write_bytes(b"%PDF 0")
+    monkeypatch.setattr(
+        colivara_client, "file_sha256", unreadable(RuntimeError("boom"))
+    )
+    result = client.sync_directory(tmp_path)
+    assert result.uploaded == ["0.pdf"] and result.deleted == []
+    assert isinstance(result.errors[str(tmp_path)], RuntimeError)
+    monkeypatch.setattr(colivara_client, "file_sha256", sha256)
+    result = client.sync_directory(tmp_path)
+    assert result.ok and result.uploaded == ["a.pdf"] and result.unchanged == 2
+    assert sorted(store) == ["0.pdf", "a.pdf", "b.pdf"]
+
+
+@responses.activate
+def test_upsert_documents_streams_files_within_budget(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    received = []
+
+    def consume(request):
+        # read the body chunk by chunk, as a socket would
+        received.append(sum(len(chunk) for chunk in request.body))
+        document = {"id": 1, "name": "doc", "num_pages": 1, "collection_name": "c"}
+        return (201, {}, json.dumps(document))
+
+    responses.add_callback(
+        responses.POST,
+        f"{base_url}/v1/documents/upsert-document/",
+        callback=consume,
+    )
+    for index in range(6):
+        (tmp_path / f"{index}.pdf").write_bytes(os.urandom(2 * 1024 * 1024))
+    budget = 1024 * 1024
+
+    tracemalloc.start()
+    try:
+        results = client.upsert_documents(
+            sorted(tmp_path.glob("*.pdf")), max_workers=2, max_in_flight_bytes=budget
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert all(result.ok for result in results) and len(received) == 6
+    assert min(received) > 2 * 1024 * 1024 * 4 // 3
+    assert peak < budget
+
+
+@responses.activate
+def test_upsert_documents_bounds_in_flight_bytes(api_key):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def slow_upload(request):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.pop()
+        return _echo_document(request)
+
+    responses.add_callback(
+        responses.POST,
+        f"{base_url}/v1/documents/upsert-document/",
+        callback=slow_upload,
+    )
+    documents = ({"name": f"doc-{i}", "document_base64": "a" * 100} for i in range(6))
+
+    results = client.upsert_documents(documents, max_workers=4, max_in_flight_bytes=250)
+
+    assert all(result.ok for result in results)
+    # only two 100 byte documents fit in the 250 byte budget at once
+    assert max(peak) == 2
+
+    with pytest.raises(ValueError, match="max_workers must be at least 1."):
+        client.upsert_documents([], max_workers=0)
+
+
 @responses.activate
 def test_get_document(api_key):
     os.environ["COLIVARA_API_KEY"] = api_key
@@ -808,6 +1419,165 @@ def test_list_documents(api_key):
     assert documents[1].name == "document2"
 
 
+@responses.activate
+def test_iter_documents(api_key, monkeypatch):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    documents = [
+        {
+            "id": i,
+            "name": f"document{i}",
+            "collection_name": "all",
+            "num_pages": 1,
+            "pages": [
+                {
+                    "document_name": f"document{i}",
+                    "img_base64": "aW1n",
+                    "page_number": 1,
+                }
+            ],
+        }
+        for i in range(5)
+    ]
+    responses.add(responses.GET, f"{base_url}/v1/documents/", json=documents)
+    batches = []
+    parse = colivara_client._parse_documents
+
+    def record(items, json_backend):
+        batches.append(len(items))
+        return parse(items, json_backend)
+
+    monkeypatch.setattr(colivara_client, "_parse_documents", record)
+
+    iterator = client.iter_documents("all", expand="pages", batch_size=2)
+    # nothing is requested before the first iteration
+    assert len(responses.calls) == 0
+    assert list(iterator) == [DocumentOut(**document) for document in documents]
+    # validated two documents at a time
+    assert batches == [2, 2, 1]
+    assert responses.calls[0].request.params == {
+        "collection_name": "all",
+        "expand": "pages",
+    }
+    assert [document.pages for document in client.iter_documents(skip_pages=True)] == [
+        None
+    ] * 5
+
+
+@responses.activate
+def test_iter_document_pages(api_key):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    pages = [
+        {"document_name": "doc", "img_base64": "aW1n" * 1000, "page_number": i}
+        for i in range(1, 4)
+    ]
+    document = {
+        "id": 1,
+        "name": "doc",
+        "metadata": {"pages": 3},
+        "collection_name": "my_collection",
+        "num_pages": 3,
+        "pages": pages,
+    }
+    url = f"{base_url}/v1/documents/doc/"
+    responses.add(responses.GET, url, json=document)
+    responses.add(responses.GET, url, json={"detail": "missing"}, status=404)
+    responses.add(responses.GET, url, status=500)
+    responses.add(responses.GET, url, status=204)
+
+    found = client.iter_document_pages("doc", "my_collection")
+    assert next(found) == PageOut(**pages[0])
+    assert list(found) == [PageOut(**page) for page in pages[1:]]
+    assert responses.calls[0].request.params == {
+        "collection_name": "my_collection",
+        "expand": "pages",
+    }
+    with pytest.raises(ValueError, match="Document not found: missing"):
+        list(client.iter_document_pages("doc"))
+    with pytest.raises(HTTPError):
+        list(client.iter_document_pages("doc"))
+    assert list(client.iter_document_pages("doc")) == []
+
+
+@responses.activate
+def test_export_pages(api_key, tmp_path):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    png = base64.b64encode(b"\x89PNG\r\n\x1a\n" + b"\x00" * 8).decode()
+    document = {
+        "id": 1,
+        "name": "doc.pdf",
+        "metadata": {},
+        "collection_name": "my_collection",
+        "num_pages": 3,
+        "pages": [{"img_base64": png, "page_number": i} for i in range(1, 4)],
+    }
+    url = f"{base_url}/v1/documents/doc.pdf/"
+    responses.add(responses.GET, url, json=document)
+    responses.add(responses.GET, url, json={"detail": "missing"}, status=404)
+
+    paths = client.export_pages("doc.pdf", tmp_path, "my_collection", max_workers=1)
+    assert paths == [
+        tmp_path / "my_collection" / "doc.pdf" / f"page_000{i}.png" for i in range(1, 4)
+    ]
+    assert all(path.read_bytes().startswith(b"\x89PNG") for path in paths)
+    with pytest.raises(ValueError, match="Document not found: missing"):
+        client.export_pages("doc.pdf", tmp_path)
+
+
+@responses.activate
+def test_iter_documents_errors(api_key):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    url = f"{base_url}/v1/documents/"
+    responses.add(responses.GET, url, json={"detail": "boom"}, status=500)
+    responses.add(responses.GET, url, status=204)
+    responses.add(responses.GET, url, body=b'[{"id": 1, "name": "a"')
+    with pytest.raises(HTTPError):
+        list(client.iter_documents())
+    assert list(client.iter_documents()) == []
+    with pytest.raises(ValueError, match="incomplete JSON array"):
+        list(client.iter_documents())
+
+
+@pytest.mark.parametrize("json_backend", ["pydantic", "orjson"])
+@responses.activate
+def test_json_backends_parse_the_same(api_key, json_backend):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key, json_backend=json_backend)
+    document = {
+        "id": 1,
+        "name": "document1",
+        "metadata": {"tags": ["a", "ü"]},
+        "collection_name": "default collection",
+        "num_pages": 1,
+        "pages": [
+            {"document_name": "document1", "img_base64": "aW1n", "page_number": 1}
+        ],
+    }
+    responses.add(responses.GET, f"{base_url}/v1/documents/", json=[document])
+    responses.add(
+        responses.GET,
+        f"{base_url}/v1/collections/",
+        json={"unexpected": "format"},
+    )
+
+    documents = client.list_documents()
+    assert documents == [DocumentOut(**document)]
+    assert documents[0].pages[0].image_bytes() == b"img"
+    with pytest.raises(ValueError, match="Unexpected response format"):
+        client.list_collections()
+
+
+def test_json_backend_validation(api_key, monkeypatch):
+    with pytest.raises(ValueError, match="Invalid json_backend: ujson"):
+        Colivara(api_key=api_key, json_backend="ujson")
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    with pytest.raises(ImportError, match=r"colivara-py\[orjson\]"):
+        Colivara(api_key=api_key, json_backend="orjson")
+
+
 @responses.activate
 def test_list_documents_http_error(api_key):
     os.environ["COLIVARA_API_KEY"] = api_key
@@ -823,6 +1593,94 @@ def test_list_documents_http_error(api_key):
         client.list_documents()
 
 
+def _listed(*names):
+    return [
+        {
+            "id": i,
+            "name": name,
+            "metadata": {},
+            "num_pages": 1,
+            "collection_name": "test_collection",
+        }
+        for i, name in enumerate(names)
+    ]
+
+
+@responses.activate
+def test_wait_for_documents(api_key, sleeps):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    for listed in (
+        _listed("other"),
+        _listed("other"),
+        _listed("other", "doc-2"),
+        _listed("other", "doc-2"),
+        _listed("doc-1", "doc-2", "doc-3"),
+    ):
+        responses.add(
+            responses.GET, f"{base_url}/v1/documents/", json=listed, status=200
+        )
+
+    documents = client.wait_for_documents(
+        ["doc-1", "doc-2", "doc-3"],
+        collection_name="test_collection",
+        poll_interval=1,
+        max_poll_interval=3,
+    )
+
+    assert [document.name for document in documents] == ["doc-2", "doc-1", "doc-3"]
+    # one list call per poll for the whole batch
+    assert len(responses.calls) == 5
+    assert responses.calls[0].request.params == {"collection_name": "test_collection"}
+    # backs off while idle and resets after progress
+    assert sleeps == [1, 2, 1, 2]
+
+
+@responses.activate
+def test_wait_for_documents_timeout(api_key, sleeps, monkeypatch):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    responses.add(
+        responses.GET, f"{base_url}/v1/documents/", json=_listed("doc-1"), status=200
+    )
+    clock = iter([100.0, 101.0, 104.5, 106.0])
+    monkeypatch.setattr("colivara_py.client.time.monotonic", lambda: next(clock))
+
+    documents = client.wait_for_documents(
+        ["doc-1", "doc-2", "doc-3"], timeout=5, poll_interval=2
+    )
+    assert next(documents).name == "doc-1"
+    with pytest.raises(
+        TimeoutError, match="Timed out waiting for documents: doc-2, doc-3"
+    ):
+        next(documents)
+    # the last sleep is cut short by the deadline
+    assert sleeps == [2, 0.5]
+
+
+@responses.activate
+def test_wait_for_documents_fingerprints(api_key, sleeps):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    for digest in ("old", "new"):
+        listed = _listed("doc-1", "doc-2")
+        listed[0]["metadata"] = {"colivara_sha256": digest}
+        responses.add(
+            responses.GET, f"{base_url}/v1/documents/", json=listed, status=200
+        )
+
+    documents = client.wait_for_documents(
+        {"doc-1": "new", "doc-2": None}, collection_name="test_collection"
+    )
+    assert [document.name for document in documents] == ["doc-2", "doc-1"]
+    assert len(responses.calls) == 2 and sleeps == [1.0]
+
+
+def test_wait_for_documents_nothing_pending(api_key):
+    client = Colivara(base_url="https://api.test.com", api_key=api_key)
+    assert list(client.wait_for_documents([], timeout=None)) == []
+
+
 @responses.activate
 def test_delete_document(api_key):
     os.environ["COLIVARA_API_KEY"] = api_key
@@ -854,6 +1712,7 @@ def test_delete_document_error(api_key):
 
     with pytest.raises(ValueError, match="Deletion failed: Document not found"):
         client.delete_document("non_existent_document")
+    assert client.delete_document("non_existent_document", missing_ok=True) is None
 
 
 @responses.activate
@@ -1019,6 +1878,411 @@ def test_search_http_error(api_key):
         client.search("what is 1+1?")
 
 
+def _answer_search(request):
+    payload = json.loads(request.body)
+    if payload["query"] == "broken":
+        return (500, {}, json.dumps({"detail": "boom"}))
+    # later queries answer first
+    time.sleep(0.02 if payload["query"] == "first" else 0)
+    result = {"query": payload["query"], "results": []}
+    return (200, {}, json.dumps(result))
+
+
+@responses.activate
+def test_search_cache(api_key):
+    base_url = "https://api.test.com"
+    cache = TTLCache(maxsize=100, max_bytes=10_000)
+    client = Colivara(base_url=base_url, api_key=api_key, search_cache=cache)
+    responses.add_callback(
+        responses.POST, f"{base_url}/v1/search/", callback=_answer_search
+    )
+    responses.add(
+        responses.POST,
+        f"{base_url}/v1/documents/upsert-document/",
+        json={"detail": "queued"},
+        status=202,
+    )
+    responses.add(
+        responses.PATCH,
+        f"{base_url}/v1/documents/doc/",
+        json={"detail": "missing"},
+        status=404,
+    )
+    category = {"key": "category", "value": "AI", "lookup": "contains"}
+
+    first = client.search("q", collection_name="papers", query_filter=category)
+    assert client.search("q", collection_name="papers", query_filter=category) is first
+    client.search(
+        "q", collection_name="papers", query_filter=dict(category, value="ML")
+    )
+    client.search("q", collection_name="papers", top_k=5)
+    client.search("q", collection_name="notes")
+    client.search("q")
+    assert len(responses.calls) == 5
+    assert cache.info().currsize == 5
+    assert cache.info().currbytes == sum(
+        len(call.response.content) for call in responses.calls
+    )
+
+    # writing to "papers" drops its searches and the ones over all collections
+    client.upsert_document(
+        "doc", collection_name="papers", document_url="https://x.com"
+    )
+    assert cache.info().currsize == 1
+    client.search("q", collection_name="notes")
+    assert len(responses.calls) == 6
+
+    # the collection of a patched document is unknown: everything goes
+    with pytest.raises(ValueError):
+        client.partial_update_document("doc", name="renamed")
+    assert cache.info().currsize == 0
+
+
+@responses.activate
+def test_search_cache_invalidation(api_key):
+    base_url = "https://api.test.com"
+    cache = TTLCache()
+    client = Colivara(base_url=base_url, api_key=api_key, search_cache=cache)
+    responses.add_callback(
+        responses.POST, f"{base_url}/v1/search/", callback=_answer_search
+    )
+    responses.add(
+        responses.PATCH,
+        f"{base_url}/v1/collections/papers/",
+        json={"detail": "missing"},
+        status=404,
+    )
+    responses.add(responses.DELETE, f"{base_url}/v1/collections/notes/", status=204)
+    responses.add(
+        responses.DELETE, f"{base_url}/v1/documents/delete-document/doc/", status=204
+    )
+    responses.add(
+        responses.GET, f"{base_url}/v1/documents/", json=_listed("doc"), status=200
+    )
+
+    def search_everything():
+        for collection_name in ("papers", "notes", "test_collection", "all"):
+            client.search("q", collection_name=collection_name)
+
+    search_everything()
+    with pytest.raises(Exception):
+        client.partial_update_collection("papers", metadata={"a": 1})
+    assert cache.info().currsize == 2
+    client.delete_collection("notes")
+    assert cache.info().currsize == 1
+
+    search_everything()
+    list(client.wait_for_documents(["doc"], collection_name="test_collection"))
+    assert cache.info().currsize == 2
+    client.delete_document("doc", collection_name="all")
+    assert cache.info().currsize == 0
+
+
+@responses.activate
+def test_search_cache_write_during_search(api_key):
+    base_url = "https://api.test.com"
+    cache = TTLCache()
+    client = Colivara(base_url=base_url, api_key=api_key, search_cache=cache)
+    writes = []
+
+    def search_while_deleting(request):
+        # the document is deleted while the search is answered
+        if not writes:
+            writes.append(client.delete_document("doc", collection_name="papers"))
+        return _answer_search(request)
+
+    responses.add_callback(
+        responses.POST, f"{base_url}/v1/search/", callback=search_while_deleting
+    )
+    responses.add(
+        responses.DELETE, f"{base_url}/v1/documents/delete-document/doc/", status=204
+    )
+
+    client.search("q", collection_name="papers")
+    assert cache.info().currsize == 0
+    client.search("q", collection_name="papers")
+    assert cache.info().currsize == 1
+
+
+@responses.activate
+def test_search_many(api_key):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    responses.add_callback(
+        responses.POST, f"{base_url}/v1/search/", callback=_answer_search
+    )
+
+    results = client.search_many(
+        ["first", "broken", "third", 4],
+        collection_name="my_collection",
+        top_k=5,
+        query_filter={"key": "category", "value": "AI", "lookup": "contains"},
+        max_workers=4,
+    )
+
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert [result.ok for result in results] == [True, False, True, False]
+    assert results[0].result.query == "first"
+    assert isinstance(results[1].error, HTTPError)
+    assert isinstance(results[3].error, ValueError)
+    assert results[3].query == "4"
+    payload = json.loads(responses.calls[0].request.body)
+    assert payload["collection_name"] == "my_collection"
+    assert payload["top_k"] == 5
+    assert payload["query_filter"]["key"] == "category"
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_search_many_as_completed(api_key):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    responses.add_callback(
+        responses.POST, f"{base_url}/v1/search/", callback=_answer_search
+    )
+
+    results = list(client.search_many(["first", "second", "third"], as_completed=True))
+
+    assert sorted(result.query for result in results) == ["first", "second", "third"]
+    assert results[-1].query == "first"
+
+
+def test_search_many_invalid_parameters(api_key):
+    client = Colivara(base_url="https://api.test.com", api_key=api_key)
+    with pytest.raises(ValueError, match="Invalid query_filter"):
+        client.search_many(["q"], query_filter={"key": ["a"], "lookup": "contains"})
+    with pytest.raises(ValueError, match="max_workers must be at least 1."):
+        client.search_many(["q"], max_workers=0)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr("colivara_py.client.time.sleep", delays.append)
+    return delays
+
+
+@responses.activate
+def test_search_retries_transient_errors(api_key, sleeps):
+    base_url = "https://api.test.com"
+    client = Colivara(
+        base_url=base_url,
+        api_key=api_key,
+        retry_policy=RetryPolicy(max_attempts=4, jitter=False),
+    )
+    busy = {"detail": "Embedding service is busy."}
+    responses.add(responses.POST, f"{base_url}/v1/search/", json=busy, status=503)
+    responses.add(
+        responses.POST,
+        f"{base_url}/v1/search/",
+        json=busy,
+        status=429,
+        headers={"Retry-After": "2"},
+    )
+    responses.add(
+        responses.POST,
+        f"{base_url}/v1/search/",
+        json={"query": "what is 1+1?", "results": []},
+        status=200,
+    )
+
+    result = client.search("what is 1+1?")
+
+    assert isinstance(result, QueryOut)
+    assert len(responses.calls) == 3
+    assert client.last_retries == 2
+    assert sleeps == [0.5, 2.0]
+
+
+@responses.activate
+def test_retries_exhausted_surface_last_error(api_key, sleeps):
+    base_url = "https://api.test.com"
+    client = Colivara(
+        base_url=base_url,
+        api_key=api_key,
+        retry_policy=RetryPolicy(max_attempts=3, jitter=False),
+    )
+    responses.add(
+        responses.POST,
+        f"{base_url}/v1/embeddings/",
+        json={"detail": "busy"},
+        status=503,
+    )
+
+    with pytest.raises(Exception, match="Service Unavailable: busy"):
+        client.create_embedding("what is 1+1?")
+    assert len(responses.calls) == 3
+    assert client.last_retries == 2
+
+
+@responses.activate
+def test_retries_connection_errors(api_key, sleeps):
+    base_url = "https://api.test.com"
+    client = Colivara(
+        base_url=base_url,
+        api_key=api_key,
+        retry_policy=RetryPolicy(max_attempts=2, jitter=False),
+    )
+    responses.add(
+        responses.GET,
+        f"{base_url}/v1/collections/",
+        body=requests.ConnectionError("reset"),
+    )
+    responses.add(responses.GET, f"{base_url}/v1/collections/", json=[], status=200)
+    assert client.list_collections() == []
+    assert client.last_retries == 1
+
+    responses.add(
+        responses.GET,
+        f"{base_url}/v1/collections/",
+        body=requests.ConnectionError("reset"),
+    )
+    with pytest.raises(requests.ConnectionError):
+        client.get_collection("missing")
+
+
+@responses.activate
+def test_unsafe_calls_are_not_retried(api_key, sleeps):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key, retry_policy=RetryPolicy())
+    responses.add(responses.POST, f"{base_url}/v1/collections/", status=503)
+    responses.add(
+        responses.POST, f"{base_url}/v1/documents/upsert-document/", status=503
+    )
+
+    with pytest.raises(HTTPError):
+        client.create_collection(name="new_collection")
+    # a one-shot stream cannot be sent twice
+    with pytest.raises(HTTPError):
+        client.upsert_document(name="doc", document_data=iter_file(b"%PDF"))
+    assert len(responses.calls) == 2
+    assert client.last_retries == 0
+    assert sleeps == []
+
+
+@responses.activate
+def test_renames_are_not_retried(api_key, sleeps):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key, retry_policy=RetryPolicy())
+    document_url = f"{base_url}/v1/documents/doc/"
+    collection_url = f"{base_url}/v1/collections/reports/"
+    responses.add(responses.PATCH, document_url, status=503)
+    responses.add(responses.PATCH, collection_url, status=503)
+
+    with pytest.raises(HTTPError):
+        client.partial_update_document("doc", name="renamed")
+    with pytest.raises(HTTPError):
+        client.partial_update_collection("reports", name="renamed")
+    assert len(responses.calls) == 2 and sleeps == []
+
+    document = {
+        "id": 1,
+        "name": "doc",
+        "metadata": {"a": 1},
+        "num_pages": 1,
+        "collection_name": "default collection",
+    }
+    collection = {"id": 1, "name": "reports", "metadata": {"a": 1}, "num_documents": 0}
+    responses.reset()
+    for url, body in ((document_url, document), (collection_url, collection)):
+        responses.add(responses.PATCH, url, status=503)
+        responses.add(responses.PATCH, url, json=body, status=200)
+    client.partial_update_document("doc", metadata={"a": 1})
+    client.partial_update_collection("reports", metadata={"a": 1})
+    assert len(sleeps) == 2
+
+
+@responses.activate
+def test_retried_deletes_accept_not_found(api_key, sleeps):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key, retry_policy=RetryPolicy())
+    document_url = f"{base_url}/v1/documents/delete-document/doc/"
+    collection_url = f"{base_url}/v1/collections/reports/"
+    for url in (document_url, collection_url):
+        # the first attempt went through but its response was lost
+        responses.add(responses.DELETE, url, body=requests.ConnectionError("reset"))
+        responses.add(responses.DELETE, url, json={"detail": "Not found"}, status=404)
+
+    assert client.delete_document("doc") is None
+    assert client.delete_collection("reports") is None
+    assert client.last_retries == 1
+    with pytest.raises(ValueError, match="Deletion failed"):
+        client.delete_document("doc")
+    with pytest.raises(Exception, match="not found"):
+        client.delete_collection("reports")
+
+
+@responses.activate
+def test_waiting_upserts_only_retry_rejections(api_key, sleeps):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key, retry_policy=RetryPolicy())
+    url = f"{base_url}/v1/documents/upsert-document/"
+    responses.add(responses.POST, url, status=504)
+    responses.add(responses.POST, url, body=requests.ReadTimeout("slow"))
+    responses.add(responses.POST, url, status=503)
+    responses.add_callback(responses.POST, url, callback=_echo_document)
+
+    with pytest.raises(HTTPError):
+        client.upsert_document("doc", document_base64="aGVsbG8=", wait=True)
+    with pytest.raises(requests.ReadTimeout):
+        client.upsert_document("doc", document_base64="aGVsbG8=", wait=True)
+    assert sleeps == []
+    document = client.upsert_document("doc", document_base64="aGVsbG8=", wait=True)
+    assert document.name == "doc" and client.last_retries == 1
+
+    # without waiting, a gateway error is retried
+    responses.add(responses.POST, url, status=504)
+    responses.add_callback(responses.POST, url, callback=_echo_document)
+    client.upsert_document("doc", document_base64="aGVsbG8=")
+    assert client.last_retries == 1
+
+
+@responses.activate
+def test_waiting_upserts_only_retry_failures_to_connect(api_key, sleeps):
+    base_url = "https://api.test.com"
+    client = Colivara(
+        base_url=base_url, api_key=api_key, retry_policy=RetryPolicy(max_attempts=5)
+    )
+    url = f"{base_url}/v1/documents/upsert-document/"
+    refused = requests.ConnectionError(
+        MaxRetryError(None, url, NewConnectionError(None, "Connection refused"))
+    )
+    # dropped after the body was sent
+    disconnected = requests.ConnectionError(
+        ProtocolError("Connection aborted.", RemoteDisconnected("closed"))
+    )
+    responses.add(responses.POST, url, body=refused)
+    responses.add(responses.POST, url, body=requests.ConnectTimeout("connect"))
+    responses.add(responses.POST, url, body=disconnected)
+    responses.add_callback(responses.POST, url, callback=_echo_document)
+
+    with pytest.raises(requests.ConnectionError, match="Connection aborted"):
+        client.upsert_document("doc", document_base64="aGVsbG8=", wait=True)
+    assert client.last_retries == 2 and len(responses.calls) == 3
+    document = client.upsert_document("doc", document_base64="aGVsbG8=", wait=True)
+    assert document.name == "doc"
+
+
+@responses.activate
+def test_no_retries_without_policy(api_key):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    responses.add(
+        responses.POST, f"{base_url}/v1/search/", json={"detail": "busy"}, status=503
+    )
+    with pytest.raises(ValueError, match="Service unavailable: busy"):
+        client.search("what is 1+1?")
+    assert len(responses.calls) == 1
+
+
+def iter_file(data):
+    """A readable, non-seekable file object."""
+    read, write = os.pipe()
+    os.write(write, data)
+    os.close(write)
+    return os.fdopen(read, "rb", buffering=0)
+
+
 @pytest.fixture
 def test_file_path(tmp_path):
     file_content = b"Test file content"
@@ -1178,6 +2442,75 @@ def test_create_embedding(api_key):
         client.create_embedding(123, task="query")
 
 
+def _embed(request):
+    payload = json.loads(request.body)
+    data = [
+        {"object": "embedding", "embedding": [[float(len(text))]], "index": index}
+        for index, text in enumerate(payload["input_data"])
+    ]
+    usage = {"prompt_tokens": len(data)}
+    return (200, {}, json.dumps({"data": data, "model": "colpali", "usage": usage}))
+
+
+@responses.activate
+def test_create_embedding_cache(api_key):
+    base_url = "https://api.test.com"
+    cache = TTLCache(maxsize=100, ttl=60)
+    client = Colivara(base_url=base_url, api_key=api_key, embedding_cache=cache)
+    responses.add_callback(
+        responses.POST, f"{base_url}/v1/embeddings/", callback=_embed
+    )
+
+    first = client.create_embedding(["a", "bb"])
+    assert [item["embedding"] for item in first.data] == [[[1.0]], [[2.0]]]
+
+    # only the misses are sent, once each, and merged back in order
+    second = client.create_embedding(["ccc", "a", "dddd", "bb", "ccc"])
+    assert json.loads(responses.calls[-1].request.body)["input_data"] == [
+        "ccc",
+        "dddd",
+    ]
+    assert [item["embedding"][0][0] for item in second.data] == [3, 1, 4, 2, 3]
+    assert [item["index"] for item in second.data] == [0, 1, 2, 3, 4]
+    assert second.model == "colpali"
+    assert second.usage == {"prompt_tokens": 2}
+
+    # fully cached: no request at all
+    third = client.create_embedding("bb")
+    assert third.data[0]["embedding"] == [[2.0]]
+    assert third.usage == {}
+    assert len(responses.calls) == 2
+    assert cache.info()[:2] == (3, 5)
+
+    # image embeddings are not cached
+    client.create_embedding(["aW1n"], task="image")
+    client.create_embedding(["aW1n"], task="image")
+    assert len(responses.calls) == 4
+
+
+@responses.activate
+def test_create_embedding_as_arrays(api_key):
+    base_url = "https://api.test.com"
+    cache = TTLCache()
+    client = Colivara(base_url=base_url, api_key=api_key)
+    responses.add_callback(
+        responses.POST, f"{base_url}/v1/embeddings/", callback=_embed
+    )
+
+    arrays = client.create_embedding(["a", "bbb"], as_arrays=True, dtype="float16")
+    assert [array.tolist() for array in arrays] == [[[1.0]], [[3.0]]]
+    assert arrays[0].dtype == "float16"
+    assert arrays.token_counts.tolist() == [1, 1]
+    assert arrays.model == "colpali"
+
+    # cached embeddings are converted as well
+    client.embedding_cache = cache
+    for _ in range(2):
+        arrays = client.create_embedding(["bb"], as_arrays=True)
+        assert arrays[0].tolist() == [[2.0]]
+    assert len(responses.calls) == 2
+
+
 @responses.activate
 def test_create_embedding_http_error(api_key):
     os.environ["COLIVARA_API_KEY"] = api_key
@@ -1196,13 +2529,6 @@ def test_create_embedding_http_error(api_key):
 """ MISC TESTS """
 
 
-def test_async_colivara_not_implemented():
-    with pytest.raises(
-        NotImplementedError, match="AsyncColivara is not implemented yet."
-    ):
-        AsyncColivara()
-
-
 def test_patch_collection_in_invalid_name():
     with pytest.raises(ValueError, match="Collection name 'all' is not allowed."):
         PatchCollectionIn(name="all", metadata={"key": "value"})
@@ -1275,3 +2601,236 @@ def test_query_filter_validation(on, key, value, lookup, should_raise):
         assert filter_instance.key == key if isinstance(key, list) else [key]
         assert filter_instance.value == value
         assert filter_instance.lookup == lookup
+
+
+def test_page_image_accessors(tmp_path):
+    png = b"\x89PNG\r\n\x1a\n" + bytes(range(32))
+    encoded = base64.b64encode(png).decode()
+
+    page = FileOut(img_base64=encoded, page_number=1)
+    assert page.image_bytes() == png
+    # decoded once, then served from the object
+    assert page.image_bytes() is page.image_bytes()
+    assert page.save(tmp_path / "page-1.png").read_bytes() == png
+
+    data_url = PageOut(img_base64=f"data:image/png;base64,{encoded}", page_number=2)
+    assert data_url.image_bytes() == png
+    assert data_url.model_dump()["img_base64"].startswith("data:image/png")
+
+    result = QueryOut(
+        query="q",
+        results=[
+            {
+                "collection_name": "c",
+                "collection_id": 1,
+                "document_name": "d",
+                "document_id": 1,
+                "page_number": 1,
+                "raw_score": 1.0,
+                "normalized_score": 1.0,
+                "img_base64": encoded,
+            }
+        ],
+    )
+    assert result.results[0].image_bytes() == png
+
+
+def _record_events(client):
+    log = []
+    for name in ("request_start", "retry", "request_end"):
+        client.event_hooks[name].append(
+            lambda event, name=name: log.append(
+                (name, event.method, event.endpoint, event.attempt, event.status)
+            )
+        )
+    return log
+
+
+@responses.activate
+def test_event_hooks_time_requests(api_key, sleeps):
+    base_url = "https://api.test.com"
+    ended = []
+    client = Colivara(
+        base_url=base_url,
+        api_key=api_key,
+        retry_policy=RetryPolicy(max_attempts=2, jitter=False),
+        event_hooks={"request_end": [ended.append]},
+    )
+    log = _record_events(client)
+    result = {"query": "what is 1+1?", "results": []}
+    responses.add(responses.POST, f"{base_url}/v1/search/", status=503)
+    responses.add(responses.POST, f"{base_url}/v1/search/", json=result)
+
+    client.search("what is 1+1?")
+    assert log == [
+        ("request_start", "POST", "/v1/search/", 1, None),
+        ("retry", "POST", "/v1/search/", 2, 503),
+        ("request_end", "POST", "/v1/search/", 2, 200),
+    ]
+    (event,) = ended
+    assert event.bytes_sent == len(responses.calls[1].request.body)
+    assert event.bytes_received == len(json.dumps(result))
+    assert event.serialize > 0 and event.parse > 0 and event.network >= 0.5
+    assert event.error is None and event.elapsed > event.network
+
+
+@responses.activate
+def test_event_hooks_end_every_request(api_key):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    log = _record_events(client)
+    responses.add(
+        responses.DELETE,
+        f"{base_url}/v1/documents/delete-document/doc/",
+        status=204,
+    )
+    responses.add(
+        responses.GET,
+        f"{base_url}/v1/documents/doc/",
+        json={"detail": "missing"},
+        status=404,
+    )
+    responses.add(responses.GET, f"{base_url}/v1/collections/", status=500)
+    responses.add(
+        responses.GET,
+        f"{base_url}/v1/collections/reports/",
+        body=requests.ConnectionError("reset"),
+    )
+    responses.add_callback(
+        responses.POST,
+        f"{base_url}/v1/documents/upsert-document/",
+        callback=_echo_document,
+    )
+
+    client.delete_document("doc")
+    with pytest.raises(ValueError):
+        client.get_document("doc")
+    with pytest.raises(HTTPError):
+        client.list_collections()
+    errors = []
+    client.event_hooks["request_end"].append(lambda event: errors.append(event.error))
+    with pytest.raises(requests.ConnectionError):
+        client.get_collection("reports")
+    assert isinstance(errors[0], requests.ConnectionError)
+    # the end of the lookup comes before the upload
+    client.upsert_document("doc", document_data=b"%PDF", fingerprint=True)
+    assert [entry[0:3] + entry[4:] for entry in log] == [
+        (
+            "request_start",
+            "DELETE",
+            "/v1/documents/delete-document/{document_name}/",
+            None,
+        ),
+        (
+            "request_end",
+            "DELETE",
+            "/v1/documents/delete-document/{document_name}/",
+            204,
+        ),
+        ("request_start", "GET", "/v1/documents/{document_name}/", None),
+        ("request_end", "GET", "/v1/documents/{document_name}/", 404),
+        ("request_start", "GET", "/v1/collections/", None),
+        ("request_end", "GET", "/v1/collections/", 500),
+        ("request_start", "GET", "/v1/collections/{collection_name}/", None),
+        ("request_end", "GET", "/v1/collections/{collection_name}/", None),
+        ("request_start", "GET", "/v1/documents/{document_name}/", None),
+        ("request_end", "GET", "/v1/documents/{document_name}/", 404),
+        ("request_start", "POST", "/v1/documents/upsert-document/", None),
+        ("request_end", "POST", "/v1/documents/upsert-document/", 201),
+    ]
+    assert client._local.pending is None
+
+
+@responses.activate
+def test_event_hooks_streams(api_key):
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    ended = []
+    client.event_hooks["request_end"].append(ended.append)
+    documents = [
+        {
+            "id": i,
+            "name": f"doc{i}",
+            "metadata": {},
+            "collection_name": "default collection",
+            "num_pages": 1,
+        }
+        for i in range(3)
+    ]
+    responses.add(
+        responses.GET,
+        f"{base_url}/v1/documents/",
+        json=documents,
+        auto_calculate_content_length=True,
+    )
+    responses.add(
+        responses.POST,
+        f"{base_url}/v1/documents/upsert-document/",
+        status=202,
+        json={"detail": "queued"},
+    )
+
+    batches = client.iter_documents(batch_size=2)
+    next(batches)
+    assert ended == []
+    batches.close()
+    assert ended[0].bytes_received == len(json.dumps(documents))
+    assert ended[0].parse == 0
+    client.upsert_document("doc", document_data=iter_file(b"%PDF"))
+    assert ended[1].bytes_sent is None and ended[1].status == 202
+
+
+@responses.activate
+def test_event_hooks_time_embedding_arrays(api_key):
+    pytest.importorskip("numpy")
+    base_url = "https://api.test.com"
+    client = Colivara(base_url=base_url, api_key=api_key)
+    ended = []
+    client.event_hooks["request_end"].append(ended.append)
+    embeddings = {
+        "data": [{"embedding": [[0.5, 1.0]], "index": 0}],
+        "model": "m",
+        "usage": {"total_tokens": 1},
+    }
+    responses.add(responses.POST, f"{base_url}/v1/embeddings/", json=embeddings)
+    client.create_embedding("a", as_arrays=True)
+    client.create_embedding("a")
+    assert [event.endpoint for event in ended] == ["/v1/embeddings/"] * 2
+    assert all(event.parse > 0 for event in ended)
+
+
+@responses.activate
+def test_request_stats(api_key, sleeps):
+    base_url = "https://api.test.com"
+    stats = RequestStats()
+    client = Colivara(
+        base_url=base_url,
+        api_key=api_key,
+        retry_policy=RetryPolicy(max_attempts=2, jitter=False),
+        request_stats=stats,
+    )
+    responses.add(responses.POST, f"{base_url}/v1/search/", status=503)
+    responses.add(
+        responses.POST, f"{base_url}/v1/search/", json={"query": "q", "results": []}
+    )
+    responses.add(
+        responses.GET,
+        f"{base_url}/v1/documents/missing/",
+        json={"detail": "missing"},
+        status=404,
+    )
+    client.search("q")
+    with pytest.raises(ValueError, match="Document not found"):
+        client.get_document("missing")
+
+    snapshot = client.stats()
+    assert client.event_hooks["request_end"] == [stats]
+    search = snapshot["POST /v1/search/"]
+    assert (search.requests, search.errors) == (1, 0)
+    assert search.p99 >= 0.5 and search.bytes_received > 0
+    document = snapshot["GET /v1/documents/{document_name}/"]
+    assert (document.requests, document.errors, document.error_rate) == (1, 1, 1.0)
+    assert 'endpoint="/v1/search/",quantile="0.99"' in stats.prometheus()
+
+    with pytest.raises(ValueError, match="request_stats=RequestStats()"):
+        Colivara(base_url=base_url, api_key=api_key).stats()
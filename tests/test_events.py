@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from colivara_py.events import RequestEvent, check_event_hooks, endpoint, instrumented
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/v1/search/", "/v1/search/"),
+        ("/v1/documents/", "/v1/documents/"),
+        ("/v1/documents/upsert-document/", "/v1/documents/upsert-document/"),
+        ("/v1/documents/report.pdf/", "/v1/documents/{document_name}/"),
+        (
+            "/v1/documents/delete-document/report.pdf/",
+            "/v1/documents/delete-document/{document_name}/",
+        ),
+        ("/v1/collections/", "/v1/collections/"),
+        ("/v1/collections/reports/", "/v1/collections/{collection_name}/"),
+    ],
+)
+def test_endpoint(path, expected):
+    assert endpoint(path) == expected
+
+
+def test_request_event():
+    event = RequestEvent("GET", "/v1/collections/reports/")
+    assert event.endpoint == "/v1/collections/{collection_name}/"
+    assert (event.attempt, event.status, event.error) == (1, None, None)
+    event.serialize, event.network, event.parse = 0.001, 0.01, 0.002
+    assert event.elapsed == pytest.approx(0.013)
+    assert repr(event) == (
+        "RequestEvent(GET /v1/collections/{collection_name}/ status=None "
+        "attempt=1 elapsed=13.0ms)"
+    )
+
+
+def test_check_event_hooks():
+    hooks = check_event_hooks({"request_end": (print,)})
+    assert hooks == {"request_start": [], "retry": [], "request_end": [print]}
+    assert check_event_hooks(None)["retry"] == []
+    with pytest.raises(ValueError, match="Unknown event hooks: request, response"):
+        check_event_hooks({"response": [], "request": []})
+
+
+class Recorder:
+    def __init__(self):
+        self.ended = 0
+
+    def _end_request(self):
+        self.ended += 1
+
+    @instrumented
+    def function(self, value):
+        return value
+
+    @instrumented
+    def generator(self, values):
+        yield from values
+
+    @instrumented
+    async def coroutine(self, value):
+        return value
+
+    @instrumented
+    async def async_generator(self, values):
+        for value in values:
+            yield value
+
+
+def test_instrumented():
+    recorder = Recorder()
+    assert recorder.function(1) == 1 and recorder.ended == 1
+    items = recorder.generator([1, 2])
+    assert next(items) == 1 and recorder.ended == 1
+    items.close()
+    assert recorder.ended == 2
+    assert asyncio.run(recorder.coroutine(3)) == 3 and recorder.ended == 3
+
+    async def consume():
+        items = recorder.async_generator([4, 5])
+        assert await items.__anext__() == 4
+        await items.aclose()
+        return [item async for item in recorder.async_generator([6])]
+
+    assert asyncio.run(consume()) == [6] and recorder.ended == 5
+    assert Recorder.function.__name__ == "function"
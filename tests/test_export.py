@@ -0,0 +1,126 @@
+import base64
+import os
+
+import pytest
+
+from colivara_py.export import export_pages
+from colivara_py.models import DocumentOut, PageOut, PageOutQuery, QueryOut
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 24
+JPEG = b"\xff\xd8\xff\xe0" + b"\x01" * 30
+
+
+def encode(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def result(
+    document_name: str, page_number: int, image: bytes, collection_name: str = "c"
+) -> PageOutQuery:
+    return PageOutQuery(
+        collection_name=collection_name,
+        collection_id=1,
+        document_name=document_name,
+        document_id=1,
+        page_number=page_number,
+        raw_score=1.0,
+        normalized_score=1.0,
+        img_base64=encode(image),
+    )
+
+
+def test_export_document(tmp_path):
+    document = DocumentOut(
+        id=1,
+        name="reports/q1.pdf",
+        num_pages=2,
+        collection_name="c",
+        pages=[
+            PageOut(page_number=1, img_base64=encode(PNG)),
+            PageOut(page_number=2, img_base64="data:image/jpeg;base64," + encode(JPEG)),
+        ],
+    )
+    paths = export_pages(document, tmp_path)
+    assert paths == [
+        tmp_path / "c" / "reports_q1.pdf" / "page_0001.png",
+        tmp_path / "c" / "reports_q1.pdf" / "page_0002.jpg",
+    ]
+    assert paths[0].read_bytes() == PNG and paths[1].read_bytes() == JPEG
+    assert sorted(os.listdir(tmp_path / "c" / "reports_q1.pdf")) == [
+        "page_0001.png",
+        "page_0002.jpg",
+    ]
+
+
+def test_export_query_results(tmp_path):
+    query = QueryOut(
+        query="q",
+        results=[
+            result("b.pdf", 3, JPEG),
+            result("a.pdf", 1, b"unknown"),
+            result("b.pdf", 3, PNG, collection_name="other"),
+        ],
+    )
+    # the same document name in two collections
+    paths = export_pages(query, str(tmp_path))
+    assert paths == [
+        tmp_path / "c" / "b.pdf" / "page_0003.jpg",
+        tmp_path / "c" / "a.pdf" / "page_0001.bin",
+        tmp_path / "other" / "b.pdf" / "page_0003.png",
+    ]
+    assert [path.read_bytes() for path in paths] == [JPEG, b"unknown", PNG]
+    # images of unknown format take the given one
+    assert export_pages(query.results[:2], tmp_path, format="jpeg") == [
+        tmp_path / "c" / "b.pdf" / "page_0003.jpeg",
+        tmp_path / "c" / "a.pdf" / "page_0001.jpeg",
+    ]
+
+
+def test_export_format_mismatch(tmp_path):
+    pages = [PageOut(document_name="doc", page_number=1, img_base64=encode(PNG))]
+    with pytest.raises(ValueError, match="Page 1 of doc is a png image, not jpg"):
+        export_pages(pages, tmp_path, format="jpg")
+    assert not (tmp_path / "doc").exists()
+    assert export_pages(pages, tmp_path, format=".PNG") == [
+        tmp_path / "doc" / "page_0001.PNG"
+    ]
+
+
+def test_export_streams_with_bounded_writes(tmp_path):
+    consumed = []
+
+    def pages():
+        for number in range(1, 11):
+            consumed.append(number)
+            yield PageOut(page_number=number, img_base64=encode(PNG + bytes([number])))
+
+    paths = export_pages(pages(), tmp_path, max_workers=1, document_name="..")
+    assert consumed == list(range(1, 11))
+    assert [path.read_bytes()[-1] for path in paths] == list(range(1, 11))
+    assert {path.parent.name for path in paths} == {"document"}
+    assert not list(tmp_path.glob("document/.*.tmp"))
+
+
+@pytest.mark.parametrize("skip_existing", ["size", "hash", None])
+def test_export_skips_existing_pages(tmp_path, skip_existing):
+    page = PageOut(document_name="doc", page_number=1, img_base64=encode(PNG))
+    (path,) = export_pages([page], tmp_path)
+    os.utime(path, (0, 0))
+    export_pages([page], tmp_path, skip_existing=skip_existing)
+    assert (path.stat().st_mtime == 0) == (skip_existing is not None)
+    # an image of the same size but different content
+    os.utime(path, (0, 0))
+    changed = PageOut(
+        document_name="doc", page_number=1, img_base64=encode(PNG[:-1] + b"\x01")
+    )
+    export_pages([changed], tmp_path, skip_existing=skip_existing)
+    assert (path.read_bytes() == PNG) == (skip_existing == "size")
+
+
+def test_export_errors(tmp_path):
+    with pytest.raises(ValueError, match="Invalid skip_existing: mtime"):
+        export_pages([], tmp_path, skip_existing="mtime")
+    assert export_pages([], tmp_path) == []
+    broken = PageOut(document_name="doc", page_number=1, img_base64="not base64!")
+    with pytest.raises(ValueError):
+        export_pages([broken], tmp_path)
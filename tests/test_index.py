@@ -0,0 +1,112 @@
+import importlib
+import json
+import sys
+
+import numpy as np
+import pytest
+
+from colivara_py.index import LocalIndex
+from colivara_py.maxsim import MaxSimScorer
+from colivara_py.models import QueryOut
+
+
+@pytest.fixture
+def documents():
+    rng = np.random.default_rng(0)
+    return [
+        [rng.standard_normal((n, 8)).astype(np.float32) for n in sizes]
+        for sizes in ([4, 9], [1], [12, 0, 6], [3])
+    ]
+
+
+def fill(index, documents):
+    for number, pages in enumerate(documents):
+        index.add(
+            f"doc{number}",
+            pages,
+            collection_name="even" if number % 2 == 0 else "odd",
+            metadata={"number": number},
+            images=["aW1n"] * len(pages),
+        )
+
+
+def test_add_and_search_persist(tmp_path, documents):
+    fill(LocalIndex(tmp_path / "index", block_size=16), documents)
+
+    index = LocalIndex(tmp_path / "index")
+    assert len(index) == 7 and index.dim == 8
+    assert index.tokens.dtype == np.float16 and isinstance(index.tokens, np.memmap)
+    pages = [page for pages in documents for page in pages]
+    query = np.random.default_rng(1).standard_normal((5, 8)).astype(np.float32)
+    expected_pages, expected_scores = MaxSimScorer(pages, np.float16).search([query], 3)
+
+    result = index.search(query, top_k=3, query="what?")
+    assert isinstance(result, QueryOut) and result.query == "what?"
+    first = result.results[0]
+    assert [r.raw_score for r in result.results] == pytest.approx(
+        expected_scores[0].tolist(), rel=1e-3
+    )
+    assert first.normalized_score == pytest.approx(first.raw_score / 5)
+    assert first.image_bytes() == b"img"
+    names = [(r.document_name, r.page_number) for r in result.results]
+    all_pages = [
+        (f"doc{d}", p + 1) for d, ps in enumerate(documents) for p in range(len(ps))
+    ]
+    assert names == [all_pages[i] for i in expected_pages[0]]
+    assert first.document_metadata == {"number": int(first.document_name[3:])}
+
+
+def test_search_by_collection(tmp_path, documents):
+    index = LocalIndex(tmp_path)
+    fill(index, documents)
+    query = np.ones((2, 8), np.float32)
+    odd = index.search(query, top_k=10, collection_name="odd")
+    assert {r.document_name for r in odd.results} == {"doc1", "doc3"}
+    assert {(r.collection_name, r.collection_id) for r in odd.results} == {("odd", 2)}
+    assert index.search(query, collection_name="missing").results == []
+
+    results = index.search_many([query, query[:1]], top_k=2)
+    assert [len(r.results) for r in results] == [2, 2]
+    assert [r.query for r in results] == ["", ""]
+
+
+def test_interrupted_add_is_rolled_back(tmp_path, documents):
+    index = LocalIndex(tmp_path)
+    fill(index, documents[:2])
+    # an add that wrote its data files but died before committing meta.json
+    for name in ("tokens.f16", "offsets.i64", "pages.jsonl", "rows.i64"):
+        with open(tmp_path / name, "ab") as file:
+            file.write(b"garbage")
+
+    index = LocalIndex(tmp_path)
+    assert len(index) == 3
+    index.add("doc9", documents[3], page_numbers=[7])
+    assert len(index) == 4
+    assert (tmp_path / "tokens.f16").stat().st_size == index.tokens.nbytes
+    best = index.search(documents[3][0], top_k=1).results[0]
+    assert (best.document_name, best.page_number, best.document_id) == ("doc9", 7, 3)
+
+
+def test_empty_index_and_validation(tmp_path):
+    index = LocalIndex(tmp_path)
+    assert index.search(np.ones((2, 8))).results == []
+    with pytest.raises(ValueError, match="embedding dimension"):
+        index.add("doc", [np.ones((2, 8)), np.ones((2, 4))])
+    index.add("doc", [np.ones((2, 8))], document_id=42)
+    with pytest.raises(ValueError, match="embedding dimension 8"):
+        index.add("doc", [np.ones((2, 4))])
+    with pytest.raises(ValueError, match="images must have one entry per page"):
+        index.add("doc", [np.ones((2, 8))], images=[])
+    assert index.search(np.ones((1, 8))).results[0].document_id == 42
+
+    meta = json.loads((tmp_path / "meta.json").read_text())
+    (tmp_path / "meta.json").write_text(json.dumps({**meta, "version": 99}))
+    with pytest.raises(ValueError, match="Unsupported index format version: 99"):
+        LocalIndex(tmp_path)
+
+
+def test_missing_numpy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    monkeypatch.delitem(sys.modules, "colivara_py.index")
+    with pytest.raises(ImportError, match=r"colivara-py\[numpy\]"):
+        importlib.import_module("colivara_py.index")
@@ -0,0 +1,44 @@
+import hashlib
+import json
+
+import pytest
+
+from colivara_py.manifest import FileEntry, SyncManifest, file_sha256
+
+
+def test_manifest_round_trip(tmp_path):
+    path = tmp_path / "sync" / "manifest.json"
+    manifest = SyncManifest(path, "reports")
+    manifest.files["q1/b.pdf"] = FileEntry(3, 10, "ab")
+    manifest.files["a.pdf"] = FileEntry(1, 20, "cd")
+    manifest.save()
+    assert list(path.parent.iterdir()) == [path]
+    loaded = SyncManifest.load(path, "reports")
+    assert loaded.files == manifest.files
+    assert list(json.loads(path.read_text())["files"]) == ["a.pdf", "q1/b.pdf"]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        None,
+        "not json",
+        "[]",
+        '{"version": 2, "collection_name": "reports", "files": {}}',
+        '{"version": 1, "collection_name": "other", "files": {"a": [1, 2, "x"]}}',
+        '{"version": 1, "collection_name": "reports", "files": {"a": [1]}}',
+    ],
+)
+def test_manifest_load_starts_over(tmp_path, content):
+    path = tmp_path / "manifest.json"
+    if content is not None:
+        path.write_text(content)
+    manifest = SyncManifest.load(path, "reports")
+    assert manifest.files == {} and manifest.collection_name == "reports"
+
+
+def test_file_sha256(tmp_path, monkeypatch):
+    monkeypatch.setattr("colivara_py.manifest.HASH_CHUNK_SIZE", 3)
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF-1.7")
+    assert file_sha256(path) == hashlib.sha256(b"%PDF-1.7").hexdigest()
@@ -0,0 +1,100 @@
+import importlib
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from colivara_py.arrays import EmbeddingArrays
+from colivara_py.maxsim import MaxSimScorer, top_k_scores
+
+
+def naive_scores(queries, pages):
+    return np.array(
+        [
+            [(q @ p.T).max(axis=1).sum() if len(q) and len(p) else 0 for p in pages]
+            for q in queries
+        ]
+    )
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    pages = [
+        rng.standard_normal((n, 8)).astype(np.float32) for n in [5, 0, 12, 1, 7, 30]
+    ]
+    queries = [rng.standard_normal((n, 8)).astype(np.float32) for n in [3, 0, 6]]
+    return queries, pages
+
+
+@pytest.mark.parametrize("block_size", [1, 40, 2**20])
+def test_score_matches_naive_maxsim(corpus, block_size):
+    queries, pages = corpus
+    scorer = MaxSimScorer(pages, block_size=block_size)
+    assert len(scorer) == 6 and scorer.dim == 8
+    scores = scorer.score(queries)
+    assert scores.shape == (3, 6) and scores.dtype == np.float32
+    np.testing.assert_allclose(scores, naive_scores(queries, pages), rtol=1e-5)
+
+
+def test_score_subset_and_from_flat(corpus):
+    queries, pages = corpus
+    scorer = MaxSimScorer(pages)
+    flat = MaxSimScorer.from_flat(scorer.tokens, scorer.offsets, block_size=20)
+    expected = naive_scores(queries, pages)
+    for subset in ([5, 2, 0], [2, 3, 4], [1], [4, 0, 4], [0, 3, 2, 4]):
+        np.testing.assert_allclose(
+            flat.score(queries, pages=np.array(subset)), expected[:, subset], rtol=1e-5
+        )
+
+
+def test_score_float16_storage(corpus):
+    queries, pages = corpus
+    scorer = MaxSimScorer(pages, dtype=np.float16)
+    assert scorer.tokens.dtype == np.float16
+    np.testing.assert_allclose(
+        scorer.score(queries), naive_scores(queries, pages), atol=0.05
+    )
+
+
+def test_score_edge_cases(corpus):
+    queries, pages = corpus
+    assert MaxSimScorer([]).score(queries).shape == (3, 0)
+    assert MaxSimScorer(pages).score([]).shape == (0, 6)
+    with pytest.raises(ValueError, match="different embedding dimensions"):
+        MaxSimScorer([np.ones((2, 8)), np.ones((2, 4))])
+    with pytest.raises(ValueError, match="embedding dimension of the pages: 8"):
+        MaxSimScorer(pages).score([np.ones((2, 4))])
+
+
+def test_search_and_top_k(corpus):
+    queries, pages = corpus
+    arrays = EmbeddingArrays(queries, "colpali", {})
+    indices, scores = MaxSimScorer(pages).search(arrays, top_k=2)
+    expected = naive_scores(queries, pages)
+    assert indices.shape == scores.shape == (3, 2)
+    for row, best in enumerate(np.argsort(-expected, axis=1, kind="stable")[:, :2]):
+        assert indices[row].tolist() == best.tolist()
+    np.testing.assert_allclose(
+        scores, np.take_along_axis(expected, indices, axis=1), rtol=1e-5
+    )
+
+    indices, scores = top_k_scores(np.array([[1.0, 3.0, 2.0]]), top_k=10)
+    assert indices.tolist() == [[1, 2, 0]] and scores.tolist() == [[3.0, 2.0, 1.0]]
+
+
+def test_scorer_is_shareable_between_threads(corpus):
+    queries, pages = corpus
+    scorer = MaxSimScorer(pages, block_size=16)
+    expected = scorer.score(queries)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: scorer.score(queries), range(16)))
+    assert all(np.array_equal(result, expected) for result in results)
+
+
+def test_missing_numpy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    monkeypatch.delitem(sys.modules, "colivara_py.maxsim")
+    with pytest.raises(ImportError, match=r"colivara-py\[numpy\]"):
+        importlib.import_module("colivara_py.maxsim")
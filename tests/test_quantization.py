@@ -0,0 +1,114 @@
+import importlib
+import sys
+
+import numpy as np
+import pytest
+
+from colivara_py import quantization
+from colivara_py.maxsim import MaxSimScorer
+from colivara_py.quantization import (
+    BinaryScorer,
+    Int8Scorer,
+    PQScorer,
+    kmeans,
+    rescored_search,
+)
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    pages = [
+        rng.standard_normal((n, 16)).astype(np.float32) for n in [30, 0, 25, 40, 10]
+    ]
+    queries = [
+        page[:6] + 0.1 * rng.standard_normal((6, 16)) for page in pages if len(page)
+    ]
+    return pages, [query.astype(np.float32) for query in queries]
+
+
+def test_int8_scorer_is_close_to_exact(corpus):
+    pages, queries = corpus
+    exact = MaxSimScorer(pages).score(queries)
+    scorer = Int8Scorer(pages)
+    assert scorer.codes.dtype == np.int8
+    np.testing.assert_allclose(scorer.score(queries), exact, rtol=0.02, atol=0.05)
+    assert MaxSimScorer(pages).nbytes / scorer.nbytes > 3
+
+
+def test_binary_scorer_is_hamming_maxsim(corpus):
+    pages, queries = corpus
+    scorer = BinaryScorer(pages, block_size=50)
+    assert scorer.bits.shape == (105, 2)
+
+    def signs(x):
+        return np.where(x > 0, 1, -1)
+
+    expected = [
+        [
+            (16 - 2 * (signs(q)[:, None] != signs(p)[None]).sum(-1)).max(1).sum()
+            if len(p)
+            else 0
+            for p in pages
+        ]
+        for q in queries
+    ]
+    np.testing.assert_array_equal(scorer.score(queries), expected)
+    assert scorer.nbytes < MaxSimScorer(pages).nbytes / 20
+
+
+def test_pq_scorer(corpus):
+    pages, queries = corpus
+    scorer = PQScorer(pages, subspaces=4, iterations=5)
+    assert scorer.codes.shape == (105, 4) and scorer.codes.dtype == np.uint8
+    # fewer tokens than 256 centroids: every token is its own centroid
+    assert scorer.centroids.shape == (4, 105, 4)
+    np.testing.assert_allclose(
+        scorer.score(queries), MaxSimScorer(pages).score(queries), rtol=1e-4
+    )
+    assert scorer.nbytes == 105 * 4 + 4 * 105 * 4 * 4 + 6 * 8
+    with pytest.raises(ValueError, match=r"subspaces \(5\) must divide"):
+        PQScorer(pages, subspaces=5)
+    with pytest.raises(ValueError, match="without any tokens"):
+        PQScorer([np.empty((0, 16))])
+
+
+def test_rescored_search_returns_exact_scores(corpus):
+    pages, queries = corpus
+    exact = MaxSimScorer(pages)
+    expected_indices, expected_scores = exact.search(queries, top_k=2)
+    indices, scores = rescored_search(
+        BinaryScorer(pages), exact, queries, top_k=2, candidate_count=4
+    )
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-6)
+    # the first stage keeps every page
+    indices, _ = rescored_search(BinaryScorer(pages), exact, queries[:1], top_k=10)
+    assert indices.shape == (1, 5)
+
+
+def test_kmeans_finds_clusters():
+    rng = np.random.default_rng(0)
+    centers = np.array([[0, 0], [10, 0], [0, 10]], dtype=np.float32)
+    points = np.concatenate(
+        [center + rng.standard_normal((50, 2)) for center in centers]
+    )
+    found = kmeans(points, 3, iterations=10, seed=1)
+    assert sorted(np.rint(found / 10).astype(int).tolist()) == [[0, 0], [0, 1], [1, 0]]
+    # more centroids than distinct points leave some empty, they are re-seeded
+    assert kmeans(np.zeros((4, 2)), 3, iterations=2).shape == (3, 2)
+
+
+def test_kmeans_seeds_many_centroids_at_random(monkeypatch):
+    monkeypatch.setattr(quantization, "KMEANS_PLUS_PLUS", 2)
+    points = np.random.default_rng(0).standard_normal((100, 4)).astype(np.float32)
+    centroids = kmeans(points, 10, iterations=0)
+    assert len({tuple(c) for c in centroids}) == 10
+    assert all((points == c).all(axis=1).any() for c in centroids)
+
+
+def test_missing_numpy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    monkeypatch.delitem(sys.modules, "colivara_py.quantization")
+    with pytest.raises(ImportError, match=r"colivara-py\[numpy\]"):
+        importlib.import_module("colivara_py.quantization")
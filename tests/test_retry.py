@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+from pydantic import ValidationError
+
+from colivara_py.retry import RetryPolicy
+
+
+def make_response(status_code, retry_after=None):
+    response = requests.Response()
+    response.status_code = status_code
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return response
+
+
+def test_retry_policy_backoff_is_exponential_and_capped():
+    policy = RetryPolicy(backoff_factor=0.5, max_backoff=3, jitter=False)
+    assert [policy.backoff(retry) for retry in range(1, 6)] == [0.5, 1, 2, 3, 3]
+
+
+def test_retry_policy_backoff_jitter():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=10)
+    delays = [policy.backoff(3) for _ in range(50)]
+    assert all(0 <= delay <= 4 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_retry_policy_delay_by_status():
+    policy = RetryPolicy(jitter=False)
+    assert policy.delay(1, make_response(503)) == 0.5
+    assert policy.delay(2, make_response(429)) == 1
+    assert policy.delay(1, make_response(500)) is None
+    assert policy.delay(1, make_response(404)) is None
+
+
+@pytest.mark.parametrize(
+    "retry_after, expected",
+    [
+        ("7", 7),
+        ("0.25", 0.25),
+        ("-3", 0),
+        ("soon", 0.5),
+        (format_datetime(datetime(2000, 1, 1, tzinfo=timezone.utc)), 0),
+        # longer than max_backoff: give up and hand the response back
+        ("120", None),
+    ],
+)
+def test_retry_policy_honors_retry_after(retry_after, expected):
+    policy = RetryPolicy(jitter=False, max_backoff=30)
+    assert policy.delay(1, make_response(503, retry_after)) == expected
+
+
+def test_retry_policy_retry_after_http_date():
+    policy = RetryPolicy(jitter=False, max_backoff=30)
+    date = datetime.now(timezone.utc) + timedelta(seconds=20)
+    delay = policy.delay(1, make_response(429, format_datetime(date)))
+    assert 15 < delay <= 20
+
+
+def test_retry_policy_can_ignore_retry_after():
+    policy = RetryPolicy(jitter=False, respect_retry_after=False)
+    assert policy.delay(1, make_response(503, "20")) == 0.5
+
+
+def test_retry_policy_validation():
+    with pytest.raises(ValidationError):
+        RetryPolicy(max_attempts=0)
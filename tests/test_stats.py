@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+from colivara_py.events import RequestEvent
+from colivara_py.stats import EndpointStats, LatencyHistogram, RequestStats
+
+
+def _event(method, path, elapsed, status=200, sent=10, received=100, error=None):
+    event = RequestEvent(method, path)
+    event.network = elapsed
+    event.status = status
+    event.bytes_sent = sent
+    event.bytes_received = received
+    event.error = error
+    return event
+
+
+def test_histogram_is_exact_for_small_latencies():
+    histogram = LatencyHistogram()
+    for microseconds in range(1, 201):
+        histogram.record(microseconds / 1e6)
+    assert histogram.count == 200
+    assert histogram.percentile(0.5) == pytest.approx(100e-6)
+    assert histogram.percentile(0.99) == pytest.approx(198e-6)
+    assert histogram.percentile(1.0) == histogram.max == 200e-6
+    assert histogram.mean == pytest.approx(100.5e-6)
+
+
+def test_histogram_percentiles_within_one_percent():
+    rng = random.Random(0)
+    latencies = sorted(rng.lognormvariate(-4, 1.5) for _ in range(10_000))
+    histogram = LatencyHistogram()
+    for latency in latencies:
+        histogram.record(latency)
+    for quantile in (0.5, 0.9, 0.99, 0.999):
+        exact = latencies[int(quantile * len(latencies)) - 1]
+        assert histogram.percentile(quantile) == pytest.approx(exact, rel=0.01)
+    assert histogram.percentile(1.0) == max(latencies)
+    assert len(histogram.counts) < 4096
+
+
+def test_histogram_empty_and_negative():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(0.99) == 0.0 and histogram.mean == 0.0
+    histogram.record(-1.0)
+    assert histogram.counts == [1] and histogram.percentile(0.5) == 0.0
+
+
+def test_request_stats_snapshot():
+    stats = RequestStats()
+    for elapsed in (0.01, 0.02, 0.03):
+        stats(_event("POST", "/v1/search/", elapsed))
+    stats(_event("GET", "/v1/documents/a.pdf/", 0.005, status=404, received=None))
+    stats(_event("GET", "/v1/documents/b.pdf/", 1.0, status=None, error=OSError()))
+    stats(_event("POST", "/v1/documents/upsert-document/", 0.5, sent=None))
+
+    snapshot = stats.snapshot()
+    assert list(snapshot) == [
+        "GET /v1/documents/{document_name}/",
+        "POST /v1/documents/upsert-document/",
+        "POST /v1/search/",
+    ]
+    search = snapshot["POST /v1/search/"]
+    assert isinstance(search, EndpointStats)
+    assert (search.requests, search.errors, search.error_rate) == (3, 0, 0.0)
+    assert (search.bytes_sent, search.bytes_received) == (30, 300)
+    assert search.p50 == pytest.approx(0.02, rel=0.01)
+    assert search.p99 == search.p999 == search.max == 0.03
+    assert search.mean == pytest.approx(0.02)
+    assert search.bytes_per_second > 0
+    document = snapshot["GET /v1/documents/{document_name}/"]
+    assert (document.requests, document.errors, document.error_rate) == (2, 2, 1.0)
+    assert (document.bytes_sent, document.bytes_received) == (20, 100)
+    assert snapshot["POST /v1/documents/upsert-document/"].bytes_sent == 0
+
+    stats.reset()
+    assert stats.snapshot() == {}
+
+
+def test_request_stats_prometheus():
+    stats = RequestStats()
+    stats(_event("POST", "/v1/search/", 0.25))
+    stats(_event("POST", "/v1/search/", 0.5, status=503))
+    stats(_event('GE"T', "/v1/\\\n", 0.001))
+
+    text = stats.prometheus(namespace="rag")
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert lines[:2] == [
+        "# HELP rag_request_duration_seconds Latency of the API requests, including retries.",
+        "# TYPE rag_request_duration_seconds summary",
+    ]
+    labels = 'method="POST",endpoint="/v1/search/"'
+    samples = dict(line.rsplit(" ", 1) for line in lines if not line.startswith("#"))
+    p50 = float(samples[f'rag_request_duration_seconds{{{labels},quantile="0.5"}}'])
+    assert p50 == pytest.approx(0.25, rel=0.01)
+    assert f'rag_request_duration_seconds{{{labels},quantile="0.999"}} 0.5' in lines
+    assert f"rag_request_duration_seconds_sum{{{labels}}} 0.75" in lines
+    assert f"rag_request_duration_seconds_count{{{labels}}} 2" in lines
+    assert "# TYPE rag_request_errors_total counter" in lines
+    assert f"rag_request_errors_total{{{labels}}} 1" in lines
+    assert f"rag_sent_bytes_total{{{labels}}} 20" in lines
+    assert f"rag_received_bytes_total{{{labels}}} 200" in lines
+    assert 'rag_request_errors_total{method="GE\\"T",endpoint="/v1/\\\\\\n"} 0' in lines
+
+
+def test_request_stats_prometheus_empty():
+    text = RequestStats().prometheus()
+    assert all(line.startswith("# ") for line in text.splitlines())
+    assert "# TYPE colivara_sent_bytes_total counter" in text
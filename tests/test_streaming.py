@@ -0,0 +1,145 @@
+import base64
+import io
+import json
+
+import pytest
+
+from colivara_py import streaming
+from colivara_py.streaming import Base64JSONBody, JSONArrayItems
+
+FIELDS = {"name": "doc", "metadata": {"a": 1}, "wait": False}
+
+
+def decode(body: Base64JSONBody) -> dict:
+    return json.loads(b"".join(body))
+
+
+class ShortReads(io.RawIOBase):
+    """A non-seekable stream that returns at most 7 bytes per read."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        chunk, self.data = self.data[:7], self.data[7:]
+        return chunk
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(streaming, "CHUNK_SIZE", 12)
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 11, 12, 13, 100])
+def test_base64_json_body_bytes_like(size):
+    data = bytes(range(size))
+    for source in (data, bytearray(data), memoryview(data)):
+        body = Base64JSONBody(FIELDS, source, "base64")
+        encoded = b"".join(body)
+        assert body.len == len(encoded)
+        assert json.loads(encoded) == {
+            **FIELDS,
+            "base64": base64.b64encode(data).decode(),
+        }
+
+
+def test_base64_json_body_path(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.7 " * 10)
+    body = Base64JSONBody({}, path, "base64")
+    assert decode(body) == {"base64": base64.b64encode(path.read_bytes()).decode()}
+    assert body.len == len(b"".join(body))
+
+
+def test_base64_json_body_seekable_file_can_be_resent():
+    file = io.BytesIO(b"skip" + b"x" * 50)
+    file.read(4)
+    body = Base64JSONBody(FIELDS, file, "base64")
+    first = b"".join(body)
+    # a retry sends the same content from the original position
+    assert b"".join(body) == first
+    assert body.len == len(first)
+    assert base64.b64decode(json.loads(first)["base64"]) == b"x" * 50
+
+
+def test_base64_json_body_unknown_size_uses_chunked_encoding():
+    data = bytes(range(50))
+    body = Base64JSONBody(FIELDS, ShortReads(data), "base64")
+    assert not hasattr(body, "len")
+    chunks = list(body)
+    # every chunk but the last one decodes on its own, i.e. there is no inner padding
+    assert all(not chunk.endswith(b"=") for chunk in chunks[1:-2])
+    assert base64.b64decode(json.loads(b"".join(chunks))["base64"]) == data
+
+
+def test_base64_json_body_read_only_object():
+    class Reader:
+        def __init__(self):
+            self.file = io.BytesIO(b"abcdef")
+
+        def read(self, size):
+            return self.file.read(size)
+
+    body = Base64JSONBody({}, Reader(), "base64")
+    assert not hasattr(body, "len")
+    assert decode(body) == {"base64": "YWJjZGVm"}
+
+
+DOCUMENTS = [
+    {"pages": [{"img_base64": "aW1n", "nested": {"pages": [1]}}], "id": 1},
+    {"id": 2, "name": 'quote " and \\ backslash', "pages": None, "tags": ["a", "b"]},
+    {"id": 4, "image": "x" * 300 + '\\ "]' * 3, "pages": ["y" * 300 + '"']},
+    {"id": 3, "metadata": {"x": [1, {"y": "}]"}]}, "pages": {"a": "[,:"}},
+]
+
+
+def split(body: bytes, size: int, skip_key=None, array_key=None) -> list:
+    items = JSONArrayItems(skip_key, array_key)
+    found = []
+    for start in range(0, len(body), size):
+        found += items.feed(body[start : start + size])
+    items.close()
+    return [json.loads(item) for item in found]
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 1000])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_json_array_items(size, indent):
+    body = json.dumps(DOCUMENTS, indent=indent).encode()
+    assert split(body, size) == DOCUMENTS
+    # the skipped value is replaced by null, nested keys of the same name are kept
+    assert split(body, size, "pages") == [
+        {**document, "pages": None} for document in DOCUMENTS
+    ]
+    assert split(b" [ ] ", size) == []
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_json_array_items_of_a_key(size):
+    document = {
+        "id": 1,
+        "metadata": {"pages": [{"id": 0}], "x": "]"},
+        "pages": DOCUMENTS,
+        "num_pages": 3,
+    }
+    body = json.dumps(document, indent=2).encode()
+    assert split(body, size, array_key="pages") == DOCUMENTS
+    for empty in ({"pages": None, "id": 1}, {"id": 1}, {"pages": []}):
+        assert split(json.dumps(empty).encode(), size, array_key="pages") == []
+
+
+def test_json_array_items_rejects_other_values():
+    with pytest.raises(ValueError, match="expected a JSON array"):
+        JSONArrayItems().feed(b' {"detail": "boom"}')
+    with pytest.raises(ValueError, match="expected a JSON array"):
+        JSONArrayItems(array_key="pages").feed(b'{"pages": "none"}')
+
+
+def test_json_array_items_incomplete():
+    items = JSONArrayItems()
+    assert items.feed(b'[{"id": 1}, {"id"') == [b'{"id": 1}']
+    with pytest.raises(ValueError, match="incomplete JSON array"):
+        items.close()
@@ -0,0 +1,290 @@
+import asyncio
+import base64
+import socket
+import time
+
+import pytest
+import requests
+
+from colivara_py import AsyncColivara, Colivara, RetryPolicy
+from colivara_py import stub_server
+from colivara_py.stub_server import StubServer, synthetic_image
+
+
+@pytest.fixture
+def server():
+    with StubServer(image_bytes=1024, pages_per_document=3) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    with Colivara(base_url=server.url, api_key="test") as client:
+        yield client
+
+
+def _call(server, method, path, **kwargs):
+    headers = {"Authorization": "Bearer test", **kwargs.pop("headers", {})}
+    return requests.request(method, f"{server.url}{path}", headers=headers, **kwargs)
+
+
+def test_collections(server, client):
+    collection = client.create_collection("reports", {"year": 2024})
+    assert (collection.name, collection.metadata) == ("reports", {"year": 2024})
+    with pytest.raises(Exception, match="already exists"):
+        client.create_collection("reports")
+    assert [c.name for c in client.list_collections()] == ["reports"]
+    assert client.get_collection("reports").id == collection.id
+    with pytest.raises(Exception, match="not found"):
+        client.get_collection("missing")
+
+    server.add_document("a.pdf", "reports")
+    renamed = client.partial_update_collection("reports", "archive", {"year": 2023})
+    assert (renamed.name, renamed.metadata) == ("archive", {"year": 2023})
+    assert client.get_document("a.pdf", "archive").collection_name == "archive"
+    client.delete_collection("archive")
+    assert server.collections == {} and server.documents == {}
+    with pytest.raises(Exception, match="not found"):
+        client.delete_collection("archive")
+
+
+def test_collection_errors(server):
+    assert (
+        _call(server, "POST", "/v1/collections/", json={"name": "all"}).status_code
+        == 422
+    )
+    assert (
+        _call(server, "POST", "/v1/collections/", data=b"not json").status_code == 422
+    )
+    body = {"name": "b"}
+    assert _call(server, "PATCH", "/v1/collections/a/", json=body).status_code == 404
+    server.add_document("a.pdf", "a")
+    server.add_document("b.pdf", "b")
+    assert _call(server, "PATCH", "/v1/collections/a/", json=body).status_code == 409
+
+
+def test_documents(server, client):
+    document = client.upsert_document(
+        "report.pdf", {"v": 1}, "reports", document_base64="JVBERi0=", wait=True
+    )
+    assert (document.name, document.num_pages, document.metadata) == (
+        "report.pdf",
+        3,
+        {"v": 1},
+    )
+    again = client.upsert_document("report.pdf", {"v": 2}, "reports", "https://x/a.pdf")
+    assert again.detail.startswith("Document is being processed")
+    stored = client.get_document("report.pdf", "reports", expand="pages")
+    assert stored.id == document.id and stored.url == "https://x/a.pdf"
+    assert [page.page_number for page in stored.pages] == [1, 2, 3]
+    assert stored.pages[0].image_bytes() == base64.b64decode(synthetic_image(1024))
+    assert [
+        page.page_number for page in client.iter_document_pages("report.pdf", "reports")
+    ] == [1, 2, 3]
+    assert client.get_document("report.pdf", "reports").pages is None
+    with pytest.raises(ValueError, match="Document not found"):
+        client.get_document("report.pdf")
+
+    server.add_document("other.pdf", "reports")
+    server.add_document("elsewhere.pdf")
+    assert [d.name for d in client.list_documents("reports")] == [
+        "report.pdf",
+        "other.pdf",
+    ]
+    assert len(client.list_documents("all")) == 3
+    assert [
+        d.name for d in client.iter_documents("reports", "pages", batch_size=1)
+    ] == [
+        "report.pdf",
+        "other.pdf",
+    ]
+
+    with pytest.raises(ValueError, match="already exists"):
+        client.partial_update_document(
+            "report.pdf", name="other.pdf", collection_name="reports"
+        )
+    moved = client.partial_update_document(
+        "report.pdf",
+        name="moved.pdf",
+        metadata={"v": 3},
+        collection_name="reports",
+        document_url="https://x/b.pdf",
+    )
+    assert (moved.name, moved.metadata, moved.url) == (
+        "moved.pdf",
+        {"v": 3},
+        "https://x/b.pdf",
+    )
+    with pytest.raises(ValueError, match="Document not found"):
+        client.partial_update_document(
+            "report.pdf", metadata={"v": 4}, collection_name="reports"
+        )
+    client.delete_document("moved.pdf", "reports")
+    with pytest.raises(ValueError, match="Deletion failed"):
+        client.delete_document("moved.pdf", "reports")
+
+
+def test_document_errors(server):
+    path = "/v1/documents/upsert-document/"
+    assert _call(server, "POST", path, json={"base64": "a"}).status_code == 422
+    response = _call(server, "POST", path, json={"name": "a.pdf"})
+    assert response.status_code == 400
+
+
+def test_streamed_upload(server, client):
+    class Stream:
+        def __init__(self):
+            self.chunks = [b"%PDF-", b"1.4"]
+
+        def read(self, size=-1):
+            return self.chunks.pop(0) if self.chunks else b""
+
+    client.upsert_document(
+        "streamed.pdf", collection_name="reports", document_data=Stream(), wait=True
+    )
+    assert ("reports", "streamed.pdf") in server.documents
+    assert server.bytes_received > len(base64.b64encode(b"%PDF-1.4"))
+
+
+def test_chunked_body_with_trailer(server):
+    host, port = server.url[len("http://") :].split(":")
+    request = (
+        b"POST /v1/search/ HTTP/1.1\r\nHost: stub\r\nAuthorization: Bearer test\r\n"
+        b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+        b'5;ext=1\r\n{"que\r\n9\r\nry": "q"}\r\n0\r\nX-Trailer: 1\r\n\r\n'
+    )
+    with socket.create_connection((host, int(port))) as connection:
+        connection.sendall(request)
+        response = b""
+        while True:
+            data = connection.recv(65536)
+            if not data:
+                break
+            response += data
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    assert response.endswith(b'{"query": "q", "results": []}')
+    assert server.bytes_received == len(b'{"query": "q"}')
+
+
+def test_search(server, client):
+    assert client.search("anything").results == []
+    for name in ("a.pdf", "b.pdf"):
+        server.add_document(name, "reports", {"name": name})
+    server.add_document("c.pdf", "other")
+
+    result = client.search("what is 1+1?", "reports", top_k=4)
+    assert len(result.results) == 4
+    assert {page.collection_name for page in result.results} == {"reports"}
+    scores = [page.normalized_score for page in result.results]
+    assert scores == sorted(scores, reverse=True) and 0 <= scores[-1] <= scores[0] < 1
+    assert result.results[0].document_metadata == {
+        "name": result.results[0].document_name
+    }
+    assert client.search("what is 1+1?", "reports", top_k=4) == result
+    assert len(client.search("what is 1+1?", top_k=10).results) == 9
+    assert _call(server, "POST", "/v1/search/", json={}).status_code == 422
+
+
+def test_embeddings(server, client):
+    server.embedding_dim, server.embedding_tokens = 8, 4
+    out = client.create_embedding(["a", "b", "a"])
+    assert [item["index"] for item in out.data] == [0, 1, 2]
+    assert len(out.data[0]["embedding"]) == 4 and len(out.data[0]["embedding"][0]) == 8
+    assert (
+        out.data[0]["embedding"] == out.data[2]["embedding"] != out.data[1]["embedding"]
+    )
+    assert out.usage == {"total_tokens": 12}
+    response = _call(server, "POST", "/v1/embeddings/", json={"input_data": ["a"]})
+    assert response.status_code == 422
+
+
+def test_file_to_imgbase64(server, client, tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    pages = client.file_to_imgbase64(str(path))
+    assert [page.page_number for page in pages] == [1, 2, 3]
+
+
+def test_injected_errors(server):
+    client = Colivara(
+        base_url=server.url,
+        api_key="test",
+        retry_policy=RetryPolicy(max_attempts=3, backoff_factor=0.001),
+    )
+    server.retry_after = 0
+    server.fail_next(503, 2)
+    client.search("q")
+    assert client.last_retries == 2
+    server.fail_next(429)
+    response = _call(server, "GET", "/v1/collections/")
+    assert (response.status_code, response.headers["Retry-After"]) == (429, "0")
+    assert response.json() == {"detail": "Injected error"}
+
+    server.error_rate, server.error_statuses = 1.0, (502,)
+    assert _call(server, "GET", "/v1/collections/").status_code == 502
+    server.error_rate = 0.0
+    assert server.requests["POST /v1/search/"] == 3
+    assert server.requests["GET /v1/collections/"] == 2
+
+
+def test_error_rate():
+    with pytest.raises(ValueError, match="error_rate"):
+        StubServer(error_rate=2)
+    with StubServer(error_rate=0.5, seed=1) as server:
+        statuses = [
+            _call(server, "GET", "/v1/collections/").status_code for _ in range(40)
+        ]
+    assert set(statuses) == {200, 429, 503}
+    assert 10 < statuses.count(200) < 30
+
+
+def test_latency():
+    with StubServer(latency=0.05) as server:
+        start = time.perf_counter()
+        _call(server, "GET", "/v1/collections/")
+        assert time.perf_counter() - start >= 0.05
+
+
+def test_unauthorized_and_unknown(server):
+    assert requests.get(f"{server.url}/v1/collections/").status_code == 401
+    response = _call(server, "GET", "/v1/unknown/")
+    assert (response.status_code, response.json()) == (404, {"detail": "Not Found"})
+    assert _call(server, "DELETE", "/v1/search/").status_code == 404
+
+
+def test_async_client(server):
+    async def run():
+        async with AsyncColivara(base_url=server.url, api_key="test") as client:
+            await client.upsert_document(
+                "a.pdf",
+                collection_name="reports",
+                document_base64="JVBERi0=",
+                wait=True,
+            )
+            pages = [
+                page async for page in client.iter_document_pages("a.pdf", "reports")
+            ]
+            results = await asyncio.gather(*(client.search(f"q{i}") for i in range(5)))
+            return pages, results
+
+    pages, results = asyncio.run(run())
+    assert len(pages) == 3 and all(len(result.results) == 3 for result in results)
+
+
+def test_start_and_stop_twice():
+    server = StubServer()
+    assert server.start().start() is server
+    server.stop()
+    server.stop()
+
+
+def test_main(monkeypatch, capsys):
+    def interrupt(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(stub_server.time, "sleep", interrupt)
+    stub_server.main(["--port", "0", "--latency", "0.01", "--image-kb", "1"])
+    assert (
+        "Serving a stand-in ColiVara API on http://127.0.0.1:"
+        in capsys.readouterr().out
+    )
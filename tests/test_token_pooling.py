@@ -0,0 +1,63 @@
+import importlib
+import sys
+
+import numpy as np
+import pytest
+
+from colivara_py.arrays import EmbeddingArrays
+from colivara_py.maxsim import MaxSimScorer
+from colivara_py.token_pooling import pool_pages, pool_tokens
+
+
+def near_duplicates(groups, copies, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((groups, dim))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    tokens = np.repeat(centers, copies, axis=0)
+    return (tokens + 0.01 * rng.standard_normal(tokens.shape)).astype(np.float32)
+
+
+def test_pool_tokens_keeps_one_vector_per_group():
+    tokens = near_duplicates(groups=10, copies=3)
+    pooled = pool_tokens(tokens, pool_factor=3)
+    assert pooled.shape == (10, 16) and pooled.dtype == np.float32
+    # every pooled vector is a group center, rescaled to the norm of its tokens
+    np.testing.assert_allclose(np.linalg.norm(pooled, axis=1), 1, rtol=0.05)
+    similarities = pooled @ tokens[::3].T
+    assert sorted(similarities.argmax(axis=1).tolist()) == list(range(10))
+
+
+def test_pool_tokens_scores_like_the_original():
+    pages = [near_duplicates(20, 4, seed=seed) for seed in range(5)]
+    queries = [page[::9] for page in pages]
+    exact = MaxSimScorer(pages).score(queries)
+    pooled = MaxSimScorer(pool_pages(pages, pool_factor=4)).score(queries)
+    np.testing.assert_allclose(pooled, exact, rtol=0.05, atol=0.05)
+    assert (pooled.argmax(axis=1) == np.arange(5)).all()
+
+
+def test_pool_tokens_edge_cases():
+    tokens = near_duplicates(2, 2)
+    assert pool_tokens(tokens, pool_factor=1) is tokens
+    assert pool_tokens(np.empty((0, 16)), 3).shape == (0, 16)
+    assert pool_tokens(tokens[:1], 3).shape == (1, 16)
+    # duplicate zero vectors keep a zero norm
+    assert not pool_tokens(np.zeros((4, 16)), 2).any()
+    with pytest.raises(ValueError, match="pool_factor must be at least 1"):
+        pool_tokens(tokens, 0)
+
+
+def test_embedding_arrays_pooled():
+    arrays = EmbeddingArrays(
+        [near_duplicates(4, 2), near_duplicates(3, 2)], "m", {"a": 1}
+    )
+    pooled = arrays.pooled(pool_factor=2)
+    assert pooled.token_counts.tolist() == [4, 3]
+    assert (pooled.model, pooled.usage) == ("m", {"a": 1})
+
+
+def test_missing_numpy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    monkeypatch.delitem(sys.modules, "colivara_py.token_pooling")
+    with pytest.raises(ImportError, match=r"colivara-py\[numpy\]"):
+        importlib.import_module("colivara_py.token_pooling")